@@ -169,6 +169,97 @@ def fnu_to_flambda_n(fnu,nu):
 
 
 #<--------------------------------Cosmology------------------------------------>
+_cosmology_cache_clearers = []
+def _clear_cosmology_caches():
+    """
+    Clears caches of quantities computed from the cosmological parameters (e.g.
+    the distance tables in :mod:`astropysics.coords.funcs`). Called whenever
+    the parameters of the current cosmology are exported, i.e. by 
+    :func:`choose_cosmology` and :func:`update_cosmology`. Modules with such
+    caches should append a function that clears the cache to
+    :data:`_cosmology_cache_clearers`.
+    """
+    for clearer in _cosmology_cache_clearers:
+        clearer()
+
+_flat_lcdm_tol = 1e-12
+def _is_flat_lcdm(omegaR,omegaM,omegaL,tol=_flat_lcdm_tol):
+    """
+    Determines if a set of FRW density parameters is a flat cosmology with
+    matter and a (positive) cosmological constant but no radiation, for which
+    :func:`_flat_lcdm_integrals` apply.
+
+    :param float tol:
+        The largest absolute value of `omegaR` and of the curvature density
+        that is treated as 0.
+    """
+    omegaK = 1 - omegaR - omegaM - omegaL
+    return abs(omegaR) <= tol and abs(omegaK) <= tol and omegaM > 0 and omegaL > 0
+
+def _flat_lcdm_integrals(z,H0,omegaM,omegaL,lookback=False):
+    """
+    Computes the cosmological distance integrals for a flat cosmology with no
+    radiation in closed form.
+
+    The lookback time integral is
+
+    .. math::
+        \\int_a^1 \\frac{da'}{a' H(a')} = \\frac{2}{3 H_0 \\sqrt{\\Omega_\\Lambda}}
+        \\left[ \\sinh^{-1} q - \\sinh^{-1} (q a^{3/2}) \\right]
+
+    with :math:`q = \\sqrt{\\Omega_\\Lambda/\\Omega_M}`, and the comoving
+    distance integral is :math:`F(1)-F(a)` with
+
+    .. math::
+        F(a) = \\int_0^a \\frac{da'}{a'^2 H(a')} = \\frac{2 \\sqrt{a}}{H_0
+        \\sqrt{\\Omega_M}} {}_2F_1(1/6,1/2;7/6;-q^2 a^3) .
+
+    For :math:`|z|<0.1` the difference :math:`F(1)-F(a)` loses precision, so
+    the comoving integral is instead evaluated with 10-point Gauss-Legendre
+    quadrature in `z`, which is accurate to rounding error there.
+
+    :param z: The redshift(s) at which to compute the integrals.
+    :type z: scalar or array
+    :param float H0: Hubble constant in km/s/Mpc
+    :param float omegaM: Matter density
+    :param float omegaL: Cosmological constant density
+    :param bool lookback:
+        If True, compute the lookback time integral, otherwise the comoving
+        distance integral.
+
+    :returns:
+        The integral(s) (in units of 1/H0) with the same shape as `z` - these
+        are the same integrals computed numerically by
+        :func:`astropysics.coords.funcs.cosmo_z_to_dist`.
+    """
+    z = np.array(z,copy=False,dtype=float)
+    if lookback:
+        #asinh(x)-asinh(y) = asinh((x^2-y^2)/(x sqrt(1+y^2)+y sqrt(1+x^2)))
+        x2 = omegaL/omegaM
+        y2 = x2*(1+z)**-3
+        diff2 = -x2*np.expm1(-3*np.log1p(z))
+        denom = (x2*(1+y2))**0.5 + (y2*(1+x2))**0.5
+        return 2*np.arcsinh(diff2/denom)/(3*H0*omegaL**0.5)
+    else:
+        from scipy.special import hyp2f1
+
+        def F(a):
+            return 2*(a/omegaM)**0.5*hyp2f1(1/6,0.5,7/6,-(omegaL/omegaM)*a**3)
+
+        res = np.array((F(1) - F(1/(1+z)))/H0)
+        small = np.abs(z) < 0.1
+        if np.any(small):
+            zs = z[small] if z.shape else z
+            x,w = np.polynomial.legendre.leggauss(10)
+            zi = np.multiply.outer(zs,(x+1)/2)
+            Ei = (omegaM*(1+zi)**3 + omegaL)**-0.5
+            ressmall = np.dot(Ei,w)*zs/2/H0
+            if z.shape:
+                res[small] = ressmall
+            else:
+                res = np.array(ressmall)
+        return res
+
 class Cosmology(object):
     """
     A base class for a cosmology - intended to be subclassed, as this cosmology
@@ -243,6 +334,7 @@ class Cosmology(object):
     def _exportParams(self):
         pd=dict([(p,getattr(self,p)) for p in self.params])
         globals().update(pd)
+        _clear_cosmology_caches()
         
     def _removeParams(self):
         from warnings import warn
@@ -276,7 +368,48 @@ class FRWCosmology(Cosmology):
     @property
     def omegaK(self):
         return 1-self.omegaR-self.omegaM-self.omegaL
-    
+
+    @property
+    def isFlatLCDM(self):
+        """
+        True if this cosmology is flat with a cosmological constant and
+        negligible radiation density, in which case the distance integrals have
+        closed forms (see :meth:`distanceIntegral`).
+        """
+        return _is_flat_lcdm(self.omegaR,self.omegaM,self.omegaL)
+
+    def distanceIntegral(self,z,lookback=False):
+        """
+        Computes the integral for the comoving distance (:math:`\\int_a^1
+        da'/(a'^2 H)`) or lookback time (:math:`\\int_a^1 da'/(a' H)`) to a
+        given redshift. If :attr:`isFlatLCDM` is True, the exact closed form is
+        used, otherwise the integral is computed numerically.
+
+        :param z: The redshift(s) at which to compute the integral.
+        :type z: scalar or array
+        :param bool lookback:
+            If True, compute the lookback time integral, otherwise the comoving
+            distance integral.
+
+        :returns:
+            The integral(s) in units of Mpc s/km (i.e. multiply by the speed of
+            light in km/s to get the comoving distance in Mpc).
+        """
+        if self.isFlatLCDM:
+            return _flat_lcdm_integrals(z,self.H0,self.omegaM,self.omegaL,
+                                        lookback)
+        else:
+            from scipy.integrate import quad
+
+            R,M,L,K = self.omegaR,self.omegaM,self.omegaL,self.omegaK
+            p = 1 if lookback else 0
+            def integrand(a):
+                return a**p*(R + M*a + L*a**4 + K*a**2)**-0.5/self.H0
+
+            z = np.array(z,copy=False,dtype=float)
+            intvec = np.vectorize(lambda zi:quad(integrand,1/(1+zi),1)[0])
+            return intvec(z)
+
     def H(self,z):
         z=np.array(z)
         M,L,R=self.omegaM,self.omegaL,self.omegaR
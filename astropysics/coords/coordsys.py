@@ -118,6 +118,11 @@ class AngularCoordinate(object):
         * A float value
             if `radians` is True, this will be interpreted as decimal radians,
             otherwise, it is in degrees.
+        * A :class:`numpy.ndarray`
+            An array-valued coordinate is created, with the same interpretation
+            of the values as for a float. Most arithmetic and unit properties
+            (e.g. :attr:`degrees`) work element-wise for such coordinates, but
+            the string formatting methods are only available for scalars.
         * An :class:`AngularCoordinate` object
             A copy of the input object will be created.
         * None
@@ -242,6 +247,11 @@ class AngularCoordinate(object):
                 else:
                     raise ValueError('Invalid string input for AngularCoordinate: '+inpt)
             
+        elif isinstance(inpt,np.ndarray):
+            if radians:
+                self._decval = inpt.astype(float)
+            else:
+                self._decval = np.radians(inpt)
         elif isSequenceType(inpt) and len(inpt)==3:
             if sghms:
                 self.hrsminsec = inpt
@@ -333,15 +343,21 @@ class AngularCoordinate(object):
         """
         if self._range is not None:
             low,up,cycle = self._range
+            if isinstance(rads,np.ndarray):
+                #array-valued coordinates need the numpy versions of all of
+                #these operations
+                from numpy import sin,arcsin as asin,all
+            else:
+                from math import sin,asin
+                all = bool
             if cycle is None:
-                if low <= rads <= up:
+                if all((low <= rads) & (rads <= up)):
                     return rads 
                 else:
                     raise ValueError('Attempted to set angular coordinate outside range')
             else:
                 if cycle > 0:
                     #this means use "triangle wave" pattern with the given quarter-period 
-                    from math import sin,asin
                     offset = low/(low-up)-0.5
                     return (up-low)*(asin(sin(pi*(2*rads/cycle+offset)))/pi+0.5)+low
                 else:
@@ -777,7 +793,7 @@ class CoordinateSystem(object):
       weighting of this class when computing coordinate transformation pathways.
       Note that *smaller* weights are preferred paths (e.g. a larger weight is
       less likely to be visited).  See 
-      :meth:`CoordinateSystem.getTransformGraph` for more details.
+      :meth:`CoordinateSystem.getTransformPath` for more details.
     
     """
     from collections import defaultdict as _defaultdict
@@ -994,6 +1010,7 @@ class CoordinateSystem(object):
                             coof.transtype = typename
                             coof.basetrans = btfunc
                             CoordinateSystem._converters[k][k2] = coof
+                CoordinateSystem._invalidateTransformCache()
             CoordinateSystem._transtypes[typename] = func
             return func
             
@@ -1014,6 +1031,13 @@ class CoordinateSystem(object):
         Determines the transformation path from one coordinate system to another
         for use with :meth:`convert`.
         
+        The path is the one with the smallest total weight, where the weight of
+        each transformation is the average of the :attr:`transweight` class
+        attributes of the two coordinate systems (default 1). Paths are
+        computed for all pairs of coordinate systems the first time they are
+        needed after a transformation is registered or removed (see
+        :meth:`_getTransformPlan`).
+        
         :param fromsys: The starting coordinate system class
         :param tosys: The target coordinate system class
         :returns: 
@@ -1027,23 +1051,80 @@ class CoordinateSystem(object):
         if tosys in CoordinateSystem._converters[fromsys]:
             return CoordinateSystem._converters[fromsys][tosys]
         else:
-            failstr = 'cannot convert coordinate system %s to %s'%(fromsys.__name__,tosys.__name__)
-            try:
-                import networkx as nx
+            return list(CoordinateSystem._getTransformPlan(fromsys,tosys)[0])
+        
+    _transformplans = None
+    @staticmethod
+    def _getTransformPlan(fromsys,tosys):
+        """
+        Returns the transformation plan to go from `fromsys` to `tosys` as a
+        2-tuple (classes,funcs), where classes is a tuple of the coordinate
+        classes along the path (including `fromsys` and `tosys`) and funcs is a
+        tuple of the transformation functions to apply in order.
+        
+        :except NotImplementedError: If no path can be found.
+        """
+        plans = CoordinateSystem._transformplans
+        if plans is None:
+            plans = CoordinateSystem._computeTransformPlans()
+        try:
+            return plans[(fromsys,tosys)]
+        except KeyError:
+            raise NotImplementedError('cannot convert coordinate system %s to %s; no transform path could be found'%(fromsys.__name__,tosys.__name__))
+        
+    @staticmethod
+    def _computeTransformPlans():
+        """
+        Computes the transformation plans for all pairs of registered coordinate
+        systems using Dijkstra's algorithm from each system, and stores them
+        for use by :meth:`_getTransformPlan` until the next call to
+        :meth:`_invalidateTransformCache`.
+        """
+        from heapq import heappush,heappop
+        from itertools import count
+        
+        convs = CoordinateSystem._converters
+        systems = set(convs)
+        for tos in convs.values():
+            systems.update(tos)
+            
+        def weight(a,b):
+            return (getattr(a,'transweight',1) + getattr(b,'transweight',1))/2
+        
+        plans = {}
+        order = count() #breaks ties in the heap without comparing classes
+        for start in systems:
+            dists = {start:0}
+            prevs = {}
+            visited = set()
+            heap = [(0,order.next(),start)]
+            while heap:
+                dist,i,sys = heappop(heap)
+                if sys in visited:
+                    continue
+                visited.add(sys)
                 
-                g = CoordinateSystem.getTransformGraph()
-                if nx.__version__>'1.4':
-                    path = nx.shortest_path(g,fromsys,tosys,weight=True)
-                else:
-                    path = nx.shortest_path(g,fromsys,tosys,weighted=True)
-                if not path:
-                    raise NotImplementedError(failstr+'; no transform path could be found')
-                return path
-            except ImportError,e:
-                if e.args[0] == 'No module named networkx':
-                    raise NotImplementedError(failstr+'; networkx not installed')
-                else:
-                    raise
+                path = [sys]
+                while path[-1] is not start:
+                    path.append(prevs[path[-1]])
+                path.reverse()
+                funcs = [convs[a][b] for a,b in zip(path[:-1],path[1:])]
+                plans[(start,sys)] = (tuple(path),tuple(funcs))
+                
+                for nextsys in convs.get(sys,()):
+                    newdist = dist + weight(sys,nextsys)
+                    if nextsys not in dists or newdist < dists[nextsys]:
+                        dists[nextsys] = newdist
+                        prevs[nextsys] = sys
+                        heappush(heap,(newdist,order.next(),nextsys))
+                        
+        #direct transforms are always used if present
+        for fromsys,tos in convs.items():
+            for tosys,func in tos.items():
+                plans[(fromsys,tosys)] = ((fromsys,tosys),(func,))
+                
+        CoordinateSystem._transformplans = plans
+        return plans
         
     _transgraph = None
     @staticmethod
@@ -1051,7 +1132,9 @@ class CoordinateSystem(object):
         """
         Returns a `networkx <http://networkx.lanl.gov/>` :class:`DiGraph` object
         representing a graph of the registered coordinate systems and the
-        transformations between them.
+        transformations between them. The edges have a 'weight' attribute
+        matching the weights used in :meth:`getTransformPath` . Note that this
+        graph is not used for the conversions themselves.
         
         :except ImportError: If networkx is not installed.
         
@@ -1078,9 +1161,12 @@ class CoordinateSystem(object):
         """
         Called when transforms are changed to invalidate the caches
         """
-        from collections import defaultdict
-        CoordinateSystem._transformcache = defaultdict(dict)
+        #caches are cleared rather than replaced so that any statistics they
+        #keep are preserved
+        for cache in CoordinateSystem._transformcache.values():
+            cache.clear()
         CoordinateSystem._transgraph = None
+        CoordinateSystem._transformplans = None
 
     def convert(self,tosys):
         """
@@ -1095,17 +1181,10 @@ class CoordinateSystem(object):
         :except: raises :exc:`NotImplementedError` if conversion is not present
         """
         
-        convpath = CoordinateSystem.getTransformPath(self.__class__,tosys)
-        
-        if callable(convpath):
-            return convpath(self)
-        else:
-            currobj = self
-            currsys = self.__class__
-            for intersys in convpath[1:-1]:
-                currobj = CoordinateSystem._converters[currsys][intersys](currobj)
-                currsys = intersys
-            return CoordinateSystem._converters[currsys][tosys](currobj)
+        currobj = self
+        for func in CoordinateSystem._getTransformPlan(self.__class__,tosys)[1]:
+            currobj = func(currobj)
+        return currobj
 
 class EpochalCoordinates(CoordinateSystem):
     """
@@ -1146,15 +1225,20 @@ class EpochalCoordinates(CoordinateSystem):
         if val is None:
             self._epoch = None
         else:
-            if val == 'now':
+            if isinstance(val,basestring) and val == 'now':
                 from ..obstools import jd_to_epoch
                 val = jd_to_epoch(None,self.julianepoch)
+            if isinstance(val,np.ndarray):
+                val = val.astype(float)
+            else:
+                val = float(val)
             if not hasattr(self,'_epoch') or self._epoch is None:
-                self._epoch = float(val)
+                self._epoch = val
             else:
-                self.transformToEpoch(float(val))
+                self.transformToEpoch(val)
     epoch = property(_getEpoch,_setEpoch,doc="""
-    Epoch for this coordinate as a float. 
+    Epoch for this coordinate as a float, or as an array of floats (one per
+    position) for array-valued coordinates.
     
     Setting with the string 'now' will set the epoch to the time at the moment
     the command is executed.
@@ -1237,6 +1321,8 @@ class RectangularCoordinates(CoordinateSystem):
         self.z = d['z']
         
     def __str__(self):
+        if isinstance(self.x,np.ndarray):
+            return '%s: x=%s,y=%s,z=%s'%(self.__class__.__name__,self.x,self.y,self.z)
         return '%s: x=%f,y=%f,z=%f'%(self.__class__.__name__,self.x,self.y,self.z)
         
     def __add__(self,other):
@@ -1260,8 +1346,7 @@ class RectangularCoordinates(CoordinateSystem):
         raise TypeError('Object of type %s does not have x,y, and z for operand -'%other.__class__)
         
     def _getLength(self):
-        from math import sqrt
-        return sqrt(self.x**2+self.y**2+self.z**2)
+        return (self.x**2+self.y**2+self.z**2)**0.5
     def _setLength(self,val):
         scaling = val/self._getLength()
         self.x *= scaling
@@ -1302,6 +1387,11 @@ class LatLongCoordinates(CoordinateSystem):
         def transform(incoord):
             ... compute the elements of a 3x3 transformation matrix...
             return np.mat([[a,b,c],[d,e,f],[g,h,i]])
+            
+    If the matrix depends on the epoch, the transformation function should also
+    accept an array epoch and return an array of shape epoch.shape+(3,3) with
+    one matrix per epoch, so that array-valued coordinates with multiple epochs
+    can be converted in one pass.
         
     *Subclassing*
     
@@ -1313,6 +1403,21 @@ class LatLongCoordinates(CoordinateSystem):
     restriction. See :class:`CoordinateSystem` for additional subclassing
     information.
     
+    *Array-valued coordinates*
+    
+    If the latitude and longitude (and optionally the errors, distance, and
+    epoch) are given as :class:`numpy.ndarray` objects, a single coordinate
+    object represents many positions. Conversions of such objects apply each
+    transformation matrix to all of the positions at once, so e.g.::
+    
+        FK5Coordinates(ra_array,dec_array).convert(GalacticCoordinates)
+        
+    performs only a few array operations regardless of the number of
+    positions. If the epoch is an array, all of the positions are still
+    converted in one pass: the transformation matrices are computed once for
+    each distinct epoch, and each position is rotated by the matrix for its own
+    epoch. The :attr:`lat` and :attr:`long` attributes are then
+    :class:`AngularCoordinate` objects with array values.
     
     """
     __slots__ = ('_lat','_long','_laterr','_longerr','_dpc')
@@ -1361,6 +1466,11 @@ class LatLongCoordinates(CoordinateSystem):
             self._dpc = None
         elif callable(val):
             self._dpc = val
+        elif isinstance(val,np.ndarray):
+            self._dpc = (val.astype(float),np.zeros(val.shape))
+        elif isinstance(val,tuple) and isinstance(val[0],np.ndarray):
+            self._dpc = (np.asarray(val[0],dtype=float),
+                         np.asarray(val[1],dtype=float))
         else:
             try:
                 self._dpc = (float(val[0]),float(val[1]))
@@ -1369,7 +1479,9 @@ class LatLongCoordinates(CoordinateSystem):
     distancepc = property(_getDistancepc,_setDistancepc,doc="""
     Parallax distance to object in parsecs, or None to assume infinity. Set as
     either a float, a 2-tuple (distance,distance_error), or a no-argument
-    callable that returns such a tuple. Getter always returns 2-tuple or None.
+    callable that returns such a tuple. For array-valued coordinates, the
+    distance may be an array or a 2-tuple of arrays. Getter always returns
+    2-tuple or None.
     """)
     
     def _getDistanceau(self):
@@ -1390,6 +1502,11 @@ class LatLongCoordinates(CoordinateSystem):
             self._dpc = None
         elif callable(val):
             self._dpc = lambda: tuple((v*pcperau for v in val()))
+        elif isinstance(val,np.ndarray):
+            self._dpc = (val*pcperau,np.zeros(val.shape))
+        elif isinstance(val,tuple) and isinstance(val[0],np.ndarray):
+            self._dpc = (np.asarray(val[0],dtype=float)*pcperau,
+                         np.asarray(val[1],dtype=float)*pcperau)
         else:
             try:
                 self._dpc = (float(val[0])*pcperau,float(val[1])*pcperau)
@@ -1409,7 +1526,10 @@ class LatLongCoordinates(CoordinateSystem):
         else:
             rads = AngularCoordinate(val).radians%_twopi
         #fix for radian range
-        if rads > 3*pi/2:
+        if isinstance(rads,np.ndarray):
+            rads = np.where(rads > 3*pi/2,rads - _twopi,
+                            np.where(rads > pi/2,pi - rads,rads))
+        elif rads > 3*pi/2:
             rads -= _twopi
         elif rads > pi/2:
             rads = pi - rads
@@ -1464,6 +1584,8 @@ class LatLongCoordinates(CoordinateSystem):
         #lat,long = self._lat.getDmsStr(),self._long.getDmsStr()
         #this requires 2.6 - switch later maybe
         #return '{0}: {1[0]}={2},{1[1]}={3}'.format(self.__class__.__name__,self._longlatnames_,long,lat)
+        if isinstance(lat,np.ndarray) or isinstance(long,np.ndarray):
+            return '%s: %s=%s,%s=%s'%(self.__class__.__name__,self._longlatnames_[0],long,self._longlatnames_[1],lat)
         return '%s: %s=%f,%s=%f'%(self.__class__.__name__,self._longlatnames_[0],long,self._longlatnames_[1],lat)
     
     def getCoordinateString(self,sep=' ',labels=False,canonical=False,hmslong=False):
@@ -1479,12 +1601,16 @@ class LatLongCoordinates(CoordinateSystem):
     
     def __eq__(self,other):
         if hasattr(other,'lat') and hasattr(other,'long'):
-            return self._lat==other.lat and self._long==other.long
+            lateq,longeq = self._lat==other.lat,self._long==other.long
+            if isinstance(lateq,np.ndarray) or isinstance(longeq,np.ndarray):
+                return lateq & longeq
+            return lateq and longeq
         else:
             return False
         
     def __ne__(self,other):
-        return not self.__eq__(other)
+        eq = self.__eq__(other)
+        return ~eq if isinstance(eq,np.ndarray) else not eq
     
     def __sub__(self,other):        
         if isinstance(other,LatLongCoordinates) or (hasattr(other,'lat') and hasattr(other,'long')):
@@ -1494,7 +1620,17 @@ class LatLongCoordinates(CoordinateSystem):
             b2 = other.lat.radians
             db = abs(b2 - b1)
             dl = abs(other.long.radians - self._long.radians)
-            
+
+            if isinstance(db,np.ndarray) or isinstance(dl,np.ndarray):
+                #array-valued coordinates - same approach using numpy
+                hdb = np.sin(db/2)**2
+                hdl = np.sin(dl/2)**2
+                havsep = np.clip(hdb + np.cos(b1)*np.cos(b2)*hdl,0,1)
+                sep = np.where((0.25 < havsep) & (havsep <= 0.75),
+                               np.arccos(1 - 2*havsep),
+                               2*np.arcsin(havsep**0.5))
+                return AngularSeparation(np.degrees(sep))
+
             #haversin(theta) = (1-cos(theta))/2 = sin^2(theta/2)
             #has better numerical accuracy if sin for theta ~ 0, cos ~ pi/2
             haversin = lambda t:(1-cos(t))/2 if pi/4 < (t%pi) < 3*pi/4 else sin(t/2)**2
@@ -1531,6 +1667,11 @@ class LatLongCoordinates(CoordinateSystem):
         newcoord.laterr = coord._laterr
         newcoord.long = coord._long
         newcoord.longerr = coord._longerr
+        #epoch and distance must be carried along for any later steps in a
+        #multi-step conversion
+        if isinstance(newcoord,EpochalCoordinates):
+            newcoord._epoch = getattr(coord,'_epoch',None)
+        newcoord._dpc = coord._dpc
         newcoord.matrixRotate(m)
         return newcoord
         
@@ -1539,7 +1680,9 @@ class LatLongCoordinates(CoordinateSystem):
         Applies the supplied  unitary rotation matrix to these coordinates. 
         
         :param matrix: the transformation matrix in cartesian coordinates
-        :type matrix: a 3x3 :class:`numpy.matrix`
+        :type matrix: 
+            a 3x3 :class:`numpy.matrix` or, for array-valued coordinates, an
+            array of matrices with shape (N,3,3)
         :param apply: 
             If True, the transform will be applied inplace to the coordinates
             for this object
@@ -1556,84 +1699,170 @@ class LatLongCoordinates(CoordinateSystem):
         
         :returns: 
             (lat,long) as decimal radians after the transformation matrix is
-            applied or (lat,long,laterr,longerr) if errors are nonzero
+            applied or (lat,long,laterr,longerr) if either error is set (a
+            missing error is treated as 0)
+            
+        .. seealso:: :meth:`matrixRotateArrays`
         """
         #for single values, math module is much faster than numpy 
         from math import sin,cos,atan2,sqrt
         
-        m = np.asmatrix(matrix)
+        m = np.asarray(matrix)
         
         if unitarycheck:
-            mdagger = m.H
+            mdagger = m.swapaxes(-1,-2).conj()
             rtol = 1e-5 if unitarycheck is True else unitarycheck
-            if not np.allclose(mdagger*m,m*mdagger,rtol):
+            if not np.allclose(np.matmul(mdagger,m),np.matmul(m,mdagger),rtol):
                 raise ValueError('matrix not unitary')
         
         lat = self.lat.radians
         long = self.long.radians
-        laterr = 0 if self.laterr is None else self.laterr.radians
-        longerr = 0 if self.longerr is None else self.longerr.radians    
+        laterr = None if self.laterr is None else self.laterr.radians
+        longerr = None if self.longerr is None else self.longerr.radians
+        
+        isarr = isinstance(lat,np.ndarray) or isinstance(long,np.ndarray)
+        if isarr or laterr is not None or longerr is not None:
+            res = LatLongCoordinates.matrixRotateArrays(m,lat,long,laterr,
+                                                        longerr,fixrange)
+            if not isarr:
+                res = tuple([float(r) for r in res])
+            if len(res) == 2:
+                latp,longp = res
+            else:
+                #a missing error is propagated as 0
+                latp,longp,dlatp,dlongp = res
+        else:
+            sb = sin(lat)
+            cb = cos(lat)
+            sl = sin(long)
+            cl = cos(long)
+            
+            #spherical w/ r=1 > cartesian, do transform
+            xp,yp,zp = np.dot(m,(cb*cl,cb*sl,sb))
+            
+            #cartesian > spherical
+            sp = sqrt(xp*xp+yp*yp) #cylindrical radius
+            latp = atan2(zp,sp)
+            longp = atan2(yp,xp)
+            
+            if fixrange:
+                ao = (latp+_pio2)/_twopi
+                latp = _twopi*abs((ao-np.floor(ao+0.5)))-_pio2
+                longp = longp % _twopi
+        
+        if apply:
+            self.lat.radians = latp
+            self.long.radians = longp
+            if laterr is not None or longerr is not None:
+                #new objects so that errors shared with other coordinates are
+                #not modified
+                self._laterr = AngularSeparation(0)
+                self._laterr.radians = dlatp
+                self._longerr = AngularSeparation(0)
+                self._longerr.radians = dlongp
+        
+        if laterr is None and longerr is None:
+            return latp,longp
+        else:
+            return latp,longp,dlatp,dlongp
+    
+    @staticmethod
+    def matrixRotateArrays(matrix,lat,long,laterr=None,longerr=None,
+                           fixrange=True):
+        """
+        Applies a rotation matrix to arrays of latitudes and longitudes (and
+        their errors) in one pass. This is the batch version of
+        :meth:`matrixRotate` , and does not require any coordinate objects.
+        
+        Errors are propogated to first order using the Jacobian of the
+        transformation, assuming the latitude and longitude errors are
+        uncorrelated.
+        
+        :param matrix: 
+            The transformation matrix in cartesian coordinates. If a single
+            3x3 matrix, it will be applied to all of the positions. If an array
+            of shape (N,3,3) (or more generally, the shape of `lat` followed by
+            (3,3)), each position is transformed with its own matrix (e.g. for
+            epoch-dependent transformations).
+        :param lat: Latitudes in radians.
+        :type lat: array-like
+        :param long: Longitudes in radians.
+        :type long: array-like
+        :param laterr: Latitude errors in radians or None for no errors.
+        :type laterr: array-like or None
+        :param longerr: Longitude errors in radians or None for no errors.
+        :type longerr: array-like or None
+        :param fixrange: 
+            If True the latitude is autmoatically fixed to be on (-pi/2,pi/2) 
+            and the longitude is on (0,2pi).  Otherwise the raw coordinate is
+            output.
+        :type fixrange: boolean
         
-        sb = sin(lat)
-        cb = cos(lat)
-        sl = sin(long)
-        cl = cos(long)
+        :returns: 
+            (lat,long) as arrays in radians after the transformation matrix is
+            applied or (lat,long,laterr,longerr) if either of the errors are
+            not None.
+            
+        :except ValueError: If the matrix shape is invalid.
         
-        #spherical w/ r=1 > cartesian
-        x = cb*cl
-        y = cb*sl
-        z = sb
+        """
+        m = np.asarray(matrix,dtype=float)
+        lat,long = np.broadcast_arrays(np.asarray(lat,dtype=float),
+                                       np.asarray(long,dtype=float))
+        
+        sb = np.sin(lat)
+        cb = np.cos(lat)
+        sl = np.sin(long)
+        cl = np.cos(long)
+        
+        if m.shape == (3,3):
+            rotate = lambda v:np.tensordot(m,v,1)
+        elif m.shape[-2:] == (3,3):
+            m = np.rollaxis(np.rollaxis(m,-1),-1) #move 3x3 to the front
+            rotate = lambda v:np.einsum('ij...,j...->i...',m,v)
+        else:
+            raise ValueError('invalid shape %s for rotation matrix'%(m.shape,))
         
-        #do transform
-        v = np.matrix((x,y,z)).T
-        xp,yp,zp = (m*v).A1
+        #spherical w/ r=1 > cartesian, do transform
+        xp,yp,zp = rotate(np.array((cb*cl,cb*sl,sb)))
         
         #cartesian > spherical
-        sp = sqrt(xp*xp+yp*yp) #cylindrical radius
-        latp = atan2(zp,sp)
-        longp = atan2(yp,xp)
+        sp2 = xp*xp+yp*yp
+        sp = sp2**0.5 #cylindrical radius
+        latp = np.arctan2(zp,sp)
+        longp = np.arctan2(yp,xp)
         
-        #propogate errors if they are present
-        
-        if laterr != 0 or longerr != 0:
-            #TODO: check formulae
-            #all of these are first order taylor expansions about the value
-            dx = sqrt((laterr*sb*cl)**2+(longerr*cb*sl)**2)
-            dy = sqrt((laterr*sb*sl)**2+(longerr*cb*cl)**2)
-            dz = abs(laterr*cb)
-            
-            dv = np.matrix((dx,dy,dz))
-            dxp,dyp,dzp = np.sqrt(np.power(m,2)*np.power(dv,2))
-            
-            #intermediate variables for dlatp - each of the partial derivatives
-            chi = 1/(1+(zp/sp)**2) 
-            #common factor chi not included below
-            dbdx = x*z*sp**-3
-            dbdy = y*z*sp**-3
-            dbdz = 1/sp
-            
-            dlatp = chi*sqrt((dxp*dbdx)**2 + (dyp*dbdy)**2 + (dzp*dbdz)**2)
-            dlongp = sqrt((dxp*yp*xp**-2)**2 + (dyp/xp)**2)/(1 + (yp/xp)**2) #indep of z
-            
-        else:
-            laterr = None
-            
         if fixrange:
             ao = (latp+_pio2)/_twopi
             latp = _twopi*abs((ao-np.floor(ao+0.5)))-_pio2
             longp = longp % _twopi
         
-        if apply:
-            self.lat.radians = latp
-            self.long.radians = longp
-            if laterr is not None:
-                self.laterr.radians = dlatp
-                self.longerr.radians = dlongp
-        
-        if laterr is None:
+        if laterr is None and longerr is None:
             return latp,longp
-        else:
-            return latp,longp,dlatp,dlongp
+        
+        #propogate errors - tangent vectors along the latitude and longitude
+        #directions are rotated, and then projected onto the new latitude and
+        #longitude directions to get the elements of the Jacobian
+        laterr = 0 if laterr is None else np.asarray(laterr,dtype=float)
+        longerr = 0 if longerr is None else np.asarray(longerr,dtype=float)
+        
+        tlat = rotate(np.array((-sb*cl,-sb*sl,cb)))
+        tlong = rotate(np.array((-cb*sl,cb*cl,np.zeros_like(cb))))
+        
+        with np.errstate(divide='ignore',invalid='ignore'):
+            r2 = sp2+zp*zp
+            dlatpdv = (-xp*zp/sp/r2,-yp*zp/sp/r2,sp/r2)
+            dlongpdv = (-yp/sp2,xp/sp2)
+            
+            jlatlat = sum([a*b for a,b in zip(dlatpdv,tlat)])
+            jlatlong = sum([a*b for a,b in zip(dlatpdv,tlong)])
+            jlonglat = sum([a*b for a,b in zip(dlongpdv,tlat[:2])])
+            jlonglong = sum([a*b for a,b in zip(dlongpdv,tlong[:2])])
+        
+        dlatp = np.hypot(jlatlat*laterr,jlatlong*longerr)
+        dlongp = np.hypot(jlonglat*laterr,jlonglong*longerr)
+        
+        return latp,longp,dlatp,dlongp
     
     def convert(self,tosys,optimize=_convertoptimizedefault):
         """
@@ -1641,16 +1870,25 @@ class LatLongCoordinates(CoordinateSystem):
         :class:`CoordinateSystem` object possibly with optimizations for
         matrix-based transformation of :class:`LatLongCoordinates` objects.
         
+        If `optimize` is True, the composed transformation matrices are stored
+        in a least-recently-used cache keyed on the source and target classes
+        and the epoch of the coordinates, so repeated conversions of many
+        coordinates at the same epoch only compute the matrices once. See
+        :meth:`getConvertCache` to configure the cache.
+        
+        Array-valued coordinates with an array of epochs are converted in one
+        pass using an array of transformation matrices with one matrix per
+        position (these are not cached). Any 'smatrix' transforms along the
+        conversion path must then accept array epochs (see
+        :class:`LatLongCoordinates`).
+        
         .. warning::
             The transformation optimizations used if `optimize` is True are only
-            correct if the conversion matricies are independent of the
-            coordinate values themselves (e.g. are linear and
-            epoch-independent). Examples that are good for optimization include
-            FK4->FK5->ICRS (all are epoch-independent).
-            
-            In the future, this system will be smarter about
-            knowing when it is safe to optimize, but for now, only use it if
-            you're sure it will work correctly.
+            correct if the conversion matricies depend only on the epoch of the
+            coordinates (true for all the built-in transformations). If a
+            transformation depends on other settings (e.g.
+            :attr:`ITRSCoordinates.polarmotion`), the cache should be cleared
+            when they are changed.
         
         :param tosys: 
             The new coordinate system class. Should be a subclass of
@@ -1665,58 +1903,21 @@ class LatLongCoordinates(CoordinateSystem):
         """
         if tosys is self.__class__:
             return self
-        
+
+        if isinstance(getattr(self,'_epoch',None),np.ndarray):
+            return self._convertByEpoch(tosys,optimize)
+
         if optimize:
-            cache = CoordinateSystem._transformcache['smatrix']
+            cache = LatLongCoordinates.getConvertCache()
+            key = cache.getKey(self.__class__,tosys,getattr(self,'_epoch',None))
             
-            #add this object to the cache if its missing
-            if self.__class__ not in cache:
-                cache[self.__class__] = {}
-                
-            if tosys not in cache[self.__class__]:
-                convs = CoordinateSystem.getTransformPath(self.__class__,tosys)
-                
-                if callable(convs): #direct transform
-                    convs = [convs]
-                else:
-                    convclasses = convs
-                    convfuncs = [CoordinateSystem._converters[c1][c2] for c1,c2 in zip(convclasses[:-1],convclasses[1:])]
-                    convs = []
-                    
-                    #now we populate convs with converter functions that are 
-                    #either multplied-together matricies if they are smatrix
-                    #converters or the actual converter function otherwise
-                    combinedmatrix = None
-                    lastcls = None
-                    for cls,cfunc in zip(convclasses[:-1],convfuncs):
-                        #note that cls here is the *previous* conversion's end 
-                        #class/current conversion's start class...
-                        if cfunc.transtype=='smatrix':
-                            mt = cfunc.basetrans(self)
-                            
-                            if hasattr(mt,'nocache') and mt.nocache:
-                                cache = None
-                            
-                            if combinedmatrix is None:
-                                combinedmatrix = mt
-                            else:
-                                combinedmatrix = mt * combinedmatrix
-                        else:
-                            if combinedmatrix is None:
-                                convs.append(cfunc)
-                            else:
-                                convs.append(_OptimizerSmatrixer(combinedmatrix,cls))
-                                convs.append(cfunc)
-                                
-                    if combinedmatrix is not None:
-                        convs.append(_OptimizerSmatrixer(combinedmatrix,convclasses[-1]))
-                
-                #now cache this transform for future use unless it was banned above
-                if cache is not None:
-                    cache[self.__class__][tosys] = convs
+            convs = cache.get(key)
+            if convs is None:
+                convs,cacheable = self._optimizedConversions(tosys)
                 
-            else:
-                convs = cache[self.__class__][tosys]
+                #now cache this transform for future use unless it was banned
+                if cacheable:
+                    cache.set(key,convs)
             
             #now actually do the transforms
             coord = self
@@ -1727,6 +1928,197 @@ class LatLongCoordinates(CoordinateSystem):
         else:
             return CoordinateSystem.convert(self,tosys)
         
+    def _optimizedConversions(self,tosys,matrixindex=None):
+        """
+        Generates the sequence of converter functions for :meth:`convert` with
+        `optimize` True, where consecutive 'smatrix' transforms are replaced by
+        their multiplied-together matrices.
+        
+        If `matrixindex` is not None, the matrices are computed for the epochs
+        of this object and then indexed by `matrixindex` (used to compute
+        matrices for array epochs only once per distinct epoch).
+        
+        :returns: convs,cacheable 
+        """
+        convclasses,convfuncs = CoordinateSystem._getTransformPlan(self.__class__,tosys)
+        convs = []
+        cacheable = True
+        
+        def smatrixer(combinedmatrix,cls):
+            if matrixindex is not None and np.ndim(combinedmatrix) > 2:
+                combinedmatrix = combinedmatrix[matrixindex]
+            return _OptimizerSmatrixer(combinedmatrix,cls)
+        
+        #now we populate convs with converter functions that are 
+        #either multplied-together matricies if they are smatrix
+        #converters or the actual converter function otherwise
+        combinedmatrix = None
+        for cls,cfunc in zip(convclasses[:-1],convfuncs):
+            #note that cls here is the *previous* conversion's end 
+            #class/current conversion's start class...
+            if cfunc.transtype=='smatrix':
+                mt = cfunc.basetrans(self)
+                
+                if hasattr(mt,'nocache') and mt.nocache:
+                    cacheable = False
+                
+                if combinedmatrix is None:
+                    combinedmatrix = mt
+                else:
+                    combinedmatrix = _matrix_product(mt,combinedmatrix)
+            else:
+                if combinedmatrix is not None:
+                    convs.append(smatrixer(combinedmatrix,cls))
+                    combinedmatrix = None
+                convs.append(cfunc)
+                    
+        if combinedmatrix is not None:
+            convs.append(smatrixer(combinedmatrix,convclasses[-1]))
+            
+        return convs,cacheable
+        
+    @staticmethod
+    def getConvertCache():
+        """
+        Returns the cache of composed transformation matrices used by
+        :meth:`convert` when `optimize` is True. The cache is a least recently
+        used cache with the following attributes that can be used to inspect or
+        configure it:
+        
+        * maxsize
+            The maximum number of transformation paths/epochs to store, or None
+            for no limit (default 256).
+        * epochquantum
+            Epochs are rounded to a multiple of this value (in years) when
+            looking up matrices, so coordinates with epochs closer than this
+            may share the same matrices. If 0 or None, epochs must match
+            exactly (default 1e-12 years, about 30 microseconds).
+        * hits
+            The number of conversions that found their matrices in the cache.
+        * misses
+            The number of conversions that had to compute their matrices.
+            
+        The cache is emptied when transformations are registered or removed,
+        and may be emptied by calling its :meth:`clear` method (which also
+        resets the hits and misses counters if its `resetcounts` argument is
+        True).
+        """
+        cache = CoordinateSystem._transformcache.get('smatrix')
+        if cache is None:
+            cache = CoordinateSystem._transformcache['smatrix'] = _TransformMatrixCache()
+        return cache
+
+    def _convertByEpoch(self,tosys,optimize):
+        """
+        Converts array-valued coordinates with an array of epochs. All of the
+        positions are converted at once, so 'smatrix' transforms must accept
+        an array epoch and return an array of matrices with shape
+        epoch.shape+(3,3) (as all of the built-in transforms do). If
+        `optimize` is True, the matrices are computed once per distinct epoch.
+        """
+        from copy import copy
+
+        shape = np.broadcast(self._lat._decval,self._long._decval,self._epoch).shape
+        
+        coord = copy(self)
+        vals = self._getArrayValues()
+        for k,v in vals.items():
+            if v is not None and np.shape(v) != shape:
+                vals[k] = np.array(np.broadcast_to(v,shape))
+        coord._setArrayValues(vals)
+        
+        if not optimize:
+            return CoordinateSystem.convert(coord,tosys)
+        
+        uepochs,inv = np.unique(coord._epoch,return_inverse=True)
+        epochcoord = copy(coord)
+        epochcoord._epoch = uepochs
+        convs = epochcoord._optimizedConversions(tosys,inv.reshape(shape))[0]
+        
+        for conv in convs:
+            coord = conv(coord)
+        return coord
+
+    def _getArrayValues(self):
+        """
+        Returns a dictionary with the numerical values of this object that may
+        be arrays (used internally for array-valued coordinates).
+        """
+        vals = {'lat':self._lat._decval,'long':self._long._decval}
+        if self._laterr is not None:
+            vals['laterr'] = self._laterr._decval
+        if self._longerr is not None:
+            vals['longerr'] = self._longerr._decval
+        if self._dpc is not None and not callable(self._dpc):
+            vals['dpc'],vals['dpcerr'] = self._dpc
+        if getattr(self,'_epoch',None) is not None:
+            vals['epoch'] = self._epoch
+        return vals
+
+    def _setArrayValues(self,vals):
+        """
+        Sets the values from a dictionary like that returned by
+        :meth:`_getArrayValues`. The angular coordinate objects are replaced
+        with copies so that they are not shared with any other object.
+        """
+        from copy import copy
+
+        for attr in ('_lat','_long','_laterr','_longerr'):
+            if attr[1:] in vals:
+                ac = copy(getattr(self,attr))
+                ac._decval = vals[attr[1:]]
+                setattr(self,attr,ac)
+        if 'dpc' in vals:
+            self._dpc = (vals['dpc'],vals['dpcerr'])
+        if 'epoch' in vals:
+            self._epoch = vals['epoch']
+
+class _TransformMatrixCache(object):
+    """
+    Used internally as the least-recently-used cache of the optimized
+    conversions for :meth:`LatLongCoordinates.convert` (see
+    :meth:`LatLongCoordinates.getConvertCache`).
+    """
+    def __init__(self,maxsize=256,epochquantum=1e-12):
+        from collections import OrderedDict
+        
+        self.maxsize = maxsize
+        self.epochquantum = epochquantum
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        
+    def __len__(self):
+        return len(self._entries)
+        
+    def getKey(self,fromsys,tosys,epoch):
+        if epoch is not None and self.epochquantum:
+            epoch = int(round(epoch/self.epochquantum))
+        return (fromsys,tosys,epoch)
+    
+    def get(self,key):
+        try:
+            val = self._entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return None
+        self._entries[key] = val #re-insert as most recently used
+        self.hits += 1
+        return val
+    
+    def set(self,key,val):
+        self._entries.pop(key,None)
+        self._entries[key] = val
+        if self.maxsize is not None:
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            
+    def clear(self,resetcounts=False):
+        self._entries.clear()
+        if resetcounts:
+            self.hits = 0
+            self.misses = 0
+        
 class _OptimizerSmatrixer(object):
     """
     Used internally to do the optimization of :meth`LatLongCoordinates.convert`
@@ -1804,6 +2196,9 @@ class EquatorialCoordinatesBase(EpochalLatLongCoordinates):
     
         
     def __str__(self):
+        if isinstance(self._lat._decval,np.ndarray) or \
+           isinstance(self._long._decval,np.ndarray):
+            return '%s %s'%(LatLongCoordinates.__str__(self),self.epochstr)
         rastr = self.ra.getHmsStr(canonical=True)
         decstr = self.dec.getDmsStr(canonical=True)
         #2.6 required for format
@@ -2021,7 +2416,7 @@ class RectangularICRSCoordinates(RectangularCoordinates,EpochalCoordinates):
     
     @CoordinateSystem.registerTransform('self',ICRSCoordinates)
     def _toICRS(ric):
-        from math import asin,atan2,degrees
+        from numpy import arcsin as asin,arctan2 as atan2,degrees
         
         x,y,z = ric.x,ric.y,ric.z        
         r = (x*x+y*y+z*z)**0.5
@@ -2039,7 +2434,7 @@ class RectangularICRSCoordinates(RectangularCoordinates,EpochalCoordinates):
     
     @CoordinateSystem.registerTransform(ICRSCoordinates,'self')    
     def _fromICRS(ic):
-        from math import sin,cos
+        from numpy import sin,cos
         
         ra,dec = ic.ra.r,ic.dec.r
         if ic.distanceau is None:
@@ -2177,7 +2572,7 @@ class RectangularGCRSCoordinates(RectangularCoordinates,EpochalCoordinates):
     
     @CoordinateSystem.registerTransform('self',GCRSCoordinates)
     def _toGCRS(rgc):
-        from math import asin,atan2,degrees
+        from numpy import arcsin as asin,arctan2 as atan2,degrees
         #TODO:implement aberration and light deflection
         
         x,y,z = rgc.x,rgc.y,rgc.z        
@@ -2196,7 +2591,7 @@ class RectangularGCRSCoordinates(RectangularCoordinates,EpochalCoordinates):
     
     @CoordinateSystem.registerTransform(GCRSCoordinates,'self')    
     def _fromGCRS(gc):
-        from math import sin,cos
+        from numpy import sin,cos
         #TODO:implement aberration and light deflection
         
         ra,dec = gc.ra.r,gc.dec.r
@@ -2281,16 +2676,95 @@ class RectangularGCRSCoordinates(RectangularCoordinates,EpochalCoordinates):
             return RectangularGCRSCoordinates(xp,yp,zp,epoch,unit=unit)
     
     
+def _rotation_matrix_stack(angle,axis):
+    """
+    Array version of :func:`astropysics.utils.alg.rotation_matrix` for rotations
+    about the 'x', 'y', or 'z' axis.
+    
+    :param angle: rotation angles in radians
+    :type angle: array-like
+    :param axis: 'x', 'y', or 'z'
+    
+    :returns: 
+        An array of shape angle.shape+(3,3) with a rotation matrix for each
+        angle.
+    """
+    angle = np.asarray(angle,dtype=float)
+    s = np.sin(angle)
+    c = np.cos(angle)
+    
+    m = np.zeros(angle.shape+(3,3))
+    if axis == 'z':
+        i,j,k = 0,1,2
+    elif axis == 'y':
+        i,j,k = 2,0,1
+    elif axis == 'x':
+        i,j,k = 1,2,0
+    else:
+        raise ValueError('invalid axis %s for rotation matrix stack'%axis)
+    m[...,i,i] = c
+    m[...,j,j] = c
+    m[...,i,j] = s
+    m[...,j,i] = -s
+    m[...,k,k] = 1
+    return m
+
+def _matrix_stack_product(*mats):
+    """
+    Multiplies together a sequence of (...,3,3) matrix stacks.
+    """
+    res = mats[0]
+    for m in mats[1:]:
+        res = np.einsum('...ij,...jk->...ik',res,m)
+    return res
+
+def _rotation_matrices(angle,axis='z',degrees=True):
+    """
+    Rotation matrix for the scalar `angle` (a 3x3 :class:`numpy.matrix`) or an
+    array of matrices with shape angle.shape+(3,3) if `angle` is an array.
+    Used by the 'smatrix' transforms so that they accept array epochs.
+    """
+    from ..utils import rotation_matrix
+
+    if np.shape(angle):
+        if degrees:
+            angle = np.radians(angle)
+        return _rotation_matrix_stack(angle,axis)
+    return rotation_matrix(angle,axis,degrees)
+
+def _matrix_product(*mats):
+    """
+    Multiplies together a sequence of 3x3 matrices, any of which may be a
+    (...,3,3) matrix stack. The result is a :class:`numpy.matrix` if all of the
+    inputs are single matrices, otherwise a matrix stack.
+    """
+    if all([np.ndim(m)==2 for m in mats]):
+        res = np.asmatrix(mats[0])
+        for m in mats[1:]:
+            res = res*m
+        return res
+    return _matrix_stack_product(*[np.asarray(m) for m in mats])
+
+def _matrix_transpose(m):
+    """
+    Transposes a 3x3 matrix or each matrix in a (...,3,3) matrix stack.
+    """
+    return np.swapaxes(m,-1,-2)
+
 def _precession_matrix_J2000_Capitaine(epoch):
         """
         Computes the precession matrix from J2000 to the given Julian Epoch.
         Expression from from Capitaine et al. 2003 as written in the USNO
         Circular 179.  This should match the IAU 2006 standard from SOFA 
         (although this has not yet been tested)
+        
+        If `epoch` is an array, the result is an array of shape 
+        epoch.shape+(3,3) with one matrix per epoch, otherwise a 3x3
+        :class:`numpy.matrix`.
         """
         from ..utils import rotation_matrix
         
-        T = (epoch-2000.0)/100.0
+        T = (np.asarray(epoch,dtype=float)-2000.0)/100.0
         #from USNO circular
         pzeta = (-0.0000003173,-0.000005971,0.01801828,0.2988499,2306.083227,2.650545)
         pz = (-0.0000002904,-0.000028596,0.01826837,1.0927348,2306.077181,-2.650545)
@@ -2299,6 +2773,12 @@ def _precession_matrix_J2000_Capitaine(epoch):
         z = np.polyval(pz,T)/3600.0
         theta = np.polyval(ptheta,T)/3600.0
         
+        if T.shape:
+            zr,thetar,zetar = np.radians(z),np.radians(theta),np.radians(zeta)
+            return _matrix_stack_product(_rotation_matrix_stack(-zr,'z'),
+                                         _rotation_matrix_stack(thetar,'y'),
+                                         _rotation_matrix_stack(-zetar,'z'))
+        
         return rotation_matrix(-z,'z') *\
                rotation_matrix(theta,'y') *\
                rotation_matrix(-zeta,'z')
@@ -2310,7 +2790,7 @@ def _load_nutation_data(datafn,seriestype):
     
     Seriestype can be 'lunisolar' or 'planetary'
     """
-    from ..utils.io import get_package_data
+    from ..utils.io import get_package_data_arrays
     
     if seriestype == 'lunisolar':
         dtypes = [('nl',int),
@@ -2345,40 +2825,213 @@ def _load_nutation_data(datafn,seriestype):
     else:
         raise ValueError('requested invalid nutation series type')
     
-    lines = [l for l in get_package_data(datafn).split('\n') if not l.startswith('#') if not l.strip()=='']
+    def parser(datastr):
+        lines = [l for l in datastr.split('\n') if not l.startswith('#') if not l.strip()=='']
+        
+        lists = [[] for n in dtypes]
+        for l in lines:
+            for i,e in enumerate(l.split(' ')):
+                lists[i].append(dtypes[i][1](e))
+        return {'terms':np.rec.fromarrays(lists,names=[e[0] for e in dtypes])}
     
-    lists = [[] for n in dtypes]
-    for l in lines:
-        for i,e in enumerate(l.split(' ')):
-            lists[i].append(dtypes[i][1](e))
-    return np.rec.fromarrays(lists,names=[e[0] for e in dtypes])
+    return get_package_data_arrays(datafn,parser)['terms'].view(np.recarray)
 
-_nut_data_00a_ls = _load_nutation_data('iau00a_nutation_ls.tab','lunisolar')
-_nut_data_00a_pl = _load_nutation_data('iau00a_nutation_pl.tab','planetary')
-def _nutation_components20062000A(epoch):
+_nut_data_files = {'00a_ls':('iau00a_nutation_ls.tab','lunisolar'),
+                   '00a_pl':('iau00a_nutation_pl.tab','planetary'),
+                   '00b':('iau00b_nutation.tab','lunisolar')}
+_nut_data = {}
+def _get_nutation_data(series):
     """
-    :returns: eps,dpsi,deps in radians
+    Returns the nutation series `series` as a record array, loading it on first
+    use. `series` can be '00a_ls', '00a_pl', or '00b'.
+    """
+    if series not in _nut_data:
+        _nut_data[series] = _load_nutation_data(*_nut_data_files[series])
+    return _nut_data[series]
+    
+_nut_00a_truncated = {} #cache of truncated series keyed on threshold
+def _nutation_series_2000A(threshold=0):
+    """
+    Selects the terms of the 2000A nutation series with amplitudes at or above 
+    `threshold` in milliarcseconds.
+    
+    The amplitude of a term is taken as the largest of its longitude and
+    obliquity coefficients, with time-dependent coefficients evaluated at one
+    century from J2000.
+    
+    :returns: (lunisolar,planetary) record arrays
     """
-    from ..obstools import epoch_to_jd
+    threshold = float(threshold)
+    ls = _get_nutation_data('00a_ls')
+    pl = _get_nutation_data('00a_pl')
+    if threshold <= 0:
+        return ls,pl
+    
+    if threshold not in _nut_00a_truncated:
+        #coefficients are in units of 0.1 microarcsec
+        lsamp = np.max([np.abs(ls.ps)+np.abs(ls.pst),np.abs(ls.pc),
+                        np.abs(ls.ec)+np.abs(ls.ect),np.abs(ls.es)],axis=0)
+        plamp = np.max([np.abs(pl.sp),np.abs(pl.cp),np.abs(pl.se),
+                        np.abs(pl.ce)],axis=0)
+        _nut_00a_truncated[threshold] = (ls[lsamp >= threshold*1e4],
+                                         pl[plamp >= threshold*1e4])
+    return _nut_00a_truncated[threshold]
+    
+def _nutation_components20062000A(intime,asepoch=True,threshold=0):
+    """
+    Computes the nutation components using the IAU 2000A model with the IAU 
+    2006 adjustments for consistency with the IAU 2006 precession (as in the 
+    SOFA routine nut06a).
+    
+    :param intime: time to compute the nutation components as a JD or epoch
+    :type intime: scalar or array-like
+    :param asepoch: if True, `intime` is interpreted as an epoch, otherwise JD
+    :type asepoch: bool
+    :param threshold: 
+        Amplitude in milliarcseconds below which series terms are dropped. 0
+        uses the full series (1365 terms), while e.g. 0.01 keeps 284 terms
+        with errors below ~0.3 mas over 1900-2100. See
+        :func:`_nutation_2000A_benchmark` .
+    :type threshold: float
+    
+    :returns: 
+        eps,dpsi,deps in radians - arrays of the same shape as `intime` if it
+        is an array.
+    """
+    from ..constants import asecperrad
+    from ..obstools import epoch_to_jd,jd2000
     from .funcs import obliquity
     
-    epsa = obliquity(epoch_to_jd(epoch),2006)
+    if asepoch:
+        jd = epoch_to_jd(intime)
+    else:
+        jd = intime
+    jd = np.asarray(jd,dtype=float)
+    shape = jd.shape
+    epsa = np.radians(obliquity(jd,2006))
+    #row vector so that the series is evaluated as (terms x epochs)
+    t = ((jd-jd2000)/36525).reshape((1,-1))
     
-    raise NotImplementedError('2006/2000A nutation model not implemented')
-
-    return epsa,dpsi,deps
+    ls,pl = _nutation_series_2000A(threshold)
+    col = lambda a:a.reshape((-1,1))
+    
+    #Lunisolar fundamental (Delaunay) arguments from IERS 2003 via SOFA
+    #Mean anomaly of moon
+    el = np.polyval((-0.00024470,0.051635,31.8792,1717915923.2178,485868.249036),
+                    t)%1296000/asecperrad
+    #Mean anomaly of sun
+    elp = np.polyval((-0.00001149,0.000136,-0.5532,129596581.0481,1287104.79305),
+                     t)%1296000/asecperrad
+    #Mean argument of the latitude of Moon
+    F = np.polyval((0.00000417,-0.001037,-12.7512,1739527262.8478,335779.526232),
+                   t)%1296000/asecperrad
+    #Mean elongation of the Moon from Sun
+    D = np.polyval((-0.00003169,0.006593,-6.3706,1602961601.2090,1072260.70369),
+                   t)%1296000/asecperrad
+    #Mean longitude of the ascending node of Moon
+    Om = np.polyval((-0.00005939,0.007702,7.4722,-6962890.5431,450160.398036),
+                    t)%1296000/asecperrad
+    
+    arg = col(ls.nl)*el + col(ls.nlp)*elp + col(ls.nF)*F + col(ls.nD)*D +\
+          col(ls.nOm)*Om
+    sarg = np.sin(arg)
+    carg = np.cos(arg)
+    dpsils = np.sum((col(ls.ps) + col(ls.pst)*t)*sarg + col(ls.pc)*carg,axis=0)
+    depsls = np.sum((col(ls.ec) + col(ls.ect)*t)*carg + col(ls.es)*sarg,axis=0)
+    
+    #Planetary arguments from IERS 2003 via SOFA - the Delaunay arguments and
+    #Neptune's longitude use the MHB2000 linear expressions
+    twopi = 2*pi
+    al = (2.35555598 + 8328.6914269554*t)%twopi
+    af = (1.627905234 + 8433.466158131*t)%twopi
+    ad = (5.198466741 + 7771.3771468121*t)%twopi
+    aom = (2.18243920 - 33.757045*t)%twopi
+    apa = (0.024381750 + 0.00000538691*t)*t #general precession in longitude
+    alme = (4.402608842 + 2608.7903141574*t)%twopi
+    alve = (3.176146697 + 1021.3285546211*t)%twopi
+    alea = (1.753470314 + 628.3075849991*t)%twopi
+    alma = (6.203480913 + 334.0612426700*t)%twopi
+    alju = (0.599546497 + 52.9690962641*t)%twopi
+    alsa = (0.874016757 + 21.3299104960*t)%twopi
+    alur = (5.481293872 + 7.4781598567*t)%twopi
+    alne = (5.321159000 + 3.8127774000*t)%twopi #MHB2000 value
+    
+    arg = col(pl.nl)*al + col(pl.nF)*af + col(pl.nD)*ad + col(pl.nOm)*aom +\
+          col(pl.nme)*alme + col(pl.nve)*alve + col(pl.nea)*alea +\
+          col(pl.nma)*alma + col(pl.nju)*alju + col(pl.nsa)*alsa +\
+          col(pl.nur)*alur + col(pl.nne)*alne + col(pl.npa)*apa
+    sarg = np.sin(arg)
+    carg = np.cos(arg)
+    dpsipl = np.sum(col(pl.sp)*sarg + col(pl.cp)*carg,axis=0)
+    depspl = np.sum(col(pl.se)*sarg + col(pl.ce)*carg,axis=0)
+    
+    p1uasecperrad = asecperrad*1e7 #0.1 microasrcsecperrad
+    dpsi = (dpsils + dpsipl)/p1uasecperrad
+    deps = (depsls + depspl)/p1uasecperrad
+    
+    #IAU 2006 adjustments for the J2 rate and the precession-consistent scale
+    fj2 = -2.7774e-6*t[0]
+    dpsi = (dpsi*(1 + 0.4697e-6 + fj2)).reshape(shape)
+    deps = (deps*(1 + fj2)).reshape(shape)
+    if not shape:
+        dpsi = dpsi[()]
+        deps = deps[()]
+    
+    return epsa,dpsi,deps #all in radians
 
+def _nutation_2000A_benchmark(thresholds=(0,0.01,0.1,1),epochs=None,repeat=3):
+    """
+    Compares truncated versions of the 2006/2000A nutation series against the 
+    full series.
+    
+    :param thresholds: 
+        Sequence of truncation thresholds in milliarcseconds (see
+        :func:`_nutation_components20062000A`).
+    :param epochs: 
+        Array of epochs to evaluate at, or None to use 2000 epochs spread over
+        1900 to 2100.
+    :param repeat: 
+        Number of times to repeat each evaluation - the fastest is reported.
+    :type repeat: int
+    
+    :returns: 
+        A list of (threshold,nterms,runtime,maxerr) tuples where `nterms` is
+        the number of series terms used, `runtime` is the time in seconds for a
+        call with all the epochs, and `maxerr` is the largest difference in the
+        nutation in longitude or obliquity from the full series in
+        milliarcseconds.
+    """
+    from time import time
+    from ..constants import asecperrad
+    
+    if epochs is None:
+        epochs = np.linspace(1900,2100,2000)
+        
+    full = _nutation_components20062000A(epochs)
+    
+    res = []
+    for th in thresholds:
+        ls,pl = _nutation_series_2000A(th)
+        dts = []
+        for i in range(repeat):
+            st = time()
+            eps,dpsi,deps = _nutation_components20062000A(epochs,threshold=th)
+            dts.append(time()-st)
+        maxerr = max(np.max(np.abs(dpsi-full[1])),np.max(np.abs(deps-full[2])))
+        res.append((th,len(ls)+len(pl),min(dts),maxerr*asecperrad*1e3))
+    return res
 
     
-_nut_data_00b = _load_nutation_data('iau00b_nutation.tab','lunisolar')
 def _nutation_components2000B(intime,asepoch=True):
     """
     :param intime: time to compute the nutation components as a JD or epoch
-    :type intime: scalar
+    :type intime: scalar or array-like
     :param asepoch: if True, `intime` is interpreted as an epoch, otherwise JD
     :type asepoch: bool
     
-    :returns: eps,dpsi,deps in radians
+    :returns: 
+        eps,dpsi,deps in radians - arrays of the same shape as `intime` if it
+        is an array.
     """
     from ..constants import asecperrad
     from ..obstools import epoch_to_jd,jd2000
@@ -2388,8 +3041,11 @@ def _nutation_components2000B(intime,asepoch=True):
         jd = epoch_to_jd(intime)
     else:
         jd = intime
+    jd = np.asarray(jd,dtype=float)
+    shape = jd.shape
     epsa = np.radians(obliquity(jd,2000))
-    t = (jd-jd2000)/36525
+    #row vector so that the series is evaluated as (terms x epochs)
+    t = ((jd-jd2000)/36525).reshape((1,-1))
     
     #Fundamental (Delaunay) arguments from Simon et al. (1994) via SOFA
     #Mean anomaly of moon
@@ -2404,14 +3060,26 @@ def _nutation_components2000B(intime,asepoch=True):
     Om = ((450160.398036 + -6962890.5431*t)%1296000)/asecperrad
     
     #compute nutation series using array loaded from data directory
-    dat = _nut_data_00b
-    arg = dat.nl*el + dat.nlp*elp + dat.nF*F + dat.nD*D + dat.nOm*Om
+    dat = _get_nutation_data('00b')
+    col = lambda a:a.reshape((-1,1))
+    arg = col(dat.nl)*el + col(dat.nlp)*elp + col(dat.nF)*F + col(dat.nD)*D +\
+          col(dat.nOm)*Om
     sarg = np.sin(arg)
     carg = np.cos(arg)
     
     p1uasecperrad = asecperrad*1e7 #0.1 microasrcsecperrad
-    dpsils = np.sum((dat.ps + dat.pst*t)*sarg + dat.pc*carg)/p1uasecperrad
-    depsls = np.sum((dat.ec + dat.ect*t)*carg + dat.es*sarg)/p1uasecperrad
+    #the weighted sums over the terms are matrix products, so no further
+    #(terms x epochs) temporaries are needed beyond the arguments above
+    t = t.ravel()
+    dpsils = (np.dot(dat.ps,sarg) + np.dot(dat.pst,sarg)*t + 
+              np.dot(dat.pc,carg))/p1uasecperrad
+    depsls = (np.dot(dat.ec,carg) + np.dot(dat.ect,carg)*t + 
+              np.dot(dat.es,sarg))/p1uasecperrad
+    dpsils = dpsils.reshape(shape)
+    depsls = depsls.reshape(shape)
+    if not shape:
+        dpsils = dpsils[()]
+        depsls = depsls[()]
     #fixed offset in place of planetary tersm
     masecperrad = asecperrad*1e3 #milliarcsec per rad
     dpsipl = -0.135/masecperrad
@@ -2419,17 +3087,91 @@ def _nutation_components2000B(intime,asepoch=True):
     
     return epsa,dpsils+dpsipl,depsls+depspl #all in radians
                
-def _nutation_matrix(epoch):
+_nutation_model = ('2000B',0) #(model,threshold) used by default
+
+def set_nutation_model(model='2000B',threshold=0):
+    """
+    Sets the nutation model used by default in all coordinate transformations
+    that involve nutation (e.g. to/from :class:`CIRSCoordinates` and
+    :class:`EquatorialCoordinatesEquinox`) and for the apparent sidereal time
+    of :func:`astropysics.coords.funcs.greenwich_sidereal_time`.
+    
+    :param model: 
+        '2000B' for the 77-term IAU 2000B model (accurate to ~1 mas from 1995
+        to 2050) or '2006/2000A' for the full IAU 2000A model with the IAU 2006
+        adjustments (~0.1 mas, but much slower to compute).
+    :type model: str
+    :param threshold: 
+        Truncation threshold in milliarcseconds for the terms of the
+        '2006/2000A' series - terms with smaller amplitudes are left out.
+        Ignored for the '2000B' model.
+    :type threshold: float
+    
+    :except ValueError: If `model` is not a valid nutation model.
+    
+    .. seealso:: :func:`get_nutation_model`
+    """
+    global _nutation_model
+    if model not in ('2000B','2006/2000A'):
+        raise ValueError('invalid nutation model %s'%model)
+    _nutation_model = (model,float(threshold))
+    #cached transformation matrices were computed with the old model
+    CoordinateSystem._invalidateTransformCache()
+    
+def get_nutation_model():
+    """
+    Returns the nutation model used by default for coordinate transformations
+    and sidereal times as a (model,threshold) tuple (see
+    :func:`set_nutation_model`).
+    """
+    return _nutation_model
+               
+def _nutation_components(intime,asepoch=True,model=None,threshold=None):
+    """
+    Computes the nutation components for the requested `model` ('2000B' or
+    '2006/2000A') and truncation `threshold` (see
+    :func:`set_nutation_model`), either of which can be None to use the
+    default set by :func:`set_nutation_model`.
+    
+    :returns: eps,dpsi,deps in radians
+    """
+    if model is None:
+        model = _nutation_model[0]
+        if threshold is None:
+            threshold = _nutation_model[1]
+    if threshold is None:
+        threshold = 0
+        
+    if model == '2000B':
+        return _nutation_components2000B(intime,asepoch)
+    elif model == '2006/2000A':
+        return _nutation_components20062000A(intime,asepoch,threshold)
+    else:
+        raise ValueError('invalid nutation model %s'%model)
+
+def _nutation_matrix(epoch,model=None,threshold=None):
     """
     Nutation matrix generated from nutation components.
     
     Matrix converts from mean coordinate to true coordinate as
     r_true = M * r_mean
+    
+    If `epoch` is an array, the result is an array of shape epoch.shape+(3,3)
+    with one matrix per epoch, otherwise a 3x3 :class:`numpy.matrix`.
+    
+    `model` can be '2000B' or '2006/2000A', and `threshold` is the truncation
+    threshold for the 2006/2000A series (see
+    :func:`_nutation_components20062000A`). If None, the defaults set by
+    :func:`set_nutation_model` are used.
     """
     from ..utils import rotation_matrix
     
-    #TODO: implement higher precision 2006/2000A model if requested/needed
-    epsa,dpsi,deps = _nutation_components2000B(epoch) #all in radians
+    epsa,dpsi,deps = _nutation_components(epoch,True,model,threshold) #radians
+    
+    if np.shape(epsa):
+        return _matrix_stack_product(_rotation_matrix_stack(-(epsa + deps),'x'),
+                                     _rotation_matrix_stack(-dpsi,'z'),
+                                     _rotation_matrix_stack(epsa,'x'))
     
     return rotation_matrix(-(epsa + deps),'x',False) *\
            rotation_matrix(-dpsi,'z',False) *\
@@ -2442,9 +3184,19 @@ def _load_CIO_locator_data(datafn):
     
     returns polycoeffs,termsarr (starting with 0th)
     """
-    from ..utils.io import get_package_data
+    from ..utils.io import get_package_data_arrays
     
-    lines = [l for l in get_package_data(datafn).split('\n') if not l.startswith('#') if not l.strip()=='']
+    arrs = get_package_data_arrays(datafn,_parse_CIO_locator_data)
+    orders = []
+    for i in range(len(arrs)//3):
+        orders.append((arrs['coeffs%i'%i],arrs['sincs%i'%i],arrs['coscs%i'%i]))
+    return arrs['polys'],orders
+
+def _parse_CIO_locator_data(datastr):
+    """
+    Parses the CIO locator data file into a dictionary of arrays.
+    """
+    lines = [l for l in datastr.split('\n') if not l.startswith('#') if not l.strip()=='']
     coeffs = []
     sincs = []
     coscs = []
@@ -2473,9 +3225,23 @@ def _load_CIO_locator_data(datafn):
         orders.append((np.array(coeffs,dtype=int),
                        np.array(sincs,dtype=float),
                        np.array(coscs,dtype=float)))
-        
-    return polys,orders
-_CIO_locator_data = _load_CIO_locator_data('iau00_cio_locator.tab')  
+    
+    res = {'polys':polys}
+    for i,(coeffs,sincs,coscs) in enumerate(orders):
+        res['coeffs%i'%i] = coeffs
+        res['sincs%i'%i] = sincs
+        res['coscs%i'%i] = coscs
+    return res
+
+_CIO_locator_data = None
+def _get_CIO_locator_data():
+    """
+    Returns the CIO locator series, loading it on first use.
+    """
+    global _CIO_locator_data
+    if _CIO_locator_data is None:
+        _CIO_locator_data = _load_CIO_locator_data('iau00_cio_locator.tab')
+    return _CIO_locator_data
 
 
 class CIRSCoordinates(EquatorialCoordinatesBase):
@@ -2526,14 +3292,11 @@ class CIRSCoordinates(EquatorialCoordinatesBase):
         if epoch is None:
             return B
         else:
-            from math import sin,cos,atan,atan2,sqrt
-            from ..utils import rotation_matrix
-            
             P = _precession_matrix_J2000_Capitaine(epoch)
             N = _nutation_matrix(epoch)
             
             
-            x,y,z = (N*P*B).A[2]
+            x,y,z = np.rollaxis(np.asarray(_matrix_product(N,P,B))[...,2,:],-1)
             xsq,ysq = x**2,y**2
             bz = 1/(1+z)
             s = CIRSCoordinates._CIOLocator(epoch)
@@ -2547,12 +3310,15 @@ class CIRSCoordinates(EquatorialCoordinatesBase):
             #                                                     [d,e,f],
             #                                                     [g,h,i]]) 
             
-            si = sin(s)
-            co = cos(s)
+            si = np.sin(s)
+            co = np.cos(s)
             
             M = [[a*co - d*si,b*co - e*si,c*co - f*si],
                  [a*si + d*co,b*si + e*co,c*si + f*co],
-                 [     g,          h,          i     ]]     
+                 [     g,          h,          i     ]]
+            if np.shape(s):
+                #array epoch - one matrix per epoch
+                return np.moveaxis(np.array(M),(0,1),(-2,-1))
             return np.mat(M)
         
 #            #SOFA implementation using spherical angles - numerically identical
@@ -2585,10 +3351,10 @@ class CIRSCoordinates(EquatorialCoordinatesBase):
         N = _nutation_matrix(epoch)
         
         #N*P*B takes GCRS to true, so CIP is bottom row
-        x,y,z = (N*P*B).A[2]
+        x,y,z = np.rollaxis(np.asarray(_matrix_product(N,P,B))[...,2,:],-1)
         
         #T = (epoch_to_jd(epoch) - jd2000)/36525
-        T = (epoch-2000)/100
+        T = (np.asarray(epoch,dtype=float)-2000)/100
         
         fundargs = [] #fundamental arguments
         
@@ -2603,13 +3369,16 @@ class CIRSCoordinates(EquatorialCoordinatesBase):
         
         fundargs = np.array(fundargs)
         
-        polys,orders = _CIO_locator_data
-        newpolys = polys.copy() #copy 0-values to add to
+        polys,orders = _get_CIO_locator_data()
+        #copy 0-values to add to, with one set per epoch for array epochs
+        newpolys = np.multiply.outer(polys,np.ones_like(T))
         
         for i,o in enumerate(orders):
             ns,sco,cco = o
-            a = np.dot(ns,fundargs)
-            newpolys[i] += np.sum(sco*np.sin(a) + cco*np.cos(a))
+            a = np.tensordot(ns,fundargs,1)
+            tshape = (-1,)+(1,)*T.ndim
+            newpolys[i] += np.sum(sco.reshape(tshape)*np.sin(a) + 
+                                  cco.reshape(tshape)*np.cos(a),axis=0)
         
         return np.polyval(newpolys[::-1],T)/asecperrad - x*y/2.0
     
@@ -2618,7 +3387,7 @@ class CIRSCoordinates(EquatorialCoordinatesBase):
         return CIRSCoordinates._CMatrix(gcrsc.epoch)
     @CoordinateSystem.registerTransform('self',GCRSCoordinates,transtype='smatrix')
     def _toGCRS(cirssys):
-        return CIRSCoordinates._CMatrix(cirssys.epoch).T
+        return _matrix_transpose(CIRSCoordinates._CMatrix(cirssys.epoch))
             
 class EquatorialCoordinatesEquinox(EquatorialCoordinatesBase):
     """
@@ -2672,10 +3441,10 @@ class EquatorialCoordinatesEquinox(EquatorialCoordinatesBase):
         else:
             P = _precession_matrix_J2000_Capitaine(gcrsc.epoch)
             N = _nutation_matrix(gcrsc.epoch)
-            return N*P*B 
+            return _matrix_product(N,P,B)
     @CoordinateSystem.registerTransform('self',GCRSCoordinates,transtype='smatrix')
     def _toGCRS(eqsys):
-        return EquatorialCoordinatesEquinox._fromGCRS(eqsys).T
+        return _matrix_transpose(EquatorialCoordinatesEquinox._fromGCRS(eqsys))
           
     @CoordinateSystem.registerTransform('self',CIRSCoordinates,transtype='smatrix')
     def _toCIRS(eqsys):
@@ -2684,15 +3453,14 @@ class EquatorialCoordinatesEquinox(EquatorialCoordinatesBase):
         else:
             from ..obstools import epoch_to_jd
             from .funcs import equation_of_the_origins
-            from ..utils import rotation_matrix
             
             jd = epoch_to_jd(eqsys.epoch)
             eqo = equation_of_the_origins(jd)*15.  #hours>degrees
-            return rotation_matrix(-eqo,'z',True)
+            return _rotation_matrices(-eqo,'z',True)
     
     @CoordinateSystem.registerTransform(CIRSCoordinates,'self',transtype='smatrix')
     def _fromCIRS(cirssys):
-        return EquatorialCoordinatesEquinox._toCIRS(cirssys).T
+        return _matrix_transpose(EquatorialCoordinatesEquinox._toCIRS(cirssys))
             
                 
 class ITRSCoordinates(EpochalLatLongCoordinates):
@@ -2755,8 +3523,6 @@ class ITRSCoordinates(EpochalLatLongCoordinates):
     
     @staticmethod
     def _WMatrix(epoch):
-        from ..utils import rotation_matrix
-        
         sp = ITRSCoordinates._TIOLocator(epoch)
         if ITRSCoordinates.polarmotion is None:
             xp = 0
@@ -2774,9 +3540,9 @@ class ITRSCoordinates(EpochalLatLongCoordinates):
         #[[1,-sp,-xp], 
         # [sp,1,yp],
         # [xp,-yp,1]] #can also do sp->0
-        return rotation_matrix(-yp,'x') *\
-               rotation_matrix(-xp,'y') *\
-               rotation_matrix(sp,'z') 
+        return _matrix_product(_rotation_matrices(-yp,'x'),
+                               _rotation_matrices(-xp,'y'),
+                               _rotation_matrices(sp,'z'))
     def transformToEpoch(self,newepoch):
         """
         Transforms these :class:`ITRSCoordinates` to a new epoch, adjusting the 
@@ -2804,7 +3570,6 @@ class ITRSCoordinates(EpochalLatLongCoordinates):
     def _fromEqC(eqc):
         from .funcs import earth_rotation_angle
         from ..obstools import epoch_to_jd
-        from ..utils import rotation_matrix
         
         epoch = eqc.epoch
         if epoch is not None:
@@ -2813,14 +3578,13 @@ class ITRSCoordinates(EpochalLatLongCoordinates):
             era = earth_rotation_angle(jd,degrees=True)
             W = ITRSCoordinates._WMatrix(eqc.epoch)
             
-            return W*rotation_matrix(era)
+            return _matrix_product(W,_rotation_matrices(era))
         else:
             return np.eye(3).view(np.matrix)
     
     @CoordinateSystem.registerTransform(EquatorialCoordinatesEquinox,'self',transtype='smatrix')
     def _fromEqE(eqe):
         from .funcs import greenwich_sidereal_time
-        from ..utils import rotation_matrix
         from ..obstools import epoch_to_jd
         
         epoch = eqe.epoch
@@ -2834,7 +3598,7 @@ class ITRSCoordinates(EpochalLatLongCoordinates):
                 gst = greenwich_sidereal_time(jd,'simple')*15. #hours -> degrees
             W = ITRSCoordinates._WMatrix(eqe.epoch)
             
-            return W*rotation_matrix(gst)
+            return _matrix_product(W,_rotation_matrices(gst))
         else:
             return np.eye(3).view(np.matrix)  
     
@@ -2842,13 +3606,13 @@ class ITRSCoordinates(EpochalLatLongCoordinates):
     def _toEqC(itrsc):
         #really we want inverse, but rotations are unitary -> inv==transpose
         #we provide itrsc in the call because the epoch is needed
-        return ITRSCoordinates._fromEqC(itrsc).T 
+        return _matrix_transpose(ITRSCoordinates._fromEqC(itrsc))
     
     @CoordinateSystem.registerTransform('self',EquatorialCoordinatesEquinox,transtype='smatrix')
     def _toEqE(itrsc):
         #really we want inverse, but rotations are unitary -> inv==transpose
         #we provide itrsc in the call because the epoch is needed
-        return ITRSCoordinates._fromEqE(itrsc).T 
+        return _matrix_transpose(ITRSCoordinates._fromEqE(itrsc))
             
 class FK5Coordinates(EquatorialCoordinatesEquinox):
     """
@@ -2862,8 +3626,6 @@ class FK5Coordinates(EquatorialCoordinatesEquinox):
         """
         Computes the precession matrix from one Julian epoch to another
         """
-        from ..utils import rotation_matrix
-        
         T = (epoch1 - 2000)/100
         dt = (epoch2 - epoch1)/100
         
@@ -2878,9 +3640,9 @@ class FK5Coordinates(EquatorialCoordinatesEquinox):
         temp = ptheta[5] + T*(ptheta[4]+T*ptheta[3])
         theta = dt*(temp + dt*((ptheta[2]+ptheta[1]*T) + dt*ptheta[0]))/3600
         
-        return rotation_matrix(-z,'z') *\
-               rotation_matrix(theta,'y') *\
-               rotation_matrix(-zeta,'z')
+        return _matrix_product(_rotation_matrices(-z,'z'),
+                               _rotation_matrices(theta,'y'),
+                               _rotation_matrices(-zeta,'z'))
     
     def transformToEpoch(self,newepoch):
         """
@@ -2926,11 +3688,11 @@ class FK5Coordinates(EquatorialCoordinatesEquinox):
         if icrsc.epoch is None:
             return B
         else:
-            return FK5Coordinates._precessionMatrixJ(2000,icrsc.epoch)*B
+            return _matrix_product(FK5Coordinates._precessionMatrixJ(2000,icrsc.epoch),B)
     
     @CoordinateSystem.registerTransform('self',ICRSCoordinates,transtype='smatrix')
     def _toICRS(fk5c):
-        return FK5Coordinates._fromICRS(fk5c).T
+        return _matrix_transpose(FK5Coordinates._fromICRS(fk5c))
     
 class FK4Coordinates(EquatorialCoordinatesEquinox):
     """
@@ -2963,7 +3725,7 @@ class FK4Coordinates(EquatorialCoordinatesEquinox):
         args = list(args)
         args.insert(0,self)
         EquatorialCoordinatesEquinox.__init__(*args,**kwargs)
-        if self._epoch==2000.:
+        if not np.shape(self._epoch) and self._epoch==2000.:
             self._epoch = 1950.
     
     def transformToEpoch(self,newepoch):
@@ -2981,8 +3743,6 @@ class FK4Coordinates(EquatorialCoordinatesEquinox):
         computes the precession matrix from one Besselian epoch to another using
         Newcomb's method.
         """
-        from ..utils import rotation_matrix
-        
         #tropical years
         t1 = (epoch1-1850.0)/1000.0    
         t2 = (epoch2-1850.0)/1000.0
@@ -3007,9 +3767,9 @@ class FK4Coordinates(EquatorialCoordinatesEquinox):
         theta = np.polyval(ptheta,dt)/3600
         
         
-        return rotation_matrix(-z,'z') *\
-               rotation_matrix(theta,'y') *\
-               rotation_matrix(-zeta,'z')
+        return _matrix_product(_rotation_matrices(-z,'z'),
+                               _rotation_matrices(theta,'y'),
+                               _rotation_matrices(-zeta,'z'))
         
                
     @CoordinateSystem.registerTransform('self',FK5Coordinates,transtype='smatrix')
@@ -3022,32 +3782,29 @@ class FK4Coordinates(EquatorialCoordinatesEquinox):
                     [0.0111814832391717,0.9999374848933135,-0.0000271625947142],
                     [0.0048590037723143,-0.0000271702937440,0.9999881946023742]])
         
-        if fk4c.epoch is not None and fk4c.epoch != 1950:
-            jd = epoch_to_jd(fk4c.epoch,False)
+        epoch = fk4c.epoch
+        if epoch is not None and np.any(np.not_equal(epoch,1950)):
+            jd = epoch_to_jd(epoch,False)
             jepoch = jd_to_epoch(jd)
-            T = (jepoch - 1950)/100
+            #B1950 itself is left uncorrected
+            T = np.where(np.equal(epoch,1950),0,(jepoch - 1950)/100)
             
             #now add in correction terms for FK4 rotating system
-            B[0,0] += -2.6455262e-9*T
-            B[0,1] += -1.1539918689e-6*T
-            B[0,2] += 2.1111346190e-6*T
-            B[1,0] += 1.1540628161e-6*T
-            B[1,1] += -1.29042997e-8*T
-            B[1,2] += 2.36021478e-8*T
-            B[2,0] += -2.1112979048e-6*T
-            B[2,1] += -5.6024448e-9*T
-            B[2,2] += 1.02587734e-8*T
-            
-            PB = FK4Coordinates._precessionMatrixB(fk4c.epoch,1950)
-            
-            return B*PB
+            dB = np.array([[-2.6455262e-9,-1.1539918689e-6,2.1111346190e-6],
+                           [1.1540628161e-6,-1.29042997e-8,2.36021478e-8],
+                           [-2.1112979048e-6,-5.6024448e-9,1.02587734e-8]])
+            B = np.asarray(B) + np.multiply.outer(T,dB)
+            
+            PB = FK4Coordinates._precessionMatrixB(epoch,1950)
+            
+            return _matrix_product(B,PB)
         else:
             return B
     
     @CoordinateSystem.registerTransform(FK5Coordinates,'self',transtype='smatrix')
     def _fromFK5(fk5c):
         #need inverse because Murray's matrix is *not* a true rotation matrix
-        return FK4Coordinates._toFK5(fk5c).I
+        return np.linalg.inv(FK4Coordinates._toFK5(fk5c))
         
 class EclipticCoordinatesCIRS(EpochalLatLongCoordinates):
     """
@@ -3079,16 +3836,14 @@ class EclipticCoordinatesCIRS(EpochalLatLongCoordinates):
     @CoordinateSystem.registerTransform('self',CIRSCoordinates,transtype='smatrix')
     def _toEq(eclsc):
         from .funcs import obliquity
-        from ..utils import rotation_matrix
         
-        return rotation_matrix(-obliquity(eclsc.jdepoch,EclipticCoordinatesCIRS.obliqyear),'x')
+        return _rotation_matrices(-obliquity(eclsc.jdepoch,EclipticCoordinatesCIRS.obliqyear),'x')
         
     @CoordinateSystem.registerTransform(CIRSCoordinates,'self',transtype='smatrix')
     def _fromEq(eqc):
         from .funcs import obliquity
-        from ..utils import rotation_matrix
         
-        return rotation_matrix(obliquity(eqc.jdepoch,EclipticCoordinatesCIRS.obliqyear),'x')
+        return _rotation_matrices(obliquity(eqc.jdepoch,EclipticCoordinatesCIRS.obliqyear),'x')
     
     def transformToEpoch(self,newepoch):
         if self.epoch is not None and newepoch is not None:
@@ -3132,16 +3887,14 @@ class EclipticCoordinatesEquinox(EpochalLatLongCoordinates):
     @CoordinateSystem.registerTransform('self',EquatorialCoordinatesEquinox,transtype='smatrix')
     def _toEq(eclsc):
         from .funcs import obliquity
-        from ..utils import rotation_matrix
         
-        return rotation_matrix(-obliquity(eclsc.jdepoch,EclipticCoordinatesEquinox.obliqyear),'x')
+        return _rotation_matrices(-obliquity(eclsc.jdepoch,EclipticCoordinatesEquinox.obliqyear),'x')
         
     @CoordinateSystem.registerTransform(EquatorialCoordinatesEquinox,'self',transtype='smatrix')
     def _fromEq(eqc):
         from .funcs import obliquity
-        from ..utils import rotation_matrix
         
-        return rotation_matrix(obliquity(eqc.jdepoch,EclipticCoordinatesEquinox.obliqyear),'x')
+        return _rotation_matrices(obliquity(eqc.jdepoch,EclipticCoordinatesEquinox.obliqyear),'x')
         
     def transformToEpoch(self,newepoch):
         if self.epoch is not None and newepoch is not None:
@@ -3192,7 +3945,7 @@ class RectangularGeocentricEclipticCoordinates(RectangularCoordinates,EpochalCoo
     
     @CoordinateSystem.registerTransform('self',EclipticCoordinatesCIRS)
     def _toEcC(rec):
-        from math import asin,atan2,degrees
+        from numpy import arcsin as asin,arctan2 as atan2,degrees
         
         x,y,z = rec.x,rec.y,rec.z        
         r = (x*x+y*y+z*z)**0.5
@@ -3203,7 +3956,7 @@ class RectangularGeocentricEclipticCoordinates(RectangularCoordinates,EpochalCoo
     
     @CoordinateSystem.registerTransform('self',EclipticCoordinatesEquinox)
     def _toEcQ(rec):
-        from math import asin,atan2,degrees
+        from numpy import arcsin as asin,arctan2 as atan2,degrees
         
         x,y,z = rec.x,rec.y,rec.z        
         r = (x*x+y*y+z*z)**0.5
@@ -3214,7 +3967,7 @@ class RectangularGeocentricEclipticCoordinates(RectangularCoordinates,EpochalCoo
     
     @CoordinateSystem.registerTransform(EclipticCoordinatesCIRS,'self')    
     def _fromEcC(ec):
-        from math import sin,cos,degrees
+        from numpy import sin,cos,degrees
         
         l,b = ec.lamb.r,ec.beta.r
         if ec.distanceau is None:
@@ -3230,7 +3983,7 @@ class RectangularGeocentricEclipticCoordinates(RectangularCoordinates,EpochalCoo
     
     @CoordinateSystem.registerTransform(EclipticCoordinatesEquinox,'self')    
     def _fromEcQ(ec):
-        from math import sin,cos,degrees
+        from numpy import sin,cos,degrees
         
         l,b = ec.lamb.r,ec.beta.r
         if ec.distanceau is None:
@@ -3269,14 +4022,13 @@ class GalacticCoordinates(EpochalLatLongCoordinates):
         
         mat = rotation_matrix(180 - GalacticCoordinates._long0_J2000.d,'z') *\
               rotation_matrix(90 - GalacticCoordinates._ngp_J2000.dec.d,'y') *\
-              rotation_matrix(GalacticCoordinates._ngp_J2000.ra.d,'z') *\
-              FK5Coordinates._precessionMatrixJ(epoch,2000)
-        mat.nocache = True #can't cache because of the need to get the epoch
+              rotation_matrix(GalacticCoordinates._ngp_J2000.ra.d,'z')
+        mat = _matrix_product(mat,FK5Coordinates._precessionMatrixJ(epoch,2000))
         return mat
     
     @CoordinateSystem.registerTransform('self',FK5Coordinates,transtype='smatrix')
     def _toFK5(galcoords):
-        return GalacticCoordinates._fromFK5(galcoords).T
+        return _matrix_transpose(GalacticCoordinates._fromFK5(galcoords))
     
     @CoordinateSystem.registerTransform(FK4Coordinates,'self',transtype='smatrix')
     def _fromFK4(fk4coords):
@@ -3286,14 +4038,13 @@ class GalacticCoordinates(EpochalLatLongCoordinates):
         
         mat = rotation_matrix(180 - GalacticCoordinates._long0_B1950.d,'z') *\
               rotation_matrix(90 - GalacticCoordinates._ngp_B1950.dec.d,'y') *\
-              rotation_matrix(GalacticCoordinates._ngp_B1950.ra.d,'z') *\
-              FK4Coordinates._precessionMatrixB(epoch,1950)
-        mat.nocache = True #can't cache because of the need to get the epoch
+              rotation_matrix(GalacticCoordinates._ngp_B1950.ra.d,'z')
+        mat = _matrix_product(mat,FK4Coordinates._precessionMatrixB(epoch,1950))
         return mat
     
     @CoordinateSystem.registerTransform('self',FK4Coordinates,transtype='smatrix')
     def _toFK4(galcoords):
-        return GalacticCoordinates._fromFK4(galcoords).T
+        return _matrix_transpose(GalacticCoordinates._fromFK4(galcoords))
         
 class SupergalacticCoordinates(EpochalLatLongCoordinates):   
     __slots__ = tuple()
@@ -3374,7 +4125,11 @@ showing both builtin and custom-added coordinates and transforms.
     
 """
 
+#importing networkx is slow, so the diagram is only built with the documentation
+from sys import modules as _sysmodules
 try:
+    if 'sphinx' not in _sysmodules:
+        raise ImportError('transform diagram is only generated by sphinx')
     from networkx import to_agraph,relabel_nodes
     graph = to_agraph(relabel_nodes(CoordinateSystem.getTransformGraph(),lambda n:n.__name__))
     graph.graph_attr.update(dict(size=r'12.0, 12.0',fontsize=12))
@@ -3407,6 +4162,7 @@ Builtin Coordinate System Transforms
     """+postbuiltin
     __doc__ = __doc__.replace('{transformdiagram}',warningstr)
     del warningstr
+del _sysmodules
     
     
 #<--------------------------Convinience Functions------------------------------>
@@ -3435,6 +4191,27 @@ def angular_string_to_dec(instr,hms=True,degrees=True):
         return ac.radians
 
 
+def _latlong_objects_to_arrays(posobjs):
+    """
+    Bulk extraction of latitudes and longitudes from a
+    :class:`LatLongCoordinates` object (possibly array-valued) or a sequence of
+    them.
+    
+    :returns: (lat,long) as 1D arrays in radians
+    """
+    if isinstance(posobjs,LatLongCoordinates):
+        posobjs = [posobjs]
+    #access the stored radian values directly to avoid the property overhead
+    lats = [o._lat._decval for o in posobjs]
+    longs = [o._long._decval for o in posobjs]
+    
+    if any([isinstance(v,np.ndarray) for v in lats]):
+        lat = np.concatenate([np.ravel(v) for v in lats]) 
+        long = np.concatenate([np.ravel(v) for v in longs])
+        return lat.astype(float),long.astype(float)
+    else:
+        return np.array(lats,dtype=float),np.array(longs,dtype=float)
+
 def objects_to_coordinate_arrays(posobjs,coords='auto',degrees=True):
     """
     converts a sequence of position objects into an array of coordinates.  
@@ -3444,31 +4221,51 @@ def objects_to_coordinate_arrays(posobjs,coords='auto',degrees=True):
     for all coordinate systems except for Equatorial, which will use 'ra,dec'
     
     if `degrees` is True, returned arrays are in degrees, otherwise radians
+    
+    `posobjs` may also be a single array-valued :class:`LatLongCoordinates`
+    object, in which case all of its positions are included.
     """
-    if coords=='auto':
-        coordnames = None
+    if isinstance(posobjs,LatLongCoordinates):
+        posobjs = [posobjs]
     else:
-        coordnames = coords.split(',')
-        
-    coords = []
+        posobjs = list(posobjs)
+    
+    if len(posobjs) == 0:
+        return np.array([])
+    
+    #number of positions in each object, to expand per-object values
+    nper = [np.size(o._lat._decval) for o in posobjs]
+    classes = list(set([o.__class__ for o in posobjs]))
+    #index into classes for each position
+    classinds = np.repeat([classes.index(o.__class__) for o in posobjs],nper)
+    
+    lat,long = _latlong_objects_to_arrays(posobjs)
     if degrees:
-        for o in posobjs:
-            if coordnames is None:
-                if isinstance(o,EquatorialCoordinates):
-                    coords.append((o.ra.d,o.dec.d))
-                else:
-                    coords.append((o.lat.d,o.long.d))
-            else:
-                coords.append([getattr(o,c).d for c in coordnames])
+        lat = np.degrees(lat)
+        long = np.degrees(long)
+    
+    if coords=='auto':
+        iseq = np.array([issubclass(c,EquatorialCoordinatesBase) for c in classes],
+                        dtype=bool)[classinds]
+        coords = [np.where(iseq,long,lat),np.where(iseq,lat,long)]
     else:
-        for o in posobjs:
-            if coordnames is None:
-                if isinstance(o,EquatorialCoordinates):
-                    coords.append((o.ra.r,o.dec.r))
+        coordnames = coords.split(',')
+        coords = []
+        for c in coordnames:
+            arr = np.empty(lat.size)
+            for i,cls in enumerate(classes):
+                msk = classinds == i
+                if c in ('long',cls._longlatnames_[0]):
+                    arr[msk] = long[msk]
+                elif c in ('lat',cls._longlatnames_[1]):
+                    arr[msk] = lat[msk]
                 else:
-                    coords.append((o.lat.r,o.long.r))
-            else:
-                coords.append([getattr(o,c).r for c in coordnames])
+                    #general attribute - fall back on per-object access
+                    vals = [getattr(o,c) for o in posobjs if o.__class__ is cls]
+                    vals = np.concatenate([np.ravel(v.d if degrees else v.r) 
+                                           for v in vals])
+                    arr[msk] = vals
+            coords.append(arr)
 
-    return np.array(coords).T
+    return np.array(coords)
 
@@ -93,6 +93,13 @@ class EphemerisObject(object):
       This should return a :class:`astropysics.coords.coordsys.CoordinateSystem`
       object of the coordinates for the current value of :attr:`jd`.
       
+    * Subclasses may implement a :meth:`_getCoordArrays` method with signature
+      f(jds) that computes the coordinates for an array of julian dates at
+      once, returning a single coordinate object with array-valued
+      coordinates (or scalar coordinates if `jds` is a scalar). If present, it
+      is used when the object is called, and should not depend on or change
+      the :attr:`jd` attribute.
+      
     * Subclasses may implement a :meth:`_jdhook` method to perform an action
       whenever the jd is changed.  It must have a signature f(oldjd,newjd). 
     
@@ -126,25 +133,45 @@ class EphemerisObject(object):
         self.name = name
         self._setValidjdrange(validjdrange)
         
-    def _getJd(self):
-        return self._jd
-    def _setJd(self,val):
+    @staticmethod
+    def _toJd(val):
+        """
+        Converts `val` to a julian date, where `val` can be a scalar JD, 'now',
+        a :class:`datetime.datetime` object or a compatible tuple, or a
+        :class:`astropysics.obstools.JulianDateArray` (converted to TT).
+        """
         from operator import isSequenceType
-        from ..obstools import calendar_to_jd
+        from ..obstools import calendar_to_jd,JulianDateArray
         from datetime import datetime
         
-        if val == 'now':
-            jd =  calendar_to_jd(datetime.utcnow(),tz=None)
+        if isinstance(val,JulianDateArray):
+            return val.tt.jd
+        elif isinstance(val,basestring) and val == 'now':
+            return calendar_to_jd(datetime.utcnow(),tz=None)
         elif hasattr(val,'year') or isSequenceType(val):
-            jd = calendar_to_jd(val)
+            return calendar_to_jd(val)
         else:
-            jd = val
+            return val
+        
+    def _checkValidRange(self,jd):
+        """
+        Issues an :exc:`EphemerisAccuracyWarning` if any of the julian date(s)
+        `jd` are outside the valid range for this object.
+        """
         if self._validrange is not None:
             from warnings import warn
-            if self._validrange[0] is not None and jd < self._validrange[0]:
-                warn('JD {0} is below the valid range for this EphemerisObject'.format(jd),EphemerisAccuracyWarning)
-            elif self._validrange[1] is not None and jd > self._validrange[1]:
-                warn('JD {0} is above the valid range for this EphemerisObject'.format(jd),EphemerisAccuracyWarning)
+            
+            minjd,maxjd = np.min(jd),np.max(jd)
+            if self._validrange[0] is not None and minjd < self._validrange[0]:
+                warn('JD {0} is below the valid range for this EphemerisObject'.format(minjd),EphemerisAccuracyWarning)
+            elif self._validrange[1] is not None and maxjd > self._validrange[1]:
+                warn('JD {0} is above the valid range for this EphemerisObject'.format(maxjd),EphemerisAccuracyWarning)
+    
+    def _getJd(self):
+        return self._jd
+    def _setJd(self,val):
+        jd = self._toJd(val)
+        self._checkValidRange(jd)
         
         self._jdhook(self._jd,jd)
         self._jd = jd        
@@ -217,14 +244,34 @@ class EphemerisObject(object):
             default coordinate type.
 
         :returns: 
-            A list of objects with the coordinates in the same order as `jds`,
-            or a single object if `jds` is None or a scalar. Outputs are
+            If the subclass implements :meth:`_getCoordArrays`, a single object
+            with array-valued coordinates (with the same shape as `jds`), or
+            scalar coordinates if `jds` is None or a scalar. Otherwise, a list
+            of objects with the coordinates in the same order as `jds`, or a
+            single object if `jds` is None or a scalar. Outputs are
             :class:`astropysics.coords.coordsys.CooordinateSystem` subclasses,
             and their type is either `coordsys` or the default type if
             `coordsys` is None.
         
         
         """
+        from ..obstools import JulianDateArray
+        
+        if jds is not None and hasattr(self,'_getCoordArrays'):
+            if isinstance(jds,np.ndarray) and jds.dtype.kind in 'iuf':
+                jdarr = jds.astype(float)
+            elif np.isscalar(jds) or hasattr(jds,'year') or \
+                 isinstance(jds,JulianDateArray):
+                jdarr = np.array(self._toJd(jds),dtype=float)
+            else:
+                jdarr = np.array([self._toJd(jd) for jd in jds],dtype=float)
+            self._checkValidRange(jdarr)
+            
+            res = self._getCoordArrays(jdarr)
+            if coordsys is not None:
+                res = res.convert(coordsys)
+            return res
+        
         single = False #return an object instead of a sequence of objects
         if jds is None:
             single = True
@@ -390,6 +437,119 @@ class ProperMotionObject(EphemerisObject):
             return self.coordclass(self.ra,self.dec,distancepc=self.distancepc,
                                            epoch=jd_to_epoch(self.jd))
             
+    def _getCoordArrays(self,jds):
+        from ..obstools import jd_to_epoch
+        from ..constants import asecperrad,cmperpc,secperyr
+        
+        jds = np.array(jds,copy=False,dtype=float)
+        dyr = (jds - self._jd0)/365.25
+        ra = self.ra0 + np.degrees(dyr*self.dra/asecperrad)
+        dec = self.dec0 + np.degrees(dyr*self.ddec/asecperrad)
+        if not jds.shape:
+            dyr,ra,dec = float(dyr),float(ra),float(dec)
+        
+        if self.distpc0 is None:
+            return self.coordclass(ra,dec,epoch=jd_to_epoch(jds))
+        else:
+            distpc = self.distpc0 + dyr*self.rv*secperyr*1e5/cmperpc
+            return self.coordclass(ra,dec,distancepc=distpc,
+                                   epoch=jd_to_epoch(jds))
+    
+def propagate_proper_motions(ra0,dec0,pmra,pmdec,epoch,epoch0=2000,
+                             parallax=None,rv=0,coordclass=None,fullout=False):
+    """
+    Propagates the positions of many stars (e.g. a whole catalog) from one
+    epoch to another in a single call. The stars are assumed to move in
+    straight lines at constant velocity in space, so this includes
+    perspective effects (e.g. the change of proper motion with distance and
+    the contribution of the radial velocity to the position change) when
+    parallaxes are given. Light travel time effects are not included.
+    
+    All of the inputs are broadcast against each other, so e.g. arrays of
+    shape (N,1) for the astrometric parameters of N stars with `epoch` of shape
+    (M,) give positions of shape (N,M).
+    
+    :param ra0: RA in degrees at `epoch0`.
+    :param dec0: Dec in degrees at `epoch0`.
+    :param pmra: 
+        Proper motion in RA, *including* the cos(dec) factor (i.e. a true
+        angular rate, unlike the `dra` of :class:`ProperMotionObject`), in
+        arcsec/yr.
+    :param pmdec: Proper motion in Dec in arcsec/yr.
+    :param epoch: The (Julian) epoch(s) to compute the positions at.
+    :param epoch0: The (Julian) epoch(s) of the input parameters.
+    :param parallax: 
+        The parallax in arcsec, or None for infinitely distant objects.
+        Non-positive parallaxes are treated as infinitely distant.
+    :param rv: 
+        Radial velocity in km/s (ignored for infinitely distant objects).
+    :param coordclass: 
+        The type of output coordinates. If None, defaults to
+        :class:`~astropysics.coords.coordsys.ICRSCoordinates`.
+    :param bool fullout: 
+        If True, the proper motions, parallax, and radial velocity at `epoch`
+        are also returned.
+        
+    :returns: 
+        A (possibly array-valued) `coordclass` object with the positions at
+        `epoch`. The distances are set if all of the parallaxes are positive.
+        If `fullout` is True, the output is (coords,pmra,pmdec,parallax,rv) for
+        `epoch`.
+    """
+    from .coordsys import ICRSCoordinates
+    from ..constants import asecperrad,cmperpc,secperyr
+    
+    if coordclass is None:
+        coordclass = ICRSCoordinates
+    
+    ra = np.radians(ra0)
+    dec = np.radians(dec0)
+    mua = np.array(pmra,copy=False,dtype=float)/asecperrad #rad/yr
+    mud = np.array(pmdec,copy=False,dtype=float)/asecperrad
+    px = np.array(0 if parallax is None else parallax,copy=False,dtype=float)
+    dt = np.array(epoch,copy=False,dtype=float) - epoch0 #yr
+    
+    #position unit vector and velocity in units of the distance per year
+    sa,ca = np.sin(ra),np.cos(ra)
+    sd,cd = np.sin(dec),np.cos(dec)
+    u = np.array(np.broadcast_arrays(cd*ca,cd*sa,sd))
+    ea = np.array(np.broadcast_arrays(-sa,ca,0*sa))
+    ed = np.array(np.broadcast_arrays(-sd*ca,-sd*sa,cd))
+    
+    #km/s -> pc/yr, and multiply by parallax (1/pc) to get distance/yr
+    kmsperpcyr = 1e5*secperyr/cmperpc
+    vr = np.where(px>0,rv*kmsperpcyr*px,0)
+    v = mua*ea + mud*ed + vr*u
+    
+    p = u + v*dt
+    scale = np.sum(p*p,axis=0)**0.5
+    p = p/scale
+    
+    rares = np.degrees(np.arctan2(p[1],p[0]))%360
+    decres = np.degrees(np.arcsin(np.clip(p[2],-1,1)))
+    epochres = np.broadcast_to(epoch,rares.shape) if rares.shape else epoch
+    if not rares.shape:
+        rares,decres = float(rares),float(decres)
+    
+    pxres = px/scale
+    if parallax is not None and np.all(px>0):
+        res = coordclass(rares,decres,distancepc=1/pxres,epoch=epochres)
+    else:
+        res = coordclass(rares,decres,epoch=epochres)
+    
+    if fullout:
+        #velocity components in the new basis, with distance now scale*d
+        sa,ca = np.sin(np.radians(rares)),np.cos(np.radians(rares))
+        sd,cd = np.sin(np.radians(decres)),np.cos(np.radians(decres))
+        ea = np.array((-sa,ca,0*sa))
+        ed = np.array((-sd*ca,-sd*sa,cd))
+        pmares = np.sum(v*ea,axis=0)/scale*asecperrad
+        pmdres = np.sum(v*ed,axis=0)/scale*asecperrad
+        with np.errstate(divide='ignore',invalid='ignore'):
+            rvres = np.where(px>0,np.sum(v*p,axis=0)/px/kmsperpcyr,rv)
+        return res,pmares,pmdres,pxres,rvres
+    else:
+        return res
     
 class KeplerianObject(EphemerisObject):
     """
@@ -419,10 +579,16 @@ class KeplerianObject(EphemerisObject):
     
     Etol = None #default set in constructor
     r""" Desired accuracy for iterative calculation of eccentric anamoly (or
-    true anomaly) from mean anomaly. If None, default tolerance is used
-    (1.5e-8), or if 0, an analytic approximation will be used (:math:`E \approx
-    M + e (1 + e \cos M ) \sin M`). This approximation can be 10x faster to
-    compute but fails for e close to 1.
+    true anomaly) from mean anomaly, as an absolute tolerance in radians on the
+    eccentric anomaly (see :func:`solve_kepler_equation`). If None, default
+    tolerance is used (1.5e-8), or if 0, an analytic approximation will be used
+    (:math:`E \approx M + e (1 + e \cos M ) \sin M`). This approximation can
+    be 10x faster to compute but fails for e close to 1.
+    
+    .. note::
+        Older versions passed this to :func:`scipy.optimize.fsolve` as its
+        relative `xtol`, so existing non-default values may need to be
+        adjusted.
     """
     
     def __init__(self,**kwargs):
@@ -452,8 +618,8 @@ class KeplerianObject(EphemerisObject):
             the signature f(x,y,z,jd) and return (xp,yp,zp). It can also be None
             to perform no trasnformation. Defaults to None.
         :params Etol:
-            Tolerance for eccentric anomaly (see :attr:`Etol`). Defaults to
-            None.
+            Absolute tolerance in radians for the eccentric anomaly (see
+            :attr:`Etol`). Defaults to None.
             
         Any other keywords will be passed into the constructor for
         :class:`EphemerisObject`.
@@ -466,7 +632,7 @@ class KeplerianObject(EphemerisObject):
         
         self.outcoords = kwargs.pop('outcoords',RectangularCoordinates)
         self.outtransfunc = kwargs.pop('outtransfunc',None)
-        self.Etol = kwargs.pop('Etol',23.43928)
+        self.Etol = kwargs.pop('Etol',None)
         
         
         kwnms = ('a','e','i','Lan','L','Lp','ap','M')
@@ -552,57 +718,57 @@ class KeplerianObject(EphemerisObject):
         """
         The mean longitude in degrees.
         """
-        if hasattr(self,'_L'):
-            return self._L(self._t)
-        else:
-            return self.M + self.Lp
+        return self._computeL(self._t)
         
     @property
     def Lp(self):
         """
         The longitude of the pericenter in degrees.
         """
-        if hasattr(self,'_Lp'):
-            return self._Lp(self._t)
-        else:
-            return self.ap + self.Lan
+        return self._computeLp(self._t)
         
     @property
     def M(self):
         """
         The mean anomaly in degrees.
         """
+        return self._computeM(self._t)
+        
+    @property
+    def ap(self):
+        """
+        The argument of the pericenter in degrees.
+        """
+        return self._computeAp(self._t)
+    
+    def _computeL(self,T):
+        if hasattr(self,'_L'):
+            return self._L(T)
+        else:
+            return self._computeM(T) + self._computeLp(T)
+        
+    def _computeLp(self,T):
+        if hasattr(self,'_Lp'):
+            return self._Lp(T)
+        else:
+            return self._computeAp(T) + self._Lan(T)
+        
+    def _computeM(self,T):
         if hasattr(self,'_M'):
-            return self._M(self._t)
+            return self._M(T)
         elif hasattr(self,'_bcsf'): #special hidden correction used for 3000BCE-3000CE 
-            from math import sin,cos
-            
             b,c,s,f = self._bcsf
-            T = self._t
             
-            return self.L - self.Lp  + b*T*T + c*cos(f*T) + s*sin(f*T)
+            return self._L(T) - self._Lp(T)  + b*T*T + c*np.cos(f*T) + s*np.sin(f*T)
         
         else:
-            return self.L - self.Lp
+            return self._computeL(T) - self._computeLp(T)
         
-    @property
-    def ap(self):
-        """
-        The argument of the pericenter in degrees.
-        """
+    def _computeAp(self,T):
         if hasattr(self,'_ap'):
-            return self._ap(self._t)
+            return self._ap(T)
         else:
-            return self.Lp - self.Lan
-    
-    @staticmethod
-    def _keplerEq(E,M,e):
-        r"""
-        Kepler's equation :math:`-M + E - e \sin(E)` - used for finding E from M
-        """
-        from math import sin
-        
-        return E-M-e*sin(E)
+            return self._computeLp(T) - self._Lan(T)
         
     @property
     def E(self):
@@ -610,20 +776,9 @@ class KeplerianObject(EphemerisObject):
         Eccentric anamoly in degrees - calculated from mean anamoly with
         accuracy given by :attr:`Etol`.
         """
-        from math import radians,sin,cos,degrees,pi
-        from scipy.optimize import fsolve
-        
-        M = radians((self.M + 180)%360 - 180)
-        e = self.e #radians
-        E0 = M + e*sin(M)*(1.0 + e*cos(M))
-        
-        if self.Etol==0:
-            Er = E0
-        elif self.Etol is None:
-            Er = fsolve(KeplerianObject._keplerEq,E0,args=(M,e))[0]
-        else:
-            Er = fsolve(KeplerianObject._keplerEq,E0,args=(M,e),xtol=self.Etol)[0]
+        from math import radians,degrees
         
+        Er = solve_kepler_equation(radians(self.M),self.e,self.Etol)
         return degrees(Er)%360
     
     @property
@@ -678,29 +833,34 @@ class KeplerianObject(EphemerisObject):
     
     
     def _getCoordObj(self):
-        from ..obstools import jd_to_epoch
-        from math import sin,cos,sqrt,radians
+        return self._getCoordArrays(self._jd)
+    
+    def _getCoordArrays(self,jds):
+        """
+        Computes the coordinates of this object for an array of julian dates at
+        once, solving Kepler's equation for all of them together.
         
-        #orbital plane coordinates
-        a = self.a
-        E = radians(self.E)
-        e = self.e
-        xp = a*(cos(E)-e)
-        yp = a*sqrt(1-e*e)*sin(E)
+        :param jds: The julian dates at which to compute the coordinates.
+        :type jds: scalar or array
         
-        w = radians(self.ap)
-        o = radians(self.Lan)
-        i = radians(self.i)
-        cw,sw = cos(w),sin(w)
-        co,so = cos(o),sin(o)
-        ci,si = cos(i),sin(i)
+        :returns: 
+            A single coordinate object of type :attr:`outcoords` with
+            array-valued coordinates (with the same shape as `jds`) or scalar
+            coordinates if `jds` is a scalar.
+        """
+        from ..obstools import jd2000,jd_to_epoch
         
-        x = (cw*co-sw*so*ci)*xp + (-sw*co - cw*so*ci)*yp
-        y = (cw*so+sw*co*ci)*xp + (-sw*so + cw*co*ci)*yp
-        z = (sw*si)*xp + (cw*si)*yp
+        jds = np.array(jds,copy=False,dtype=float)
+        T = (jds - jd2000)/36525.
+        
+        x,y,z = keplerian_positions(self._a(T),self._e(T),self._i(T),
+                                    self._Lan(T),self._computeAp(T),
+                                    self._computeM(T),self.Etol)
         
         if self.outtransfunc:
-            x,y,z = self.outtransfunc(x,y,z,self._jd)
+            x,y,z = self.outtransfunc(x,y,z,jds if jds.shape else float(jds))
+        if not jds.shape:
+            x,y,z = float(x),float(y),float(z)
         res = self.outcoords(x,y,z)              
         
         #adjust units to AU if the coordinate system has units
@@ -710,11 +870,11 @@ class KeplerianObject(EphemerisObject):
             
         #add epoch info if coordinates have an epoch
         if hasattr(res,'epoch'):
-            res.epoch = jd_to_epoch(self.jd)
+            res.epoch = jd_to_epoch(jds)
             
         return res
     
-    def getPhase(self,viewobj='Earth',illumobj='Sun'):
+    def getPhase(self,viewobj='Earth',illumobj='Sun',jds=None):
         """
         Computes the phase of this object. The phase is computed as viwed from
         `viewobj` if illuminated by `illumobj`
@@ -729,13 +889,19 @@ class KeplerianObject(EphemerisObject):
             of a solar system object (from the list in
             :func:`list_solar_system_objects`), or a :class:`EphemerisObject`
             object. If None, it is taken to be the coordinate origin.
+        :param jds: 
+            The julian date(s) at which to compute the phase, or None to use the
+            :attr:`jd` attribute.
+        :type jds: scalar, array, or None
         
         :returns: 
-            The phase of the object as a float where 0 is new and 1 is full. 
+            The phase of the object where 0 is new and 1 is full, as a float or
+            an array of the same shape as `jds`. 
         """
-        from math import sqrt
+        if jds is None:
+            jds = self.jd
         
-        c = self()
+        c = self(jds)
         coordcls = c.__class__
         x,y,z = c.x,c.y,c.z
         
@@ -743,9 +909,9 @@ class KeplerianObject(EphemerisObject):
             xi = yi = zi = 0
         else:
             if isinstance(illumobj,basestring):
-                cillum = get_solar_system_ephems(illumobj,self.jd)
+                cillum = get_solar_system_ephems(illumobj,jds)
             else:
-                cillum = illumobj(self.jd)
+                cillum = illumobj(jds)
             if not isinstance(cillum,coordcls):
                 cillum = cillum.convert(coordcls)
             xi,yi,zi = cillum.x,cillum.y,cillum.z
@@ -754,22 +920,146 @@ class KeplerianObject(EphemerisObject):
             xv = yv = zv = 0
         else:
             if isinstance(viewobj,basestring):
-                cview = get_solar_system_ephems(viewobj,self.jd)
+                cview = get_solar_system_ephems(viewobj,jds)
             else:
-                cview = viewobj(self.jd)
+                cview = viewobj(jds)
             if not isinstance(cview,coordcls):
                 cview = cview.convert(coordcls)
             xv,yv,zv = cview.x,cview.y,cview.z
         
-        xR,yR,zR = x-xv,y-yv,z-zv #view -> self vector
-        xs,ys,zs = xv-xi,yv-yi,zv-zi #illum -> view vector
-        xr,yr,zr = x-xi,y-yi,z-zi #illum -> self vector
-        
-        r = sqrt(xr*xr+yr*yr+zr*zr)
-        R = sqrt(xR*xR+yR*yR+zR*zR)
-        s = sqrt(xs*xs+ys*ys+zs*zs)
+        return _phase_from_positions((x,y,z),(xv,yv,zv),(xi,yi,zi))
+    
+def _phase_from_positions(pos,viewpos,illumpos):
+    """
+    Computes the illuminated fraction of an object at `pos` viewed from
+    `viewpos` and illuminated from `illumpos` (each an (x,y,z) tuple of scalars
+    or arrays).
+    """
+    x,y,z = pos
+    xv,yv,zv = viewpos
+    xi,yi,zi = illumpos
+    
+    xR,yR,zR = x-xv,y-yv,z-zv #view -> self vector
+    xs,ys,zs = xv-xi,yv-yi,zv-zi #illum -> view vector
+    xr,yr,zr = x-xi,y-yi,z-zi #illum -> self vector
+    
+    r2 = xr*xr+yr*yr+zr*zr
+    R2 = xR*xR+yR*yR+zR*zR
+    s2 = xs*xs+ys*ys+zs*zs
+    
+    return (1+(r2 + R2 - s2)/(2*np.sqrt(r2*R2)))/2
+    
+def solve_kepler_equation(M,e,tol=None,maxiter=30):
+    r"""
+    Solves Kepler's equation :math:`M = E - e \sin E` for the eccentric anomaly
+    :math:`E` using Halley's method. All of the inputs are solved for at once,
+    so this can be used for many times and/or many orbits together.
+    
+    :param M: The mean anomaly in radians.
+    :type M: scalar or array
+    :param e: 
+        The eccentricity (must be <1). Must be broadcastable against `M`, e.g.
+        an array of shape (N,1) for N orbits with `M` of shape (N,Ntimes).
+    :type e: scalar or array
+    :param tol: 
+        The absolute tolerance (in radians) of the solution - iteration stops
+        once the last Halley step for every element is smaller than this (note
+        that this is not a relative tolerance like the `xtol` of
+        :func:`scipy.optimize.fsolve`). If None, 1.5e-8 is used, and if 0, the
+        approximation :math:`E \approx M + e (1 + e \cos
+        M ) \sin M` is returned without iterating.
+    :type tol: float or None
+    :param int maxiter: 
+        The maximum number of iterations. If this is reached before all the
+        solutions are within `tol`, a :exc:`EphemerisAccuracyWarning` is
+        issued.
+    
+    :returns: 
+        The eccentric anomaly in radians for the mean anomaly wrapped to
+        :math:`-\pi \le M < \pi`, as a float or an array of the broadcast
+        shape of `M` and `e`.
+    """
+    M = (np.array(M,copy=False,dtype=float) + pi)%_twopi - pi
+    e = np.array(e,copy=False,dtype=float)
+    
+    E = M + e*np.sin(M)*(1.0 + e*np.cos(M))
+    if tol is None:
+        tol = 1.5e-8
+    if tol != 0:
+        #this starting point converges for all M when e is large
+        hie = e>0.8
+        if np.any(hie):
+            Ehie = M + 0.85*e*np.where(M<0,-1,1)
+            E = np.where(hie,Ehie,E)
+            
+        for n in range(maxiter):
+            sE = e*np.sin(E)
+            cE = e*np.cos(E)
+            f = E - sE - M
+            fp = 1 - cE
+            dE = -2*f*fp/(2*fp*fp - f*sE)
+            E = E + dE
+            if np.all(np.abs(dE) < tol):
+                break
+        else:
+            from warnings import warn
+            warn('Kepler equation solutions not within tolerance %g after %i iterations'%(tol,maxiter),EphemerisAccuracyWarning)
+            
+    if E.shape:
+        return E
+    else:
+        return float(E)
+    
+def keplerian_positions(a,e,i,Lan,ap,M,Etol=None):
+    """
+    Computes cartesian positions from Keplerian orbital elements, with the x-y
+    plane as the plane of reference and x towards the reference direction.
+    
+    The elements can be arrays of any broadcastable shape, so this computes
+    positions for many times and/or many orbits at once. For example, for N
+    orbits with elements given at epoch `jd0` as arrays of length N, with mean
+    motion `n` (degrees/day), positions at an array of times `jds` are::
+    
+        x,y,z = keplerian_positions(a[:,np.newaxis],e[:,np.newaxis],
+                                    i[:,np.newaxis],Lan[:,np.newaxis],
+                                    ap[:,np.newaxis],
+                                    M0[:,np.newaxis]+np.outer(n,jds-jd0))
+    
+    which gives arrays of shape (N,len(jds)).
+    
+    :param a: Semi-major axis.
+    :param e: Eccentricity.
+    :param i: Inclination in degrees.
+    :param Lan: Longitude of the ascending node in degrees.
+    :param ap: Argument of the pericenter in degrees.
+    :param M: Mean anomaly in degrees.
+    :param Etol: 
+        Tolerance of the eccentric anomaly (see :func:`solve_kepler_equation`).
         
-        return (1+(r*r + R*R - s*s)/(2*r*R))/2
+    :returns: 
+        3-tuple of arrays (x,y,z) in the same units as `a`, with the broadcast
+        shape of the elements.
+    """
+    a = np.array(a,copy=False,dtype=float)
+    e = np.array(e,copy=False,dtype=float)
+    
+    #orbital plane coordinates
+    E = solve_kepler_equation(np.radians(M),e,Etol)
+    xp = a*(np.cos(E)-e)
+    yp = a*np.sqrt(1-e*e)*np.sin(E)
+    
+    w = np.radians(ap)
+    o = np.radians(Lan)
+    i = np.radians(i)
+    cw,sw = np.cos(w),np.sin(w)
+    co,so = np.cos(o),np.sin(o)
+    ci,si = np.cos(i),np.sin(i)
+    
+    x = (cw*co-sw*so*ci)*xp + (-sw*co - cw*so*ci)*yp
+    y = (cw*so+sw*co*ci)*xp + (-sw*so + cw*co*ci)*yp
+    z = (sw*si)*xp + (cw*si)*yp
+    
+    return x,y,z
     
 def get_solar_system_ephems(objname,jds=None,coordsys=None):
     """
@@ -797,7 +1087,7 @@ def get_solar_system_ephems(objname,jds=None,coordsys=None):
     from copy import copy
     
     #entrys in _ss_ephems may be classes or objects, so do the appropriate action.
-    eobj = _ss_ephems[objname]
+    eobj = _get_ss_ephems()[objname]
     if jds is None:
         if isclass(eobj):
             return eobj()
@@ -814,27 +1104,53 @@ def list_solar_system_objects():
     Returns a list of objects that can be returned by
     :func:`get_solar_system_object`.
     """
-    return _ss_ephems.keys()
+    return _get_ss_ephems().keys()
 
-_ss_ephems = {}
+_ss_ephems = None
+_ss_ephems_method = None
 def set_solar_system_ephem_method(meth=None):
     """
-    Sets the type of ephemerides to use.  Must be 'keplerian' for now.
+    Sets the type of ephemerides to use. Can be:
+    
+    * 'keplerian' : Approximate Keplerian orbital elements from JPL, and the
+      Simon et al. 1994 Moon and SOFA Earth models.
+    * 'chebyshev' : Chebyshev fits to the 'keplerian' ephemerides (see
+      :class:`ChebyshevEphemeris`), loaded from the file generated by
+      :func:`build_solar_system_ephem_cache`.  These are much faster to
+      evaluate, but only cover the time range used to generate the file.
+    
+    The ephemerides themselves are generated the next time they are needed.
     """
-    global _ss_ephems
+    global _ss_ephems,_ss_ephems_method
     
     if meth is None:
         meth = 'keplerian'
-    if meth=='keplerian':
-        _ss_ephems = _keplerian_ephems()
-    else:
-        raise ValueError('Solar System ephemerides method %s not available'%s)
-
-    #Add in Simon 94 Moon and SOFA earth pv if needed
-    if 'Moon' not in _ss_ephems:
-        _ss_ephems['Moon'] = Moon
-    if 'Earth' not in _ss_ephems:
-        _ss_ephems['Earth'] = Earth
+    if meth not in ('keplerian','chebyshev'):
+        raise ValueError('Solar System ephemerides method %s not available'%meth)
+    
+    _ss_ephems_method = meth
+    _ss_ephems = None
+    
+def _get_ss_ephems():
+    """
+    Returns the dictionary of solar system ephemerides for the method set by
+    :func:`set_solar_system_ephem_method`, generating it if necessary.
+    """
+    global _ss_ephems
+    
+    if _ss_ephems is None:
+        if _ss_ephems_method=='keplerian':
+            _ss_ephems = _keplerian_ephems()
+        elif _ss_ephems_method=='chebyshev':
+            _ss_ephems = load_solar_system_ephem_cache()
+        
+        #Add in Simon 94 Moon and SOFA earth pv if needed
+        if 'Moon' not in _ss_ephems:
+            _ss_ephems['Moon'] = Moon
+        if 'Earth' not in _ss_ephems:
+            _ss_ephems['Earth'] = Earth
+    
+    return _ss_ephems
         
 
 #<--------------Moon location from Simon 94------------------------------------>
@@ -901,33 +1217,87 @@ class Moon(KeplerianObject):
         
         KeplerianObject.__init__(self,**kw)
         
-    def getPhase(self,viewobj=None,illumobj=None):
+    def getPhase(self,viewobj=None,illumobj=None,jds=None):
         """
         Computes the phase of the Moon. This is computed as viewed from the
         Earth and illuminated by the Sun if `viewobj` and `illumobj` are None -
         otherwise, see :meth:`KeplerianObject.getPhase` for the meaning of the
         parameters.
         
-        :returns: A float where 1 is full and 0 is new.
+        :param jds: 
+            The julian date(s) at which to compute the phase, or None to use the
+            :attr:`jd` attribute.
+        :type jds: scalar, array, or None
+        
+        :returns: 
+            A float (or array of the same shape as `jds`) where 1 is full and 0
+            is new.
         
         """
         if viewobj is None and illumobj is None:
-            from math import sqrt
+            if jds is None:
+                jds = self.jd
             
-            c = self()
+            c = self(jds)
             xg,yg,zg = c.x,c.y,c.z #relative to earth
-            xe,ye,ze = earth_pos_vel(self.jd,False)[0] #heliocentric
-            xm = xe + xg
-            ym = ye + yg
-            zm = ze + zg
+            xe,ye,ze = earth_pos_vel(jds,False)[0] #heliocentric
             
-            r = sqrt(xm*xm+ym*ym+zm*zm)
-            R = sqrt(xg*xg+yg*yg+zg*zg)
-            s = sqrt(xe*xe+ye*ye+ze*ze)
-            
-            return (1+(r*r + R*R - s*s)/(2*r*R))/2
+            #view from earth (origin) and illuminated from the sun (-earth)
+            return _phase_from_positions((xg,yg,zg),(0,0,0),(-xe,-ye,-ze))
         else:
-            return KeplerianObject.getPhase(self,viewobj,illumobj)
+            return KeplerianObject.getPhase(self,viewobj,illumobj,jds)
+    
+def moon_separation_illumination(targets,jds):
+    """
+    Computes the angular separation between the Moon and a set of targets, as
+    well as the illuminated fraction of the Moon, for an array of times at
+    once. The Moon positions are geocentric (so the topocentric Moon may be up
+    to ~1 degree from these positions).
+    
+    :param targets: 
+        The positions of the targets. Either an array-valued
+        :class:`astropysics.coords.coordsys.LatLongCoordinates` object, a
+        sequence of such objects, or a 2-tuple of arrays (ra,dec) in degrees
+        (ICRS/GCRS orientation). Equatorial coordinates other than ICRS and
+        GCRS are converted to ICRS.
+    :param jds: The julian date(s) at which to compute the Moon's position.
+    :type jds: scalar or array
+    
+    :returns: 
+        (sep,illum) where `sep` is the Moon-target separation in degrees as an
+        array of shape (ntargets,)+jds.shape and `illum` is the illuminated
+        fraction of the Moon (0 is new and 1 is full) with the shape of
+        `jds`.
+    """
+    from .coordsys import LatLongCoordinates,ICRSCoordinates,GCRSCoordinates,\
+                          _latlong_objects_to_arrays
+    from .funcs import _lonlat_to_unit_vectors
+    
+    if isinstance(targets,LatLongCoordinates):
+        targets = [targets]
+    if len(targets)==2 and not isinstance(targets[0],LatLongCoordinates):
+        ra,dec = targets
+        tvecs = _lonlat_to_unit_vectors(ra,dec) #ntargets x 3
+    else:
+        targets = [t if isinstance(t,(ICRSCoordinates,GCRSCoordinates)) else \
+                   t.convert(ICRSCoordinates) for t in targets]
+        dec,ra = _latlong_objects_to_arrays(targets)
+        tvecs = _lonlat_to_unit_vectors(ra,dec,degrees=False)
+    
+    jds = np.array(jds,copy=False,dtype=float)
+    c = Moon()(jds)
+    mpos = np.array((c.x,c.y,c.z))
+    mvecs = mpos.reshape(3,-1)/np.sum(mpos*mpos,axis=0).reshape(1,-1)**0.5
+    
+    #atan2(|t x m|,t.m) is accurate for all separations
+    cosd = np.dot(tvecs,mvecs)
+    sind = np.sum(np.cross(tvecs[:,np.newaxis,:],mvecs.T)**2,axis=-1)**0.5
+    sep = np.degrees(np.arctan2(sind,cosd)).reshape((len(tvecs),)+jds.shape)
+    
+    epos = earth_pos_vel(jds,False)[0] #heliocentric
+    illum = _phase_from_positions(mpos,(0,0,0),-epos)
+    
+    return sep,illum
         
         
 #<--------------Earth location and velocity, based on SOFA epv00--------------->
@@ -941,11 +1311,23 @@ def _load_earth_series(datafn='earth_series.tab'):
     """
     Load series terms from VSOP2000 simplified solution
     """
-    from ..utils.io import get_package_data
-    from numpy import array,matrix
+    from ..utils.io import get_package_data_arrays
+    from numpy import matrix
+    
+    res = get_package_data_arrays(datafn,_parse_earth_series)
+    for k in res:
+        if k.endswith('mat'):
+            res[k] = matrix(res[k])
+    return res
+    
+def _parse_earth_series(datastr):
+    """
+    Parses the VSOP2000 simplified solution series into a dictionary of arrays.
+    """
+    from numpy import array
     from math import sqrt
     
-    lines = [l for l in get_package_data(datafn).split('\n') if not l.startswith('#') if not l=='']
+    lines = [l for l in datastr.split('\n') if not l.startswith('#') if not l=='']
     
     lst = None
     lsts = {}
@@ -966,8 +1348,9 @@ def _load_earth_series(datafn='earth_series.tab'):
     #first add all matricies
     for k,v in lsts.items():
         if k.endswith('mat'):
-            mat = matrix(v,dtype=float)
-            res[k] = mat.reshape(sqrt(mat.size),sqrt(mat.size))
+            mat = array(v,dtype=float)
+            n = int(round(sqrt(mat.size)))
+            res[k] = mat.reshape(n,n)
     
     #now construct all the x,y,z combination series'
     coeffnms = set([k[:-1] for k in lsts.keys() if not k.endswith('mat')])
@@ -993,50 +1376,58 @@ def _load_earth_series(datafn='earth_series.tab'):
     
     return res
     
-_earth_series_coeffs = _load_earth_series()
+_earth_series_coeffs = None
+def _get_earth_series_coeffs():
+    """
+    Returns the Earth position series coefficients, loading them on first use.
+    """
+    global _earth_series_coeffs
+    if _earth_series_coeffs is None:
+        _earth_series_coeffs = _load_earth_series()
+    return _earth_series_coeffs
 
+_earth_series_chunksize = 1024
 def _compute_earth_series(t,coeffs0,coeffs1,coeffs2):
     """
     Internal function to computes Earth location/velocity components from series
     coefficients.
     
-    :param t:  T = JD - JD_J2000
+    :param t:  T = JD - JD_J2000 (scalar or array)
     :param coeffs0: constant term
     :param coeffs1: T^1 term
     :param coeffs2: T^2 term
     
-    :returns: pos,vel
-    """
-    
-    #T^0 terms
-    acs = coeffs0[:,0::3]
-    bcs = coeffs0[:,1::3]
-    ccs = coeffs0[:,2::3]
-    ps = bcs + ccs*t
-    pos = np.sum(acs*np.cos(ps),axis=1)
-    vel = np.sum(-acs*ccs*np.sin(ps),axis=1)
-    
-    #T^1 terms
-    acs = coeffs1[:,0::3]
-    bcs = coeffs1[:,1::3]
-    ccs = coeffs1[:,2::3]
-    cts = ccs*t
-    ps = bcs + cts
-    cps = np.cos(ps)
-    pos += np.sum(acs*t*cps,axis=1)
-    vel += np.sum(acs*(cps - cts*np.sin(ps)),axis=1)
-    
-    #T^2 terms
-    acs = coeffs2[:,0::3]
-    bcs = coeffs2[:,1::3]
-    ccs = coeffs2[:,2::3]
-    cts = ccs*t
-    ps = bcs + cts
-    cps = np.cos(ps)
-    pos += np.sum(acs*cps*t*t,axis=1)
-    vel += np.sum(acs*t*(2.0*cps - cts*np.sin(ps)),axis=1)
-    
-    return pos,vel
+    :returns: 
+        pos,vel as arrays of shape (3,) for scalar `t` or (3,)+t.shape for
+        array `t`
+    """
+    t = np.array(t,copy=False,dtype=float)
+    tf = t.ravel()
+    
+    pos = np.zeros((3,tf.size))
+    vel = np.zeros((3,tf.size))
+    
+    #the (terms x times) arrays are evaluated in chunks to limit memory use
+    for i in range(0,tf.size,_earth_series_chunksize):
+        ti = tf[i:i+_earth_series_chunksize]
+        for p,coeffs in enumerate((coeffs0,coeffs1,coeffs2)):
+            acs = coeffs[:,0::3]
+            bcs = coeffs[:,1::3,np.newaxis]
+            ccs = coeffs[:,2::3,np.newaxis]
+            ps = bcs + ccs*ti
+            
+            #sum a cos(b + c t) and a c sin(b + c t) over terms for each time
+            acos = np.einsum('ij,ijk->ik',acs,np.cos(ps))
+            acsin = np.einsum('ij,ijk->ik',acs*ccs[...,0],np.sin(ps))
+            
+            #T^p terms and their derivatives
+            tp = ti**p
+            pos[:,i:i+_earth_series_chunksize] += tp*acos
+            vel[:,i:i+_earth_series_chunksize] -= tp*acsin
+            if p > 0:
+                vel[:,i:i+_earth_series_chunksize] += p*ti**(p-1)*acos
+    
+    return pos.reshape((3,)+t.shape),vel.reshape((3,)+t.shape)
 
 class Earth(EphemerisObject):
     """
@@ -1054,11 +1445,16 @@ class Earth(EphemerisObject):
         EphemerisObject.__init__(self,'Earth',(jd1900,jd2100))
         
     def _getCoordObj(self):
+        return self._getCoordArrays(self.jd)
+    
+    def _getCoordArrays(self,jds):
         from .coordsys import RectangularICRSCoordinates
         from ..obstools import jd_to_epoch
         
-        x,y,z = earth_pos_vel(self.jd,True)[0]
-        return RectangularICRSCoordinates(x=x,y=y,z=z,epoch=jd_to_epoch(self.jd))
+        x,y,z = earth_pos_vel(jds,True)[0]
+        if not x.shape:
+            x,y,z = float(x),float(y),float(z)
+        return RectangularICRSCoordinates(x=x,y=y,z=z,epoch=jd_to_epoch(jds))
     
     def getVelocity(self,jd=None,kms=True):
         """
@@ -1086,7 +1482,8 @@ def earth_pos_vel(jd,barycentric=False,kms=True):
     Adapted from SOFA function epv00.c from fits to DE405, valid from ~
     1900-2100. 
     
-    :param jd: The julian date for the positions and velocities.
+    :param jd: The julian date(s) for the positions and velocities.
+    :type jd: scalar or array
     :param bool barycentric: 
         If True, the output positions and velocities are relative to the solar
         system barycenter. Otherwise, positions and velocities are heliocentric.
@@ -1095,7 +1492,8 @@ def earth_pos_vel(jd,barycentric=False,kms=True):
     :returns: 
         2 3-tuples (x,y,z),(vx,vy,vz) where x,y, and z are GCRS-aligned
         positions in AU, and vx,vy, and vz are velocities in km/s if `kms` is
-        True, or AU/yr.
+        True, or AU/yr. These are arrays of shape (3,) for a scalar `jd`, or
+        (3,)+jd.shape if `jd` is an array.
         
     
     """
@@ -1103,12 +1501,15 @@ def earth_pos_vel(jd,barycentric=False,kms=True):
     from ..constants import aupercm,secperyr
     from warnings import warn
     
-    coeffsd = _earth_series_coeffs
+    coeffsd = _get_earth_series_coeffs()
     
+    jd = np.array(jd,copy=False,dtype=float)
     t = (jd-jd2000)/365.25 #Julian years since 2000.0 reference
     
-    if t > 100 or t < -100:
-        warn('JD {0} is not in range 1900-2100 CE for Earth position'.format(jd),EphemerisAccuracyWarning)
+    outofrange = np.abs(t) > 100
+    if np.any(outofrange):
+        badjd = jd[outofrange].flat[0] if jd.shape else float(jd)
+        warn('JD {0} is not in range 1900-2100 CE for Earth position'.format(badjd),EphemerisAccuracyWarning)
         
     pos,vel = _compute_earth_series(t,coeffsd['h0coeffs'],coeffsd['h1coeffs'],coeffsd['h2coeffs'])
     
@@ -1119,8 +1520,9 @@ def earth_pos_vel(jd,barycentric=False,kms=True):
     
     #this rotates the analytic model from the series to DE405/BCRS
     #same as rotating by -23d26'21.4091" about x then 0.0475" about z        
-    pos = (coeffsd['ec2bcrsmat']*pos.reshape(3,1)).A.ravel()
-    vel = (coeffsd['ec2bcrsmat']*vel.reshape(3,1)).A.ravel()
+    ec2bcrs = np.asarray(coeffsd['ec2bcrsmat'])
+    pos = np.einsum('ij,j...->i...',ec2bcrs,pos)
+    vel = np.einsum('ij,j...->i...',ec2bcrs,vel)
     
     if kms:
         #AU/yr*(   km/AU  *  yr/sec ) = km/sec
@@ -1129,10 +1531,20 @@ def earth_pos_vel(jd,barycentric=False,kms=True):
     return pos,vel
     
 #<---------------Approximate Keplerian major planet ephemerides---------------->
+_jpl_orb_elems = {}
 def _load_jpl_orb_elems(datafn):
-    from ..utils.io import get_package_data
+    """
+    Loads the JPL approximate orbital elements from `datafn` as a dictionary
+    mapping object names to element arrays, caching the result.
+    """
+    from ..utils.io import get_package_data_arrays
     
-    s = get_package_data(datafn)
+    if datafn not in _jpl_orb_elems:
+        arrs = get_package_data_arrays(datafn,_parse_jpl_orb_elems)
+        _jpl_orb_elems[datafn] = dict(zip(arrs['names'],arrs['elems']))
+    return _jpl_orb_elems[datafn]
+    
+def _parse_jpl_orb_elems(s):
     data = []
     names = []
         
@@ -1153,18 +1565,9 @@ def _load_jpl_orb_elems(datafn):
             else:
                 data.append(lss[-6:])
     arrs = np.split(np.array(data,dtype=float),len(names))
-    return dict(zip(names,arrs))
-    
-            
-    return namearrs
-            
-_shortelems = _load_jpl_orb_elems('ss_elems_1.dat') #array elements are 2 x 6
-_longelems  = _load_jpl_orb_elems('ss_elems_2.dat') #array elements are 2 x 6
-_longelemsb = _load_jpl_orb_elems('ss_elems_2b.dat') #array elements are 1 x 4
+    return {'names':np.array(names),'elems':np.array(arrs)}
 
 def _ecl_to_gcrs(x,y,z,jd):
-    from math import sin,cos,radians
-    
     #tilt to ICRS orientation
     #sine = sin(radians(23.43928))
     sine = 0.39777697800876388
@@ -1197,7 +1600,11 @@ def _keplerian_ephems():
     jd3000ce = calendar_to_jd((3000,1,1))
     jd3000bce = calendar_to_jd((-2999,1,1))
     
-    for n,oes in _shortelems.iteritems():
+    shortelems = _load_jpl_orb_elems('ss_elems_1.dat') #array elements are 2 x 6
+    longelems  = _load_jpl_orb_elems('ss_elems_2.dat') #array elements are 2 x 6
+    longelemsb = _load_jpl_orb_elems('ss_elems_2b.dat') #array elements are 1 x 4
+    
+    for n,oes in shortelems.iteritems():
         kw = {'name':n,'validjdrange':(jd1800,jd2050),
               'outcoords':RectangularGCRSCoordinates,
               'outtransfunc':_ecl_to_gcrs}
@@ -1205,7 +1612,7 @@ def _keplerian_ephems():
             kw[oen] = oe
         d[n] = KeplerianObject(**kw)
         
-    for n,oes in _longelems.iteritems():
+    for n,oes in longelems.iteritems():
         n = n+'-long'
         kw = {'name':n,'validjdrange':(jd3000bce,jd3000ce),
               'outcoords':RectangularGCRSCoordinates,
@@ -1213,13 +1620,311 @@ def _keplerian_ephems():
         for oen,oe in zip(('a','e','i','L','Lp','Lan'),oes.T):
             kw[oen] = oe
         d[n] = obj = KeplerianObject(**kw)
-        if n in _longelemsb:
-            obj._bcsf = _longelemsb[n][0]
+        if n in longelemsb:
+            obj._bcsf = longelemsb[n][0]
     
     return d
 
     
     
+#<-----------------Chebyshev-compressed solar system ephemerides--------------->
+class ChebyshevEphemeris(EphemerisObject):
+    """
+    Ephemerides stored as piecewise Chebyshev polynomial fits to another
+    ephemeris model. The time range is split into segments of equal length
+    (:attr:`span` days), and the x, y, and z coordinates in each segment are
+    represented by Chebyshev series. Positions and velocities are evaluated
+    for any number of times at once.
+    
+    Use :meth:`fromEphemeris` to generate the fits for an
+    :class:`EphemerisObject`, or :func:`build_solar_system_ephem_cache` to
+    generate (and save) them for all of the solar system objects.
+    """
+    def __init__(self,name,jd0,span,coeffs,outcoords,unit='au',maxerr=None):
+        """
+        :param str name: The name of the object.
+        :param float jd0: The julian date at the start of the first segment.
+        :param float span: The length of each segment in days.
+        :param coeffs: 
+            The Chebyshev coefficients as an array of shape (nsegments,3,ncoeffs)
+            for the x, y, and z coordinates.
+        :param outcoords: 
+            The :class:`astropysics.coords.coordsys.RectangularCoordinates`
+            subclass for the output coordinates.
+        :param unit: The unit for `outcoords` (if it has units), or None.
+        :param maxerr: 
+            The maximum deviation of the fits from the underlying model (in the
+            units of the coordinates), or None if unknown.
+        """
+        self.jd0 = float(jd0)
+        self.span = float(span)
+        self.coeffs = np.array(coeffs,copy=False,dtype=float)
+        self.outcoords = outcoords
+        self.unit = unit
+        self.maxerr = maxerr
+        
+        if len(self.coeffs.shape)!=3 or self.coeffs.shape[1]!=3:
+            raise ValueError('coeffs must have shape (nsegments,3,ncoeffs)')
+        
+        jdrange = (self.jd0,self.jd0+self.span*self.coeffs.shape[0])
+        EphemerisObject.__init__(self,name,jdrange)
+        
+    @classmethod
+    def fromEphemeris(cls,eobj,jdrange,span,degree=13,tol=None,maxsegments=2**20):
+        """
+        Generates the Chebyshev fits for an :class:`EphemerisObject`.
+        
+        The model is evaluated at the Chebyshev nodes of each segment, and the
+        deviation of the fit is measured at points in between the nodes and
+        at the segment boundaries.
+        
+        :param eobj: 
+            The :class:`EphemerisObject` to fit. It must output
+            :class:`astropysics.coords.coordsys.RectangularCoordinates`.
+        :param jdrange: The range of julian dates to fit as (minjd,maxjd).
+        :param float span: The length of the segments in days.
+        :param int degree: The degree of the Chebyshev series in each segment.
+        :param tol: 
+            The maximum allowed deviation from the model. If the fits are worse
+            than this, `span` is halved until they are within `tol`. If None,
+            the fits are not checked.
+        :param int maxsegments: The maximum number of segments.
+        
+        :returns: A :class:`ChebyshevEphemeris` object.
+        
+        :except ValueError: 
+            If `tol` is not reached with fewer than `maxsegments` segments.
+        """
+        from math import ceil
+        
+        jd1,jd2 = jdrange
+        n = degree + 1
+        c0 = eobj(jd1)
+        
+        #nodes in [-1,1] and the transform from values at the nodes to coeffs
+        k = np.arange(n)
+        theta = pi*(k+0.5)/n
+        xnodes = np.cos(theta)
+        nodes2coeffs = 2*np.cos(np.outer(theta,k))/n
+        nodes2coeffs[:,0] /= 2
+        #test points are the extrema of the first omitted term
+        xtest = np.cos(pi*np.arange(n+1)/n)
+        
+        while True:
+            nseg = int(ceil((jd2-jd1)/span))
+            if nseg > maxsegments:
+                raise ValueError('Chebyshev fit for %s did not reach tolerance %g'%(eobj.name,tol))
+            segjd0 = jd1 + span*np.arange(nseg)
+            jds = segjd0[:,np.newaxis] + span*(xnodes+1)/2
+            xyz = _ephem_xyz(eobj,jds) #3 x nseg x n
+            coeffs = np.dot(xyz,nodes2coeffs).transpose(1,0,2)
+            
+            res = cls(eobj.name,jd1,span,coeffs,c0.__class__,
+                      getattr(c0,'unit',None))
+            
+            jdtests = segjd0[:,np.newaxis] + span*(xtest+1)/2
+            jdtests = np.clip(jdtests,jd1,res.jd0+res.span*nseg)
+            xyzfit = res._evalSeries(jdtests.ravel(),res.coeffs)
+            xyztest = _ephem_xyz(eobj,jdtests.ravel())
+            res.maxerr = float(np.max(np.sum((xyzfit-xyztest)**2,axis=0)**0.5))
+            
+            if tol is None or res.maxerr <= tol:
+                return res
+            span /= 2
+        
+    def _evalSeries(self,jds,coeffs):
+        """
+        Evaluates the series with the given coefficients (of shape
+        (nsegments,3,ncoeffs)) at the julian dates `jds`.
+        """
+        jds = np.array(jds,copy=False,dtype=float)
+        
+        u = ((jds - self.jd0)/self.span).ravel()
+        if np.any((u<0)|(u>coeffs.shape[0])):
+            raise ValueError('julian dates outside the range %f-%f of the Chebyshev ephemeris for %s'%(self.validjdrange+(self.name,)))
+        iseg = np.minimum(np.floor(u).astype(int),coeffs.shape[0]-1)
+        x = 2*(u-iseg)-1
+        
+        #Chebyshev polynomials T_k(x) from the recurrence relation
+        T = np.empty((coeffs.shape[2],x.size))
+        T[0] = 1
+        if coeffs.shape[2] > 1:
+            T[1] = x
+        for k in range(2,coeffs.shape[2]):
+            T[k] = 2*x*T[k-1] - T[k-2]
+        
+        res = np.einsum('kn,nik->in',T,coeffs[iseg])
+        return res.reshape((3,)+jds.shape)
+    
+    def _getCoordObj(self):
+        return self._getCoordArrays(self.jd)
+        
+    def _getCoordArrays(self,jds):
+        from ..obstools import jd_to_epoch
+        
+        x,y,z = self._evalSeries(jds,self.coeffs)
+        if not x.shape:
+            x,y,z = float(x),float(y),float(z)
+        res = self.outcoords(x,y,z)
+        
+        if hasattr(res,'unit'):
+            res.unit = None #convention is that None implies not to do conversions
+            res.unit = self.unit
+        if hasattr(res,'epoch'):
+            res.epoch = jd_to_epoch(jds)
+            
+        return res
+        
+    def getVelocity(self,jds=None):
+        """
+        Computes the velocity of this object from the derivative of the
+        Chebyshev series.
+        
+        :param jds: 
+            The julian date(s) at which to compute the velocity, or None to use
+            the :attr:`jd` attribute.
+        :type jds: scalar, array, or None
+        
+        :returns: 
+            An array of shape (3,) or (3,)+jds.shape with the x,y, and z
+            velocities in units of the coordinates per day.
+        """
+        from numpy.polynomial.chebyshev import chebder
+        
+        if jds is None:
+            jds = self.jd
+        dcoeffs = chebder(self.coeffs,axis=2)*(2/self.span)
+        return self._evalSeries(jds,dcoeffs)
+    
+def _ephem_xyz(eobj,jds):
+    """
+    Computes the x,y,z coordinates of an :class:`EphemerisObject` as an array of
+    shape (3,)+jds.shape
+    """
+    res = eobj(jds.ravel())
+    if isinstance(res,list):
+        xyz = np.array([(c.x,c.y,c.z) for c in res]).T
+    else:
+        xyz = np.array((res.x,res.y,res.z))
+    return xyz.reshape((3,)+jds.shape)
+    
+def build_solar_system_ephem_cache(jdrange=None,fn=None,objnames=None,
+                                   tol=1e-9,span=16,spans=None,degree=13):
+    """
+    Computes Chebyshev fits (see :class:`ChebyshevEphemeris`) for solar system
+    objects and saves them to a binary file that is used by the 'chebyshev'
+    method of :func:`set_solar_system_ephem_method`.
+    
+    :param jdrange: 
+        The range of julian dates as (minjd,maxjd), or None to use 1990-2050.
+    :param fn: 
+        The file name to save the fits to, or None to use the default file in
+        the astropysics data directory (see
+        :func:`astropysics.config.get_data_dir`).
+    :param objnames: 
+        A sequence of the names of objects to fit, or None for all of the
+        objects from :func:`list_solar_system_objects` for the 'keplerian'
+        method.
+    :param float tol: 
+        The maximum deviation (in AU) of the fits from the underlying model.
+        The default of 1e-9 AU is far below the accuracy of the models
+        themselves.
+    :param float span: The (initial) segment length in days.
+    :param spans: 
+        A dictionary mapping object names to segment lengths in days for
+        objects that should not use `span`, or None.
+    :param int degree: The degree of the Chebyshev series in each segment.
+    
+    :returns: The file name the fits were saved to.
+    
+    Fitting all of the objects over the default 60 year range takes about a
+    minute, mostly due to evaluating the Earth's position for the geocentric
+    planet coordinates.
+    """
+    import os
+    from ..obstools import calendar_to_jd
+    global _ss_ephems,_ss_ephems_method
+    
+    if jdrange is None:
+        jdrange = (calendar_to_jd((1990,1,1)),calendar_to_jd((2050,1,1)))
+    if fn is None:
+        fn = _default_ss_ephem_cache_fn()
+    if spans is None:
+        spans = {}
+    
+    oldmeth,oldephems = _ss_ephems_method,_ss_ephems
+    set_solar_system_ephem_method('keplerian')
+    try:
+        if objnames is None:
+            objnames = list_solar_system_objects()
+        arrs = {}
+        for n in objnames:
+            eobj = get_solar_system_ephems(n)
+            #make sure the fit range does not trigger valid range warnings
+            eobj._setValidjdrange(None)
+            cheb = ChebyshevEphemeris.fromEphemeris(eobj,jdrange,
+                         spans.get(n,span),degree,tol)
+            arrs[n+'/coeffs'] = cheb.coeffs
+            arrs[n+'/info'] = np.array((cheb.jd0,cheb.span,cheb.maxerr))
+            arrs[n+'/coords'] = np.array((cheb.outcoords.__name__,
+                                          str(cheb.unit)))
+    finally:
+        _ss_ephems_method,_ss_ephems = oldmeth,oldephems
+        
+    tmpfn = '%s.%i.tmp'%(fn,os.getpid())
+    try:
+        with open(tmpfn,'wb') as f:
+            np.savez(f,**arrs)
+        os.rename(tmpfn,fn)
+    finally:
+        if os.path.exists(tmpfn):
+            os.remove(tmpfn)
+    return fn
+    
+def load_solar_system_ephem_cache(fn=None):
+    """
+    Loads the Chebyshev fits saved by :func:`build_solar_system_ephem_cache`.
+    
+    :param fn: 
+        The file name to load, or None for the default file in the astropysics
+        data directory.
+    
+    :returns: A dictionary mapping object names to :class:`ChebyshevEphemeris`
+        objects.
+        
+    :except IOError: If the file does not exist.
+    """
+    import os
+    from . import coordsys
+    
+    if fn is None:
+        fn = _default_ss_ephem_cache_fn()
+    if not os.path.exists(fn):
+        raise IOError('Solar system ephemeris cache %s does not exist - generate it with build_solar_system_ephem_cache'%fn)
+    
+    res = {}
+    npz = np.load(fn)
+    try:
+        for k in npz.files:
+            if k.endswith('/coeffs'):
+                n = k[:-7]
+                jd0,span,maxerr = npz[n+'/info']
+                coordsnm,unit = npz[n+'/coords']
+                res[n] = ChebyshevEphemeris(n,jd0,span,npz[k],
+                                            getattr(coordsys,str(coordsnm)),
+                                            None if unit=='None' else str(unit),
+                                            maxerr)
+    finally:
+        npz.close()
+    return res
+    
+def _default_ss_ephem_cache_fn():
+    import os
+    from ..config import get_data_dir
+    
+    return os.path.join(get_data_dir(),'ss_ephem_cache.npz')
+    
+    
 #<----Lunisolar/Solar system fundamental arguments, mostly used in coordsys---->
 #from 2003 IERS Conventions via adaptations of SOFA 
 
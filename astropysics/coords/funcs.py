@@ -74,8 +74,10 @@ def earth_rotation_angle(jd,degrees=True):
     """
     Earth Rotation Angle (ERA) for a given Julian Date.
     
-    :param jd: The Julian Date or a sequence of JDs
-    :type jd: scalar or array-like
+    :param jd: 
+        The Julian Date or a sequence of JDs (UT1), or a
+        :class:`astropysics.obstools.JulianDateArray` (converted to UT1).
+    :type jd: scalar, array-like, or :class:`~astropysics.obstools.JulianDateArray`
     :param degrees: 
         If True, the ERA is returned in degrees, if None, 1=full rotation.  
         Otherwise, radians.
@@ -84,9 +86,15 @@ def earth_rotation_angle(jd,degrees=True):
     :returns: ERA or an array of angles (if `jd` is an array) 
     
     """
-    from ..obstools import jd2000
+    from ..obstools import jd2000,JulianDateArray
     
-    d = jd - jd2000 #days since 2000
+    if isinstance(jd,JulianDateArray):
+        ut1 = jd.ut1
+        d = (ut1.jd1 - jd2000) + ut1.jd2
+        if not d.shape:
+            d = float(d)
+    else:
+        d = jd - jd2000 #days since 2000
     res = (0.7790572732640 + 0.00273781191135448*d + (d%1.0))%1.0
     
     if degrees is None:
@@ -115,12 +123,15 @@ def greenwich_sidereal_time(jd,apparent=True):
     """
     Computes the Greenwich Sidereal Time for a given Julian Date.
     
-    :param jd: The Julian Date or a sequence of JDs, UT1
-    :type jd: scalar or array-like
+    :param jd: 
+        The Julian Date or a sequence of JDs, UT1, or a
+        :class:`astropysics.obstools.JulianDateArray` (converted to UT1).
+    :type jd: scalar, array-like, or :class:`~astropysics.obstools.JulianDateArray`
     :param apparent: 
         If True, the Greenwich Apparent Sidereal Time (GAST) is returned,
         using the method in the SOFA function iauGst00b, which
-        computes nutation from the IAU 2000B nutation model, leaves out
+        computes nutation from the IAU 2000B nutation model (or the model set
+        by :func:`astropysics.coords.coordsys.set_nutation_model`), leaves out
         complementary terms in the equation of the equinox and uses
         UT1 instead of TT in the expression for GMST. In the special case that
         'simple' is given, a faster (but much lower precision) nutation model
@@ -137,8 +148,11 @@ def greenwich_sidereal_time(jd,apparent=True):
     
     """
     from ..constants import asecperrad
+    from ..obstools import JulianDateArray
     
     era = earth_rotation_angle(jd,False) #in radians
+    if isinstance(jd,JulianDateArray):
+        jd = jd.ut1.jd
     
     t = (jd - 2451545.0)/36525
     #Why is Circular 179 different from SOFA? Using the SOFA value
@@ -155,8 +169,8 @@ def greenwich_sidereal_time(jd,apparent=True):
             dpsi = -0.000319*np.sin(omega) - 0.000024*np.sin(2*L) #nutation longitude
             coor = 0
         else:
-            from .coordsys import _nutation_components2000B
-            eps,dpsi,deps = _nutation_components2000B(jd,False)
+            from .coordsys import _nutation_components
+            eps,dpsi,deps = _nutation_components(jd,False)
             dpsi = dpsi
             coor = 0
         return ((gmst + dpsi*np.cos(eps))*12/pi + coor)%24
@@ -498,6 +512,10 @@ def match_coords(a1,b1,a2,b2,eps=1,mode='mask'):
     spherical. Units are arbitrary, but should match between all coordinates
     (and `eps` should be in the same units)
     
+    Matches are found with a kd-tree radius query (see
+    :func:`match_coords_pairs`), so memory use scales with the number of
+    matched pairs rather than the product of the sizes of the two sets.
+    
     :param a1: the first coordinate for the first set of coordinates
     :type a1: array-like
     :param b1: the second coordinate for the first set of coordinates
@@ -535,9 +553,11 @@ def match_coords(a1,b1,a2,b2,eps=1,mode='mask'):
             a2[ind2[i]] will give the "a" coordinate for a matched pair
             of coordinates.
         * 'match2D'
-            Returns a 2-dimensional bool array. The array element M[i,j] is True
-            if the ith coordinate of the first coordinate set
-            matches the jth coordinate of the second set.
+            Returns a 2-dimensional boolean :mod:`scipy.sparse` matrix (in CSR
+            format) of shape (N2,N1). The matrix element M[j,i] is True if the
+            ith coordinate of the first coordinate set matches the jth
+            coordinate of the second set. Use the ``toarray()`` method to get
+            a dense array.
         * 'nearest'
             Returns (nearestind,distance,match). `nearestind` is an int array
             such that nearestind holds indecies into the *second* set of
@@ -581,26 +601,21 @@ def match_coords(a1,b1,a2,b2,eps=1,mode='mask'):
             seps,i2 = match_nearest_coords((a1,b1),(a2,b2))
         return i2,seps,(seps<=eps)
         
-    def find_sep(A,B):
-        At = np.tile(A,(len(B),1))
-        Bt = np.tile(B,(len(A),1))
-        return At.T-Bt
-    sep1 = find_sep(a1,a2)
-    sep2 = find_sep(b1,b2)
-    sep = np.hypot(sep1,sep2)
-    
-    matches =  sep <= eps
+    i1,i2 = match_coords_pairs(a1,b1,a2,b2,eps)
     
     if mode == 'mask':
-        return np.any(matches,axis=1),np.any(matches,axis=0)
+        return np.bincount(i1,minlength=a1.size)>0,\
+               np.bincount(i2,minlength=a2.size)>0
     elif mode == 'maskexcept':
-        s1,s2 = np.sum(matches,axis=1),np.sum(matches,axis=0) 
+        s1,s2 = np.bincount(i1,minlength=a1.size),\
+                np.bincount(i2,minlength=a2.size)
         if np.all(s1<2) and np.all(s2<2):
             return s1>0,s2>0
         else:
             raise ValueError('match_coords found multiple matches')
     elif mode == 'maskwarn':
-        s1,s2 = np.sum(matches,axis=1),np.sum(matches,axis=0) 
+        s1,s2 = np.bincount(i1,minlength=a1.size),\
+                np.bincount(i2,minlength=a2.size)
         from warnings import warn
         
         for i in np.where(s1>1)[0]:
@@ -609,16 +624,161 @@ def match_coords(a1,b1,a2,b2,eps=1,mode='mask'):
             warn('2nd index %i has %i matches!'%(j,s2[j]))
         return s1>0,s2>0
     elif mode == 'count':
-        return np.sum(np.any(matches,axis=1)),np.sum(np.any(matches,axis=0)) 
+        return np.unique(i1).size,np.unique(i2).size
     elif mode == 'index':
-        return np.where(matches)
+        return i1,i2
     elif mode == 'match2D':
-        return matches.T
+        from scipy.sparse import coo_matrix
+        
+        vals = np.ones(i1.size,dtype=bool)
+        return coo_matrix((vals,(i2,i1)),shape=(a2.size,a1.size)).tocsr()
     elif mode == 'nearest':
         assert False,"'nearest' should always return above this - code should be unreachable!"
     else:
         raise ValueError('unrecognized mode')
+        
+def match_coords_pairs(a1,b1,a2,b2,eps=1):
+    """
+    Finds all pairs of coordinates from two sets that are within a distance
+    `eps` of each other, using a kd-tree built on the second set. This is the
+    search used by :func:`match_coords` - the inputs are the same as in that
+    function.
+    
+    :param a1: the first coordinate for the first set of coordinates
+    :type a1: array-like
+    :param b1: the second coordinate for the first set of coordinates
+    :type b1: array-like
+    :param a2: the first coordinate for the second set of coordinates
+    :type a2: array-like
+    :param b2: the second coordinate for the second set of coordinates
+    :type b2: array-like
+    :param eps: 
+        The maximum separation allowed for coordinate pairs to be considered
+        matched.
+    :type eps: float
+    
+    :returns: 
+        (ind1,ind2) integer arrays of indecies into the (flattened) first and
+        second coordinate sets for each matched pair, sorted on `ind1` and then
+        `ind2`.
+    """
+    from scipy.spatial import cKDTree
+    
+    c1 = np.array((np.ravel(a1),np.ravel(b1)),dtype=float).T
+    c2 = np.array((np.ravel(a2),np.ravel(b2)),dtype=float).T
+    
+    if c1.size == 0 or c2.size == 0:
+        return np.array([],dtype=int),np.array([],dtype=int)
     
+    kdt1 = cKDTree(c1)
+    kdt2 = cKDTree(c2)
+    try:
+        pairs = kdt1.sparse_distance_matrix(kdt2,eps,output_type='ndarray')
+        i1,i2 = pairs['i'],pairs['j']
+    except TypeError: 
+        #older scipy without output_type - use lists of neighbors instead
+        nbrs = kdt1.query_ball_tree(kdt2,eps)
+        i1 = np.repeat(np.arange(len(nbrs)),[len(n) for n in nbrs])
+        i2 = np.array([j for n in nbrs for j in n],dtype=int)
+    
+    sorti = np.lexsort((i2,i1))
+    return i1[sorti].astype(int),i2[sorti].astype(int)
+    
+def _nearest_coords_array(c):
+    """
+    Converts the coordinate inputs of :func:`match_nearest_coords` to a D x N
+    array, extracting long/lat in degrees from coordinate objects in bulk.
+    """
+    from .coordsys import LatLongCoordinates,_latlong_objects_to_arrays
+    
+    if isinstance(c,LatLongCoordinates):
+        c = [c]
+    c = np.array(c,ndmin=1,copy=False)
+    
+    if len(c.shape)==1:
+        lat,long = _latlong_objects_to_arrays(c)
+        return np.degrees(np.array((long,lat)))
+    elif len(c.shape)!=2:
+        raise ValueError('match_nearest_coords inputs have incorrect number of dimensions')
+    return c
+
+class CoordinateMatchTree(object):
+    """
+    A kd-tree built on a fixed set of reference coordinates that can be
+    reused for many nearest-neighbor or radius queries with
+    :func:`match_nearest_coords` (pass this object as `c2`), without rebuilding
+    the tree for each query.
+    
+    Distances are cartesian in the coordinate values (e.g. flat in long/lat
+    degrees for coordinate objects) - see :func:`match_sky_coords` for
+    great-circle matching.
+    """
+    def __init__(self,coords):
+        """
+        :param coords: 
+            The reference coordinates as a D x N array or a sequence of 
+            :class:`LatLongCoordinates` objects (or an array-valued
+            :class:`LatLongCoordinates`).
+        """
+        try:
+            from scipy.spatial import cKDTree as KDTree
+        except ImportError:
+            from warnings import warn
+            warn('C-based scipy kd-tree not available - CoordinateMatchTree will be much slower!')
+            from scipy.spatial import KDTree
+        
+        self.coords = _nearest_coords_array(coords)
+        self.kdtree = KDTree(self.coords.T)
+        
+    def __len__(self):
+        return self.coords.shape[1]
+        
+    def _checkInput(self,coords):
+        coords = _nearest_coords_array(coords)
+        if coords.shape[0] != self.coords.shape[0]:
+            raise ValueError("query coordinates don't match the tree in first dimension")
+        return coords
+        
+    def queryNearest(self,coords,n=1):
+        """
+        Finds the nth nearest reference coordinate for each of the input
+        coordinates.
+        
+        :param coords: 
+            The query coordinates in the same form as for the reference
+            coordinates.
+        :param int n: The nearest neighbor to return (1 is the closest).
+        
+        :returns: 
+            (seps,inds) arrays with the distance and the index into the 
+            reference coordinates of the nth nearest neighbor.
+        """
+        coords = self._checkInput(coords)
+        if n==1:
+            return self.kdtree.query(coords.T)
+        else:
+            dist,inds = self.kdtree.query(coords.T,n)
+            return dist[:,n-1],inds[:,n-1]
+        
+    def queryRadius(self,coords,eps):
+        """
+        Finds all reference coordinates within `eps` of the input coordinates.
+        
+        :param coords: 
+            The query coordinates in the same form as for the reference
+            coordinates.
+        :param float eps: The maximum distance for a match.
+        
+        :returns: 
+            (ind1,ind2) integer arrays with indecies into the query and 
+            reference coordinates, respectively, for each matched pair.
+        """
+        coords = self._checkInput(coords)
+        nbrs = self.kdtree.query_ball_point(coords.T,eps)
+        ind1 = np.repeat(np.arange(len(nbrs)),[len(nb) for nb in nbrs])
+        ind2 = np.array([j for nb in nbrs for j in sorted(nb)],dtype=int)
+        return ind1,ind2
+
 def match_nearest_coords(c1,c2=None,n=None):
     """
     Match a set of coordinates to their nearest neighbor(s) in another set of
@@ -633,7 +793,9 @@ def match_nearest_coords(c1,c2=None,n=None):
         :class:`AngularPosition` objects) or a sequence of
         :class:`LatLongCoordinates` objects for the second set of coordinates.
         Alternatively, if this is None, `c2` will be set to `c1`, finding the 
-        nearest neighbor of a point in `c1` to another point in `c1`.
+        nearest neighbor of a point in `c1` to another point in `c1`. This may
+        also be a :class:`CoordinateMatchTree` to re-use an existing tree for
+        the second set.
     :param int n: 
         Specifies the nth nearest neighbor to be returned (1 means the closest
         match). If None, it will default to 2 if `c1` and `c2` are the same
@@ -647,47 +809,245 @@ def match_nearest_coords(c1,c2=None,n=None):
         indecies into `c2` to find the nearest to the corresponding `c1`
         coordinate, and `seps` are the distances.
     """
-    try:
-        from scipy.spatial import cKDTree as KDTree
-    except ImportError:
-        from warnings import warn
-        warn('C-based scipy kd-tree not available - match_nearest_coords will be much slower!')
-        from scipy.spatial import KDTree
-        
     if c2 is None:
         c2 = c1
     if n is None:    
         n = 2 if c1 is c2 else 1
         
-    c1 = np.array(c1,ndmin=1,copy=False)
-    c2 = np.array(c2,ndmin=1,copy=False)
-    
-    if len(c1.shape)==1:
-        a1 = np.empty(c1.size)
-        b1 = np.empty(c1.size)
-        a2 = np.empty(c1.size)
-        b2 = np.empty(c1.size)
-        for i in range(len(c1)):
-            a1[i] = c1[i].long.d
-            b1[i] = c1[i].lat.d
-            a2[i] = c2[i].long.d
-            b2[i] = c2[i].lat.d
-        c1 = np.array((a1,b1))
-        c2 = np.array((a2,b2))
-    elif len(c1.shape)!=2:
-        raise ValueError('match_nearest_coords inputs have incorrect number of dimensions')
+    if isinstance(c2,CoordinateMatchTree):
+        tree = c2
+    else:
+        tree = CoordinateMatchTree(c2)
     
-    if c1.shape[0] != c2.shape[0]:
+    c1 = _nearest_coords_array(c1)
+    if c1.shape[0] != tree.coords.shape[0]:
         raise ValueError("match_nearest_coords inputs don't match in first dimension")
     
-    kdt = KDTree(c2.T)
-    if n==1:
-        return kdt.query(c1.T)
+    return tree.queryNearest(c1,n)
+        
+def _lonlat_to_unit_vectors(long,lat,degrees=True):
+    """
+    Converts longitude/latitude arrays to an N x 3 array of unit vectors.
+    """
+    long = np.array(long,dtype=float,copy=False).ravel()
+    lat = np.array(lat,dtype=float,copy=False).ravel()
+    if degrees:
+        long = np.radians(long)
+        lat = np.radians(lat)
+    clat = np.cos(lat)
+    return np.array((clat*np.cos(long),clat*np.sin(long),np.sin(lat))).T
+
+def match_sky_coords(long1,lat1,long2,lat2,maxsep,mode='all',n=1,
+                     chunksize=None,degrees=True):
+    """
+    Cross-match two sets of sky coordinates using the true great-circle 
+    separation. Unlike :func:`match_coords`, this is correct near the poles and
+    across the longitude wrap at 0/360. 
+    
+    The positions are converted to unit vectors and matched with a kd-tree on
+    the 3D chord distance, which is then converted to the angular separation.
+    The first set is processed in chunks of `chunksize`, so the memory needed
+    for the matching is proportional to the size of the second set plus the
+    matches in a chunk.
+    
+    :param long1: longitudes (e.g. RA) for the first set of coordinates
+    :type long1: array-like
+    :param lat1: latitudes (e.g. Dec) for the first set of coordinates
+    :type lat1: array-like
+    :param long2: longitudes (e.g. RA) for the second set of coordinates
+    :type long2: array-like
+    :param lat2: latitudes (e.g. Dec) for the second set of coordinates
+    :type lat2: array-like
+    :param maxsep: 
+        The maximum separation for a pair to be matched. If None, there is no
+        maximum (only valid for the 'nearest' mode).
+    :type maxsep: float or None
+    :param mode:
+        The matching mode. Can be:
+        
+        * 'all'
+            All pairs with separation within `maxsep`.
+        * 'nearest'
+            The `n` nearest objects in the second set for each object in the
+            first set (only those within `maxsep` are included).
+        * 'unique'
+            The best unique pairs - each object in either set appears in at most
+            one pair. Pairs are assigned in order of increasing separation, so
+            the result is the same as greedily taking the closest remaining
+            pair. A later chunk can take an object from a pair found in an
+            earlier chunk, so the candidate pairs (but not the coordinates) of
+            all the chunks are kept, and the pairs are generated as a single
+            chunk after all of the first set is processed.
+            
+    :param int n: The number of neighbors to find for the 'nearest' mode.
+    :param chunksize: 
+        The number of objects from the first set to process at a time. If
+        None, all are processed at once.
+    :type chunksize: int or None
+    :param bool degrees: 
+        If True, the inputs, `maxsep` and the output separations are in degrees,
+        otherwise radians.
+    
+    :returns: 
+        (ind1,ind2,sep) where `ind1` and `ind2` are integer arrays of indecies
+        into the (flattened) first and second sets for each matched pair and
+        `sep` is a float array with the separation of each pair. Pairs are
+        sorted by `ind1` and then by separation (except for the 'unique' mode,
+        where they are sorted by separation). If `chunksize` is not None, this
+        instead returns a generator yielding (ind1,ind2,sep) for each chunk -
+        see :func:`match_sky_coords_iter`.
+        
+    :except ValueError: If the mode is invalid.
+    
+    **Examples**
+    
+    >>> ind1,ind2,sep = match_sky_coords([359.9995,10],[0,80],[0.0005,190],[0,80],0.01)
+    >>> ind1,ind2
+    (array([0]), array([0]))
+    >>> round(sep[0]*3600,6)
+    3.6
+    
+    """
+    long1 = np.array(long1,copy=False).ravel()
+    lat1 = np.array(lat1,copy=False).ravel()
+    
+    if chunksize is None:
+        chunks = [(long1,lat1)]
+    else:
+        chunks = ((long1[i:i+chunksize],lat1[i:i+chunksize]) 
+                  for i in range(0,long1.size,chunksize))
+    
+    matchiter = match_sky_coords_iter(chunks,long2,lat2,maxsep,mode,n,degrees)
+    if chunksize is None:
+        res = list(matchiter)
+        if len(res) == 0:
+            return np.array([],dtype=int),np.array([],dtype=int),np.array([])
+        return tuple([np.concatenate(arrs) for arrs in zip(*res)])
+    else:
+        return matchiter
+    
+def match_sky_coords_iter(chunks1,long2,lat2,maxsep,mode='all',n=1,
+                          degrees=True):
+    """
+    Generator for chunked cross-matching of sky coordinates with the true
+    great-circle separation. The first set of coordinates is given as an
+    iterable of chunks, so it never needs to be completely in memory (e.g.
+    reading rows of a large catalog file). See :func:`match_sky_coords` for
+    details of the matching.
+    
+    :param chunks1: 
+        An iterable of (long,lat) array pairs for successive chunks of the first
+        set of coordinates.
+    :param long2: longitudes (e.g. RA) for the second set of coordinates
+    :type long2: array-like
+    :param lat2: latitudes (e.g. Dec) for the second set of coordinates
+    :type lat2: array-like
+    
+    The remaining arguments are the same as for :func:`match_sky_coords`.
+    
+    :returns: 
+        A generator that yields an (ind1,ind2,sep) tuple for each chunk, where
+        `ind1` indexes the full first set (i.e. including the offset of the
+        chunk).
+        
+    :except ValueError: If the mode is invalid.
+    """
+    from scipy.spatial import cKDTree
+    
+    if mode not in ('all','nearest','unique'):
+        raise ValueError('invalid sky matching mode %s'%mode)
+    if maxsep is None and mode != 'nearest':
+        raise ValueError('maxsep must be given for mode %s'%mode)
+    
+    def chord_to_sep(chord):
+        sep = 2*np.arcsin(np.clip(chord/2,0,1))
+        return np.degrees(sep) if degrees else sep
+    
+    if maxsep is None:
+        maxchord = np.inf
     else:
-        dist,inds = kdt.query(c1.T,n)
-        return dist[:,n-1],inds[:,n-1]
+        maxsepr = np.radians(maxsep) if degrees else maxsep
+        maxchord = 2*np.sin(min(maxsepr,np.pi)/2)
+    
+    kdt = cKDTree(_lonlat_to_unit_vectors(long2,lat2,degrees))
+    nobj2 = kdt.n
+    
+    candidates = []
+    offset = 0
+    for long1,lat1 in chunks1:
+        v1 = _lonlat_to_unit_vectors(long1,lat1,degrees)
+        nchunk = len(v1)
+        if nchunk == 0 or nobj2 == 0:
+            i1 = i2 = np.array([],dtype=int)
+            chord = np.array([])
+        elif mode == 'nearest':
+            k = min(n,nobj2)
+            chord,i2 = kdt.query(v1,k,distance_upper_bound=maxchord)
+            chord = chord.reshape((nchunk,k))
+            i2 = i2.reshape((nchunk,k))
+            i1 = np.repeat(np.arange(nchunk),k).reshape((nchunk,k))
+            found = i2 < nobj2 #missing neighbors are given as index n
+            i1,i2,chord = i1[found],i2[found],chord[found]
+        else:
+            kdt1 = cKDTree(v1)
+            try:
+                pairs = kdt1.sparse_distance_matrix(kdt,maxchord,
+                                                    output_type='ndarray')
+                i1,i2,chord = pairs['i'],pairs['j'],pairs['v']
+            except TypeError:
+                #older scipy without output_type
+                nbrs = kdt1.query_ball_tree(kdt,maxchord)
+                i1 = np.repeat(np.arange(len(nbrs)),[len(nb) for nb in nbrs])
+                i2 = np.array([j for nb in nbrs for j in nb],dtype=int)
+                chord = np.sqrt(np.sum((v1[i1]-kdt.data[i2])**2,axis=1))
         
+        i1 = np.asarray(i1,dtype=int) + offset
+        i2 = np.asarray(i2,dtype=int)
+        sep = chord_to_sep(np.asarray(chord,dtype=float))
+        offset += nchunk
         
+        if mode == 'unique':
+            candidates.append((i1,i2,sep))
+        else:
+            sorti = np.lexsort((i2,sep,i1))
+            yield i1[sorti],i2[sorti],sep[sorti]
+            
+    if mode == 'unique':
+        if len(candidates) == 0:
+            return
+        i1,i2,sep = [np.concatenate(arrs) for arrs in zip(*candidates)]
+        yield _greedy_unique_pairs(i1,i2,sep)
+        
+def _greedy_unique_pairs(i1,i2,sep):
+    """
+    Selects the pairs that would be taken by greedily assigning the closest
+    remaining pair until no objects are left, where each object may only
+    appear in one pair.
+    
+    This is done in rounds without looping over the pairs: in each round, the
+    pairs that are the best remaining pair for *both* of their objects must be
+    taken by the greedy assignment, so they are accepted and all other pairs
+    with those objects are removed.
+    
+    :returns: (i1,i2,sep) for the accepted pairs sorted by separation
+    """
+    sorti = np.lexsort((i2,i1,sep))
+    i1,i2,sep = i1[sorti],i2[sorti],sep[sorti]
+    
+    accept = np.zeros(sep.size,dtype=bool)
+    remaining = np.arange(sep.size)
+    while remaining.size > 0:
+        r1,r2 = i1[remaining],i2[remaining]
+        #the first occurence is the best pair because they are sorted
+        best1 = np.unique(r1,return_index=True)[1]
+        best2 = np.unique(r2,return_index=True)[1]
+        acc = remaining[np.intersect1d(best1,best2,assume_unique=True)]
+        accept[acc] = True
+        
+        used = np.in1d(r1,i1[acc]) | np.in1d(r2,i2[acc])
+        remaining = remaining[~used]
+        
+    return i1[accept],i2[accept],sep[accept]
     
 def separation_matrix(v,w=None,tri=False):
     """
@@ -732,6 +1092,155 @@ def separation_matrix(v,w=None,tri=False):
     
 
 #<--------------------Cosmological distances and conversions------------------->
+class CosmologyDistanceTable(object):
+    """
+    A table of the cosmological distance integrals for a set of FRW cosmological
+    parameters, used by :func:`cosmo_z_to_dist` to compute distances for many
+    redshifts at once.
+    
+    The comoving distance and lookback time integrals are computed cumulatively
+    on a grid uniform in the square root of the scale factor (where the
+    integrands are smooth) with Gauss-Legendre quadrature in each interval, and
+    are interpolated with cubic Hermite splines using the exact integrand as the
+    derivative. The grid is refined until the interpolation error at the
+    interval midpoints (where it is largest) is below the requested tolerance.
+    
+    Use :func:`get_cosmology_distance_table` to get the (cached) table for the
+    current cosmology rather than creating these directly.
+    """
+    def __init__(self,H0,omegaR,omegaM,omegaL,zmax=1e4,tol=1e-10,
+                 maxintervals=2**18):
+        """
+        :param float H0: Hubble constant in km/s/Mpc
+        :param float omegaR: Radiation density
+        :param float omegaM: Matter density
+        :param float omegaL: Cosmological constant density
+        :param float zmax: The maximum redshift covered by the table.
+        :param float tol: 
+            The maximum fractional error of the interpolated integrals.
+        :param int maxintervals: 
+            The maximum number of intervals in the grid.
+            
+        :except ValueError: 
+            If the tolerance is not reached with `maxintervals` intervals.
+        """
+        self.H0 = H0
+        self.omegaR = omegaR
+        self.omegaM = omegaM
+        self.omegaL = omegaL
+        self.omegaK = 1 - omegaM - omegaL - omegaR
+        self.zmax = zmax
+        self.tol = tol
+        
+        umin = (1+zmax)**-0.5
+        nint = 64
+        while True:
+            u = np.linspace(umin,1,nint+1)
+            segc,segl = self._intervalIntegrals(u[:-1],u[1:])
+            #integrals are from u to 1, so sum from the right
+            self.u = u
+            self._intc = np.append(np.cumsum(segc[::-1])[::-1],0)
+            self._intl = np.append(np.cumsum(segl[::-1])[::-1],0)
+            self._dintc,self._dintl = self._integrands(u)
+            
+            #check the interpolation at the midpoints against direct integration
+            um = (u[:-1]+u[1:])/2
+            midc,midl = self._intervalIntegrals(um,u[1:])
+            errc = np.abs(self._interpolate(um,False)/(self._intc[1:]+midc)-1)
+            errl = np.abs(self._interpolate(um,True)/(self._intl[1:]+midl)-1)
+            self.maxerr = max(np.max(errc),np.max(errl))
+            
+            if self.maxerr <= tol:
+                break
+            elif nint >= maxintervals:
+                raise ValueError('could not build cosmological distance table to tolerance %g'%tol)
+            nint *= 2
+            
+    _glx,_glw = np.polynomial.legendre.leggauss(10)
+            
+    def _integrands(self,u):
+        """
+        Integrands of the comoving distance and lookback time integrals with 
+        respect to u = sqrt(a).
+        """
+        a = u*u
+        E2a4 = self.omegaR + self.omegaM*a + self.omegaL*a**4 + self.omegaK*a**2
+        c = 2*u*E2a4**-0.5/self.H0 #1/(a^2 H) da/du
+        return c,a*c
+            
+    def _intervalIntegrals(self,lower,upper):
+        """
+        The comoving and lookback integrals over each of the intervals in u
+        from `lower` to `upper` using Gauss-Legendre quadrature.
+        """
+        h = (upper-lower)/2
+        mid = (upper+lower)/2
+        c,l = self._integrands(mid[:,np.newaxis] + h[:,np.newaxis]*self._glx)
+        return h*np.dot(c,self._glw),h*np.dot(l,self._glw)
+    
+    def _interpolate(self,u,lookback):
+        if lookback:
+            y,dy = self._intl,self._dintl
+        else:
+            y,dy = self._intc,self._dintc
+        i = np.clip(np.searchsorted(self.u,u)-1,0,len(self.u)-2)
+        u0 = self.u[i]
+        h = self.u[i+1]-u0
+        t = (u-u0)/h
+        t2 = t*t
+        t3 = t2*t
+        #the integrals are from u to 1, so the derivatives are -integrand
+        return (2*t3-3*t2+1)*y[i] + (t3-2*t2+t)*h*-dy[i] + \
+               (-2*t3+3*t2)*y[i+1] + (t3-t2)*h*-dy[i+1]
+    
+    def integrals(self,a,lookback=False):
+        """
+        Computes the comoving distance integral :math:`\\int_a^1 da/(a^2 H)` or
+        the lookback time integral :math:`\\int_a^1 da/(a H)` (with H in
+        km/s/Mpc).
+        
+        :param a: The scale factor(s) 
+        :type a: scalar or array-like
+        :param bool lookback: 
+            If True, the lookback time integral is returned, otherwise the 
+            comoving distance integral.
+            
+        :returns: 
+            An array of integrals matching the shape of `a`. Elements outside
+            of the range of the table (z<0 or z>`zmax`) are NaN.
+        """
+        a = np.array(a,dtype=float,copy=False)
+        u = a**0.5
+        inrange = (u >= self.u[0]) & (u <= 1)
+        return np.where(inrange,self._interpolate(u,lookback),np.nan)
+        
+_cosmo_dist_tables = {}
+_cosmo_dist_table_tol = 1e-10
+def get_cosmology_distance_table(tol=_cosmo_dist_table_tol):
+    """
+    Returns the :class:`CosmologyDistanceTable` for the parameters of the
+    current cosmology, building it if necessary. Tables are cached until the
+    cosmology is changed with :func:`astropysics.constants.choose_cosmology` or
+    :func:`astropysics.constants.update_cosmology` .
+    
+    :param float tol: The maximum fractional error of the table.
+    
+    :returns: A :class:`CosmologyDistanceTable` object
+    """
+    from .. import constants
+    
+    key = (constants.H0,constants.omegaR,constants.omegaM,constants.omegaL,tol)
+    if key not in _cosmo_dist_tables:
+        _cosmo_dist_tables[key] = CosmologyDistanceTable(*key[:4],**dict(tol=tol))
+    return _cosmo_dist_tables[key]
+    
+def _clear_cosmo_dist_tables():
+    _cosmo_dist_tables.clear()
+    
+from ..constants import _cosmology_cache_clearers
+_cosmology_cache_clearers.append(_clear_cosmo_dist_tables)
+del _cosmology_cache_clearers
+    
 def cosmo_z_to_dist(z,zerr=None,disttype=0,inttol=1e-6,normed=False,intkwargs={}):
     """
     Calculates the cosmolgical distance to some object given a redshift. Note
@@ -767,6 +1276,15 @@ def cosmo_z_to_dist(z,zerr=None,disttype=0,inttol=1e-6,normed=False,intkwargs={}
     :param intkwargs: keywords for integrals (see :mod:`scipy.integrate`)
     :type intkwargs: a dictionary   
     
+    For flat cosmologies with a cosmological constant and no radiation (e.g.
+    all of the WMAP cosmologies), the integrals are computed from their exact
+    closed forms (see :attr:`astropysics.constants.FRWCosmology.isFlatLCDM`)
+    unless `intkwargs` are given. Otherwise, unless `intkwargs` are given or
+    `inttol` is smaller than 1e-10, the integrals are interpolated from a
+    :class:`CosmologyDistanceTable` for the current cosmology (see
+    :func:`get_cosmology_distance_table`), which is built once and accurate to
+    a fractional error of 1e-10. Redshifts outside the table (z<0 or z>1e4) are
+    integrated directly.
     
     :returns: 
         Distance of type selected by `disttype` in above units or normalized as
@@ -809,6 +1327,7 @@ def cosmo_z_to_dist(z,zerr=None,disttype=0,inttol=1e-6,normed=False,intkwargs={}
     from numpy import array,vectorize,abs,isscalar
     
     from ..constants import H0,omegaM,omegaL,omegaR,c
+    from ..constants import _is_flat_lcdm,_flat_lcdm_integrals
     
     c=c/1e5 #convert to km/s
     if type(disttype) == str:
@@ -859,26 +1378,46 @@ def cosmo_z_to_dist(z,zerr=None,disttype=0,inttol=1e-6,normed=False,intkwargs={}
         def integrand(a,H0,R,M,L,K): #1/(a^2 H)
             return a*(R + M*a + L*a**4 + K*a**2)**-0.5/H0
         
-    if isSequenceType(a0):
-        integratevec = vectorize(lambda x:integrate(integrand,x,1,args=(H0,omegaR,
-                                             omegaM,omegaL,omegaK),**intkwargs))
-        res=integratevec(a0)
-        intres,interr = res[0],res[1]        
-        try:
-            if np.any(interr/intres > inttol):
-                raise Exception('Integral fractional error for one of the integrals is beyond tolerance')
-        except ZeroDivisionError:
-            pass
-        
+    def quadintegrals(a0):
+        if isSequenceType(a0):
+            integratevec = vectorize(lambda x:integrate(integrand,x,1,args=(H0,
+                                     omegaR,omegaM,omegaL,omegaK),**intkwargs))
+            res=integratevec(a0)
+            intres,interr = res[0],res[1]        
+            try:
+                if np.any(interr/intres > inttol):
+                    raise Exception('Integral fractional error for one of the integrals is beyond tolerance')
+            except ZeroDivisionError:
+                pass
+            
+        else:
+            res=integrate(integrand,a0,1,args=(H0,omegaR,omegaM,omegaL,omegaK),**intkwargs)
+            intres,interr=res[0],res[1]
+            
+            try:
+                if interr/intres > inttol:
+                    raise Exception('Integral fractional error is '+str(interr/intres)+', beyond tolerance'+str(inttol))
+            except ZeroDivisionError:
+                pass
+        return intres
+    
+    if not intkwargs and _is_flat_lcdm(omegaR,omegaM,omegaL):
+        intres = _flat_lcdm_integrals(z,H0,omegaM,omegaL,disttype==3)
+        if not intres.shape:
+            intres = float(intres)
+    elif not intkwargs and inttol >= _cosmo_dist_table_tol:
+        table = get_cosmology_distance_table(_cosmo_dist_table_tol)
+        intres = table.integrals(a0,disttype==3)
+        outside = np.isnan(intres)
+        if intres.shape:
+            if np.any(outside):
+                intres[outside] = quadintegrals(a0[outside])
+        elif outside:
+            intres = quadintegrals(a0)
+        else:
+            intres = float(intres)
     else:
-        res=integrate(integrand,a0,1,args=(H0,omegaR,omegaM,omegaL,omegaK),**intkwargs)
-        intres,interr=res[0],res[1]
-        
-        try:
-            if interr/intres > inttol:
-                raise Exception('Integral fractional error is '+str(interr/intres)+', beyond tolerance'+str(inttol))
-        except ZeroDivisionError:
-            pass
+        intres = quadintegrals(a0)
     
     if disttype == 3: #lookback integrand
         d = c*intres*3.26163626e-3
@@ -919,16 +1458,52 @@ def cosmo_z_to_dist(z,zerr=None,disttype=0,inttol=1e-6,normed=False,intkwargs={}
         lower=cosmo_z_to_dist(z-zerr,None,disttype,inttol,intkwargs)
         return nrm*d,nrm*(upper-d),nrm*(d-lower)
     
-def cosmo_dist_to_z(d,derr=None,disttype=0,inttol=1e-6,normed=False,intkwargs={}):
+def cosmo_dist_to_z(d,derr=None,disttype=0,inttol=1e-6,normed=False,
+                    intkwargs={},highz=False):
     """
     Convert a distance to a redshift. See :func:`cosmo_z_to_dist` for meaning of
     parameters. Note that if `d` is None, the maximum distance will be returned.
+    
+    Arrays of distances are inverted together: the distance is tabulated on a
+    redshift grid (using the cached tables described in
+    :func:`cosmo_z_to_dist`), each distance is bracketed by searching the grid,
+    and the brackets are refined with the Illinois (modified regula falsi)
+    method until the redshifts converge to within `inttol`.
+    
+    The angular diameter distance has a maximum (see :func:`cosmo_z_to_dist`
+    with `z` None), so every distance below that maximum corresponds to two
+    redshifts. The lower redshift is returned unless `highz` is True.
+    
+    :param derr: 
+        Symmetric error in distance. If not None, the output is
+        (z,zupper,zlower), with the upper and lower errors in redshift.
+    :type derr: array, scalar, or None
+    :param bool highz: 
+        If True, the solution beyond the maximum of the angular diameter
+        distance is returned. Ignored for other distance types.
+        
+    :returns: 
+        The redshift (or array of redshifts), or (z,zupper,zlower) if `derr` is
+        not None.
+    
+    :except ValueError: If any of the distances is impossible.
     """
-    from scipy.optimize import brenth
-    maxz=10000.0
+    if type(disttype) == str:
+        disttypemap={'comoving':0,'luminosity':1,'angular':2,'lookback':3,'distmod':4}
+        try:
+            disttype=disttypemap[disttype]
+        except KeyError,e:
+            e.message='invalid disttype string'
+            raise
     
     if derr is not None:
-        raise NotImplementedError
+        if d is None:
+            raise ValueError("can't compute errors for the maximum distance")
+        d = np.array(d,dtype=float,copy=False)
+        z = cosmo_dist_to_z(d,None,disttype,inttol,normed,intkwargs,highz)
+        upper = cosmo_dist_to_z(d+derr,None,disttype,inttol,normed,intkwargs,highz)
+        lower = cosmo_dist_to_z(d-derr,None,disttype,inttol,normed,intkwargs,highz)
+        return z,upper-z,z-lower
     
     if d is None:
         if disttype==2:
@@ -941,18 +1516,91 @@ def cosmo_dist_to_z(d,derr=None,disttype=0,inttol=1e-6,normed=False,intkwargs={}
                 res = res[0] #this is the redshift, -res[1] is the distance value
             return res
         else:
-            d = cosmo_z_to_dist(None,None,disttype,inttol,normed,intkwargs)
+            return _cosmo_dist_to_z_root(None,disttype,inttol,normed,intkwargs)
+    
+    d = np.array(d,dtype=float,copy=False)
+    shape = d.shape
+    d = d.ravel()
+    dist = lambda z:cosmo_z_to_dist(z,None,disttype,inttol,normed,intkwargs)
+    
+    #tabulate the distance on a grid - distmod is -inf at z=0 
+    zgrid = np.expm1(np.linspace(0,np.log(1e4),2001))
+    if disttype == 4:
+        zgrid[0] = 1e-10
+    dgrid = dist(zgrid)
+    
+    if disttype == 2:
+        zturn = cosmo_dist_to_z(None,None,2,inttol,normed,intkwargs)
+        dturn = dist(zturn)
+        if np.any(d > dturn):
+            raise ValueError('input distance %g impossible'%float(np.max(d)))
+        iturn = np.searchsorted(zgrid,zturn)
+        if highz:
+            zgrid = np.concatenate(((zturn,),zgrid[iturn:]))[::-1]
+            dgrid = np.concatenate(((dturn,),dgrid[iturn:]))[::-1]
+        else:
+            zgrid = np.concatenate((zgrid[:iturn],(zturn,)))
+            dgrid = np.concatenate((dgrid[:iturn],(dturn,)))
+    
+    #bracket each distance in the grid (now increasing in distance)
+    i = np.searchsorted(dgrid,d)
+    ingrid = (i > 0) & (i < len(dgrid))
+    i = np.clip(i,1,len(dgrid)-1)
+    zl,zh = zgrid[i-1],zgrid[i]
+    fl,fh = dgrid[i-1]-d,dgrid[i]-d
+    
+    #Illinois method for all of the elements at once
+    zn = zh
+    for n in range(100):
+        df = fh-fl
+        df[df==0] = 1 #converged elements
+        znew = zh - fh*(zh-zl)/df
+        converged = np.all(np.abs(znew-zn)[ingrid] < inttol/10)
+        zn = znew
+        if converged:
+            break
+        fn = dist(zn)-d
+        flip = fn*fh < 0
+        zl = np.where(flip,zh,zl)
+        fl = np.where(flip,fh,fl/2)
+        zh,fh = zn,fn
+    
+    z = np.where(ingrid,zn,0)
+    #distances beyond the grid are found individually
+    for j in np.where(~ingrid)[0]:
+        if disttype == 2:
+            #beyond the grid on the high-z branch, or z~0
+            z[j] = _cosmo_dist_to_z_root(d[j],disttype,inttol,normed,intkwargs,
+                                         zturn if highz else 0,
+                                         None if highz else zturn)
+        else:
+            z[j] = _cosmo_dist_to_z_root(d[j],disttype,inttol,normed,intkwargs)
     
-    f=lambda z,dmin:dmin-cosmo_z_to_dist(z,None,disttype,inttol,normed,intkwargs)
-    try:
-        while f(maxz,d) > 0:
-            maxz=maxz**2
-    except OverflowError:
-        raise ValueError('input distance %g impossible'%float(d))
+    return z.reshape(shape) if shape else float(z[0])
+
+def _cosmo_dist_to_z_root(d,disttype,inttol,normed,intkwargs,minz=0,maxz=None):
+    """
+    Root-finding inversion of :func:`cosmo_z_to_dist` for a single distance, 
+    used by :func:`cosmo_dist_to_z` outside of the tabulated range.
+    """
+    from scipy.optimize import brenth
+    
+    if d is None:
+        d = cosmo_z_to_dist(None,None,disttype,inttol,normed,intkwargs)
         
-    zval = brenth(f,0,maxz,(d,),xtol=inttol)
+    f=lambda z,dmin:dmin-cosmo_z_to_dist(z,None,disttype,inttol,normed,intkwargs)
+    
+    if maxz is None:
+        maxz=10000.0
+        try:
+            while f(maxz,d)*f(minz,d) > 0:
+                maxz=maxz**2
+        except OverflowError:
+            raise ValueError('input distance %g impossible'%float(d))
     
-    return zval
+    if f(minz,d)*f(maxz,d) > 0:
+        raise ValueError('input distance %g impossible'%float(d))
+    return brenth(f,minz,maxz,(d,),xtol=inttol)
     
     
 def cosmo_z_to_H(z,zerr=None):
@@ -987,7 +1635,7 @@ def angular_to_physical_size(angsize,zord,usez=False,**kwargs):
     :param angsize: Angular size in arcsecond.
     :type angsize: float or an :class:`AngularSeparation` object
     :param zord: Redshift or distance
-    :type zord: scalar number
+    :type zord: scalar number or array-like
     :param usez:
         If True, the input will be interpreted as a redshift, and kwargs
         will be passed into the distance calculation. The result will be in
@@ -1028,7 +1676,7 @@ def physical_to_angular_size(physize,zord,usez=True,objout=False,**kwargs):
     :param physize: Physical size in pc
     :type physize: float
     :param zord: Redshift or distance
-    :type zord: scalar number
+    :type zord: scalar number or array-like
     :param usez:
         If True, the input will be interpreted as a redshift, and kwargs
         will be passed into the distance calculation. The result will be in
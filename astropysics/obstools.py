@@ -104,6 +104,11 @@ mjdoffset = 2400000.5
 """
 Offset between Julian Date and Modified Julian Date - e.g. mjd = jd - mjdoffset
 """
+unixepochjd = 2440587.5
+"""
+Julian Date of the unix epoch (1970-01-01T00:00:00 UTC), which is also the zero
+point of :class:`numpy.datetime64`
+"""
 
 def jd_to_calendar(jd,rounding=1000000,output='datetime',gregorian=None,mjd=False):
     """
@@ -111,9 +116,9 @@ def jd_to_calendar(jd,rounding=1000000,output='datetime',gregorian=None,mjd=Fals
 
     :param jd:
         The Julian Date at which to compute the calendar date/time, a sequence
-        of JDs, or None for the current date/time at the moment the function is
-        called.
-    :type jd: scalar, array-like, or None
+        of JDs, a :class:`JulianDateArray`, or None for the current date/time at
+        the moment the function is called.
+    :type jd: scalar, array-like, :class:`JulianDateArray`, or None
     :param rounding:
         If non-0, Performs a fix for floating-point errors. It specifies the
         number of milliseconds by which to round the result to the nearest
@@ -134,6 +139,14 @@ def jd_to_calendar(jd,rounding=1000000,output='datetime',gregorian=None,mjd=Fals
             * 'fracarray'
                 An Nx3 array (year,month,day) where day includes the decimal
                 portion.
+            * 'datetime64'
+                A :class:`numpy.ndarray` of :class:`numpy.datetime64` values
+                (with microsecond units) in UTC, computed without creating
+                Python objects for each element. If the input is a scalar, a
+                0-dimensional array will be returned. `rounding` and
+                `gregorian` are ignored - the result is rounded to the
+                nearest microsecond, and :class:`numpy.datetime64` always uses
+                the proleptic Gregorian calendar.
 
     :param gregorian:
         If True, the output will be in the Gregorian calendar. Otherwise, it
@@ -171,6 +184,16 @@ def jd_to_calendar(jd,rounding=1000000,output='datetime',gregorian=None,mjd=Fals
     if jd is None:
         jd = calendar_to_jd(datetime.datetime.now(tz.tzlocal()))
 
+    if output == 'datetime64':
+        #days since the unix epoch, split to keep the precision of the fraction
+        if isinstance(jd,JulianDateArray):
+            d = (jd.jd1 - unixepochjd) + jd.jd2
+        else:
+            d = np.array(jd,dtype=float) - (unixepochjd - mjdoffset if mjd else unixepochjd)
+        days = np.floor(d)
+        usec = np.round((d - days)*86400000000).astype('int64')
+        return (days.astype('int64')*86400000000 + usec).astype('datetime64[us]')
+
     jd = np.array(jd,copy=True,dtype=float)
     scalar = jd.shape == ()
     jd = jd.ravel()
@@ -288,10 +311,15 @@ def calendar_to_jd(caltime,tz=None,gregorian=True,mjd=False):
             * A :class:`datetime.datetime` or :class:`datetime.date` object
             * A sequence of :class:`datetime.datetime` or :class:`datetime.date`
               objects (a sequence will be returned).
+            * A :class:`numpy.datetime64` object or an array of them (an array
+              of the same shape will be returned). These are converted without
+              creating Python objects for each element, and are always in the
+              proleptic Gregorian calendar.
             * None : returns the JD at the moment the function is called.
 
         If the time is unspecified, it is taken to be noon (i.e. Julian Date =
-        Julian Day Number)
+        Julian Day Number). This includes :class:`numpy.datetime64` values with
+        units of days or longer.
 
     :param tz:
         Sets the time zone to assume for the inputs for conversion to UTC. Can
@@ -305,8 +333,9 @@ def calendar_to_jd(caltime,tz=None,gregorian=True,mjd=False):
             * a string
                 Specifies a timezone name (resolved into a timezone using the
                 :func:`dateutil.tz.gettz` function).
-            * a scalar
-                The hour offset of the timezone.
+            * a scalar or array
+                The hour offset of the timezone, or an array of offsets with
+                one for each input time.
             * a :class:`datetime.tzinfo` object,
                 This object will be used for timezone information.
 
@@ -337,12 +366,18 @@ def calendar_to_jd(caltime,tz=None,gregorian=True,mjd=False):
     >>> tz = dateutil.tz.tzoffset('2',3*3600)
     >>> calendar_to_jd((2010,1,1),tz)
     2455197.875
+    >>> calendar_to_jd(np.array(['2000-12-21T03:00','2004-03-05T12:00'],dtype='datetime64'))
+    array([ 2451899.625,  2453070.   ])
 
 
     """
     #Adapted from xidl  jdcnv.pro
     from datetime import datetime,date,tzinfo
 
+    if isinstance(caltime,np.datetime64) or \
+       (isinstance(caltime,np.ndarray) and caltime.dtype.kind == 'M'):
+        return _datetime64_to_jd(caltime,tz,mjd)
+
     if caltime is None:
         from dateutil.tz import tzlocal
         datetimes = [datetime.now(tzlocal())]
@@ -396,25 +431,17 @@ def calendar_to_jd(caltime,tz=None,gregorian=True,mjd=False):
     min = np.array(min,dtype=float,copy=False).ravel()
     sec = np.array(sec,dtype=float,copy=False).ravel()
     msec = np.array(msec,dtype=float,copy=False).ravel()
+    #copies because yr and month are modified in place below
+    yr,month,day,hr,min,sec,msec = [np.array(v) for v in
+                    np.broadcast_arrays(yr,month,day,hr,min,sec,msec)]
 
     #do tz conversion if tz is provided
     if isinstance(tz,basestring) or isinstance(tz,tzinfo):
-        if isinstance(tz,basestring):
-            from dateutil import tz
-            tzi = tz.gettz(tz)
-        else:
-            tzi = tz
-
-        utcoffset = []
-        for t in zip(yr,month,day,hr,min,sec,msec):
-            #microsecond from float component of seconds
-
-            dt = datetime(*[int(ti) for ti in t],**dict(tzinfo=tzi))
-            utcdt = dt.utcoffset()
-            if utcdt is None:
-                utcoffset.append(0)
-            else:
-                utcoffset.append(utcdt.days*24 + (utcdt.seconds + utcdt.microseconds*1e-6)/3600)
+        localmins = (yr-1970).astype('datetime64[Y]').astype('datetime64[M]') +\
+                    (month-1)
+        localmins = localmins.astype('datetime64[m]') + (day-1)*1440 + \
+                    (60*hr + min).astype('int64')
+        utcoffset = _utc_offset_hours_array(tz,localmins)
     else:
         utcoffset = tz
 
@@ -447,7 +474,7 @@ def calendar_to_jd(caltime,tz=None,gregorian=True,mjd=False):
     jdn = (365.25*(yr+4716)).astype(int) + \
           (30.6001*(month + 1)).astype(int) + \
                day + gregoffset - 1524.5
-    res = jdn + hr/24.0 + min/1440.0 + sec/86400.0
+    res = jdn + hr/24.0 + min/1440.0 + (sec + msec*1e-6)/86400.0
 
     if mjd:
         res -= mjdoffset
@@ -461,13 +488,106 @@ def calendar_to_jd(caltime,tz=None,gregorian=True,mjd=False):
         return res
 
 
+def _datetime64_to_jd(dt64,tz=None,mjd=False):
+    """
+    Array implementation of :func:`calendar_to_jd` for :class:`numpy.datetime64`
+    inputs.
+    """
+    from datetime import tzinfo
+
+    dt64 = np.array(dt64,copy=False)
+    usec = dt64.astype('datetime64[us]').astype('int64')
+    if np.datetime_data(dt64.dtype)[0] in ('Y','M','W','D'):
+        usec = usec + 43200000000 #noon for dates, as for datetime.date
+
+    days = usec//86400000000
+    res = (usec - days*86400000000)/86400000000 + days
+    res += unixepochjd - mjdoffset if mjd else unixepochjd
+
+    if tz is not None:
+        if isinstance(tz,basestring) or isinstance(tz,tzinfo):
+            utcoffset = _utc_offset_hours_array(tz,dt64.astype('datetime64[m]'))
+            res -= utcoffset/24.0
+        else:
+            res -= np.array(tz,dtype=float)/24.0
+
+    if res.shape == ():
+        return float(res)
+    return res
+
+def _utc_offset_hours(tz,dts):
+    """
+    Computes the offset from UTC in hours for a sequence of naive
+    :class:`datetime.datetime` objects interpreted in the time zone `tz`
+    (a :class:`datetime.tzinfo` object or a name for :func:`dateutil.tz.gettz`).
+    """
+    if isinstance(tz,basestring):
+        from dateutil.tz import gettz
+        tzi = gettz(tz)
+    else:
+        tzi = tz
+
+    res = []
+    for dt in dts:
+        off = dt.replace(tzinfo=tzi).utcoffset()
+        if off is None:
+            res.append(0)
+        else:
+            res.append(off.days*24 + (off.seconds + off.microseconds*1e-6)/3600)
+    return np.array(res,dtype=float)
+
+def _utc_offset_hours_array(tz,localmins):
+    """
+    Computes the offset from UTC in hours for an array of local times given as
+    :class:`numpy.datetime64` values in minutes, interpreted in the time zone
+    `tz` (as for :func:`_utc_offset_hours`).
+    
+    Offsets only change at the zone's transitions, so they are computed once
+    for the start and end of each distinct hour, and only the (rare) hours
+    containing a transition are computed for each distinct minute.
+    """
+    localmins = np.array(localmins,dtype='datetime64[m]',copy=False)
+    mins = localmins.ravel().astype('int64')
+    
+    hrs = mins//60
+    if hrs.size == 0:
+        return np.zeros(localmins.shape)
+    h0 = hrs.min()
+    nhrs = hrs.max() - h0 + 1
+    if nhrs <= hrs.size:
+        #a lookup table over the span of hours avoids sorting the times
+        present = np.zeros(nhrs,dtype=bool)
+        present[hrs-h0] = True
+        uhrs = np.flatnonzero(present) + h0
+        hinv = (np.cumsum(present)-1)[hrs-h0]
+    else:
+        uhrs,hinv = np.unique(hrs,return_inverse=True)
+    edges,einv = np.unique(np.concatenate((uhrs,uhrs+1)),return_inverse=True)
+    edgeoffs = _utc_offset_hours(tz,edges.astype('datetime64[h]').astype(object))
+    startoffs = edgeoffs[einv[:uhrs.size]]
+    endoffs = edgeoffs[einv[uhrs.size:]]
+    
+    res = startoffs[hinv]
+    
+    #hours with a transition are done minute-by-minute
+    trans = (startoffs != endoffs)[hinv]
+    if np.any(trans):
+        umins,minv = np.unique(mins[trans],return_inverse=True)
+        dts = umins.astype('datetime64[m]').astype(object)
+        res[trans] = _utc_offset_hours(tz,dts)[minv]
+    
+    return res.reshape(localmins.shape)
+
 def jd_to_epoch(jd,julian=True,asstring=False,mjd=False):
     """
     Converts a Julian Date to a Julian or Besselian Epoch expressed in decimal
     years.
 
-    :param jd: Julian Date for computing the epoch, or None for current epoch.
-    :type jd: scalar, array-like, or None
+    :param jd:
+        Julian Date for computing the epoch, or None for current epoch. If a
+        :class:`JulianDateArray`, it is converted to TT and its full precision
+        is used (and `mjd` is ignored).
+    :type jd: scalar, array-like, :class:`JulianDateArray`, or None
     :param bool julian:
         If True, a Julian Epoch will be used (the year is exactly 365.25 days
         long). Otherwise, the epoch will be Besselian (assuming a tropical year
@@ -489,18 +609,25 @@ def jd_to_epoch(jd,julian=True,asstring=False,mjd=False):
     :Reference: http://www.iau-sofa.rl.ac.uk/2003_0429/sofa/epj.html
 
     """
-    if jd is None:
-        jd = calendar_to_jd(None)
+    if isinstance(jd,JulianDateArray):
+        tt = jd.tt
+        if julian:
+            epoch = 2000.0 + ((tt.jd1 - 2451545.0) + tt.jd2)/365.25
+        else:
+            epoch = 1900 + ((tt.jd1 - 2415020.31352) + tt.jd2)/365.242198781
     else:
-        jd = np.array(jd,copy=False)
+        if jd is None:
+            jd = calendar_to_jd(None)
+        else:
+            jd = np.array(jd,copy=False)
 
-    if mjd:
-        jd += mjdoffset
+        if mjd:
+            jd = jd + mjdoffset
 
-    if julian:
-        epoch = 2000.0 + (jd - 2451545.0)/365.25
-    else:
-        epoch = 1900 + (jd - 2415020.31352)/365.242198781
+        if julian:
+            epoch = 2000.0 + (jd - 2451545.0)/365.25
+        else:
+            epoch = 1900 + (jd - 2415020.31352)/365.242198781
 
 
 
@@ -573,56 +700,166 @@ def delta_AT(jdutc,usett=False):
     Computes the difference between International Atomic Time (TAI) and
     UTC, known as delta(AT).
 
-    Note that this is not valid before UTC (Jan 1,1960) beganand it is not
+    Note that this is not valid before UTC (Jan 1,1960) began and it is not
     correct for future dates, as leap seconds are not predictable. Hence,
-    warnings are issued if before UTC or >5 years from the date of the
-    algorithm.
+    warnings are issued if before UTC or after the leap second table expires
+    (see :func:`load_leap_second_table`).
 
-    Implementation adapted from the matching `SOFA <http://www.iausofa.org/>`_
-    algorithm (dat.c).
+    The leap seconds are taken from a file in the data directory if one has
+    been installed (see :func:`load_leap_second_table`), or otherwise from a
+    built-in table. The implementation is adapted from the matching `SOFA
+    <http://www.iausofa.org/>`_ algorithm (dat.c).
 
-    :param utc:
+    :param jdutc:
         UTC time as a Julian Date (use :func:`calendar_to_jd` for calendar form
-        inputs.)
-    :type utc: float
+        inputs.) A :class:`JulianDateArray` is converted to UTC first.
+    :type jdutc: scalar, array-like, or :class:`JulianDateArray`
     :param usett:
-        If True, the return value will be the difference between UTC and
-        Terrestrial Time (TT) instead of TAI (TT - TAI = 32.184 s).
+        If True, the return value will be the difference between Terrestrial
+        Time (TT) and UTC instead of TAI (TT - TAI = 32.184 s).
     :type usett: bool
 
-    :returns: TAI - UTC in seconds as a float (or TT - UTC if `usett` is True)
+    :returns:
+        TAI - UTC in seconds as a float or an array matching `jdutc` (or TT -
+        UTC if `usett` is True)
 
     """
     from warnings import warn
 
+    mjds,delats,driftmjds,driftrates,expirymjd = _get_leap_second_table()
 
-    dt = jd_to_calendar(jdutc)
-
-    #get data from arrays defined below
-    drift = __dat_drift
-    cyear,cmonth,cdelat = __dat_changes
-
-    if dt.year > __dat_valid_year+5:
-        warn('delta(AT) requested for more than 5 years after current leap seconds (%i)'%dt.year)
+    if isinstance(jdutc,JulianDateArray):
+        jdutc = jdutc.utc
+    mjd = np.array(jdutc,dtype=float,copy=False) - mjdoffset
+    i = np.searchsorted(mjds,mjd,side='right') - 1
 
-    m = 12*dt.year + dt.month
-    i = np.sum(__dat_m<m)-1
-    if i < 0:
-        warn('delta(AT) requested before 1960 (%i)'%dt.year)
-        i = 0
-    delat = cdelat[i]
+    if np.any(mjd > expirymjd):
+        warn('delta(AT) requested after the leap second table expires (MJD %i)'%expirymjd)
+    if np.any(i < 0):
+        warn('delta(AT) requested before 1960')
+        i = np.maximum(i,0)
 
-    #if pre leap seconds, account for drift
-    if i < drift.shape[0]:
-        fd = dt.hour/24+dt.minute/24/60+dt.second/24/3.6e3+dt.microsecond/24/3.6e9 #fraction of day
-        delat += (jdutc - mjdoffset + fd - drift[i,0]) * drift[i,1]
+    #pre leap seconds UTC drifts linearly
+    delat = delats[i] + (mjd - driftmjds[i])*driftrates[i]
     if usett:
-        return delat - 32.184
+        delat = delat + 32.184
+
+    if delat.shape == ():
+        return float(delat)
     else:
         return delat
 
+_leap_second_table = None
+def _get_leap_second_table():
+    """
+    Returns the table used by :func:`delta_AT` as a tuple (mjds,delats,
+    driftmjds,driftrates,expirymjd), loading the table from the data directory
+    if present and the built-in table otherwise.
+    """
+    import os
+    from .config import get_data_dir
+
+    global _leap_second_table
+    if _leap_second_table is None:
+        fn = os.path.join(get_data_dir(False),'leap-seconds.list')
+        if os.path.isfile(fn):
+            load_leap_second_table(fn)
+        else:
+            expirymjd = calendar_to_jd((__dat_valid_year+6,1,1,0,0,0),mjd=True)
+            _leap_second_table = _get_builtin_leap_second_table() + (expirymjd,)
+    return _leap_second_table
+
+def _get_builtin_leap_second_table():
+    """
+    Converts the built-in delta(AT) table to (mjds,delats,driftmjds,driftrates)
+    arrays with one entry per change in TAI-UTC.
+    """
+    cyear,cmonth,cdelat = __dat_changes
+    mjds = calendar_to_jd((cyear,cmonth,1,0,0,0),mjd=True)
+    driftmjds = np.zeros_like(cdelat)
+    driftrates = np.zeros_like(cdelat)
+    driftmjds[:len(__dat_drift)],driftrates[:len(__dat_drift)] = __dat_drift.T
+    return mjds,cdelat,driftmjds,driftrates
+
+def load_leap_second_table(fn=None):
+    """
+    Loads a leap second table to be used by :func:`delta_AT` in place of the
+    built-in table. Leap seconds from 1972 on are taken from the file, while
+    the pre-1972 UTC drift terms are always taken from the built-in table.
+
+    :param fn:
+        The file name to load. If None, the file 'leap-seconds.list' in the data
+        directory (see :func:`astropysics.config.get_data_dir`) is used - if
+        this file exists, it is loaded automatically the first time
+        :func:`delta_AT` is called. The file can either be in the format of the
+        "leap-seconds.list" file distributed by NIST/IERS (NTP timestamps in the
+        first column and TAI-UTC in the second), or of the IERS
+        "Leap_Second.dat" file (MJD,day,month,year,TAI-UTC). The expiration date
+        is read from the file if present, or otherwise taken to be 5 years
+        after the last leap second.
+    :type fn: str or None
+
+    :returns:
+        (mjds,delats,expirymjd) where `mjds` are the MJDs (UTC) at which TAI-UTC
+        changes to the values `delats`, and `expirymjd` is the MJD after which
+        the table is out of date.
+
+    :except IOError: If the file could not be read.
+    :except ValueError: If the file contains no leap seconds.
+    """
+    import os,re
+    from datetime import datetime
+    from .config import get_data_dir
+
+    global _leap_second_table
+
+    if fn is None:
+        fn = os.path.join(get_data_dir(False),'leap-seconds.list')
+
+    ntpmjd0 = 15020 #MJD of 1900-01-01, the zero point of NTP timestamps
+    mjds,delats = [],[]
+    expirymjd = None
+    with open(fn) as f:
+        for l in f:
+            if l.startswith('#@'):
+                expirymjd = float(l[2:].split()[0])/86400 + ntpmjd0
+                continue
+            m = re.search(r'File expires on\s+(\d+\s+\w+\s+\d+)',l)
+            if m:
+                exdt = datetime.strptime(m.group(1),'%d %B %Y')
+                expirymjd = calendar_to_jd(exdt,mjd=True)
+                continue
+            ls = l.split('#')[0].split()
+            if len(ls) == 0:
+                continue
+            if float(ls[0]) > 1e6: #NTP timestamps
+                mjds.append(float(ls[0])/86400 + ntpmjd0)
+                delats.append(float(ls[1]))
+            else:
+                mjds.append(float(ls[0]))
+                delats.append(float(ls[4]))
+
+    if len(mjds) == 0:
+        raise ValueError('no leap seconds found in file '+fn)
+    mjds = np.array(mjds)
+    delats = np.array(delats)
+    if expirymjd is None:
+        expirymjd = mjds[-1] + 5*365.25
+
+    #keep the built-in table entries before the start of the file
+    bmjds,bdelats,bdriftmjds,bdriftrates = _get_builtin_leap_second_table()
+    pre = bmjds < mjds[0]
+    z = np.zeros_like(mjds)
+    _leap_second_table = (np.concatenate((bmjds[pre],mjds)),
+                          np.concatenate((bdelats[pre],delats)),
+                          np.concatenate((bdriftmjds[pre],z)),
+                          np.concatenate((bdriftrates[pre],z)),
+                          expirymjd)
+
+    return mjds,delats,expirymjd
+
 #fixed arrays/values for delta_AT:
-__dat_valid_year = 2009
+__dat_valid_year = 2026
 #Reference dates (MJD) and drift rates (s/day), pre leap seconds
 __dat_drift = np.array([
     [ 37300.0, 0.0012960 ],
@@ -680,13 +917,351 @@ __dat_changes = np.array([
     [ 1997,  7, 31.0       ],
     [ 1999,  1, 32.0       ],
     [ 2006,  1, 33.0       ],
-    [ 2009,  1, 34.0       ]
+    [ 2009,  1, 34.0       ],
+    [ 2012,  7, 35.0       ],
+    [ 2015,  7, 36.0       ],
+    [ 2017,  1, 37.0       ]
 ]).T
-__dat_m = 12*__dat_changes[0] + __dat_changes[1]
+
+
+class JulianDateArray(object):
+    """
+    A julian date (or array of julian dates) stored as the sum of two floats
+    `jd1` + `jd2` along with the time scale, allowing precision well below a
+    microsecond (a single float JD is only precise to ~20 microseconds). `jd1`
+    holds the whole number of days and `jd2` the fraction in [-0.5,0.5].
+
+    The supported time scales are 'utc', 'tai', 'tt', and 'ut1', and the
+    :meth:`toScale` method (or the :attr:`utc`, :attr:`tai`, :attr:`tt`, and
+    :attr:`ut1` attributes) converts between them for all elements at once.
+    TAI-UTC is computed from :func:`delta_AT`, and UT1-UTC is taken from the
+    :attr:`dut1` attribute.
+
+    These objects can be used in place of a float JD for :func:`jd_to_calendar`,
+    :func:`jd_to_epoch`, :func:`delta_AT`, the epoch-related attributes of
+    :class:`astropysics.coords.coordsys.EpochalCoordinates`,
+    :func:`astropysics.coords.funcs.earth_rotation_angle`,
+    :func:`astropysics.coords.funcs.greenwich_sidereal_time`, and
+    :class:`astropysics.coords.ephems.EphemerisObject`.  These convert to the
+    time scale they require (UTC, TT, UT1, and TT, respectively). Elsewhere,
+    they are converted to a float array of julian dates (in their own time
+    scale).
+
+    Subtracting two of these objects gives the difference in days as a float
+    (or array), and adding or subtracting a number of days gives a new object.
+    """
+
+    scales = ('utc','tai','tt','ut1')
+
+    def __init__(self,jd1,jd2=0,scale='utc',dut1=0):
+        """
+        :param jd1: The julian date(s), or the first part of the julian date(s).
+        :type jd1: scalar or array-like
+        :param jd2: The second part of the julian date(s), added to `jd1`.
+        :type jd2: scalar or array-like
+        :param str scale: The time scale - 'utc', 'tai', 'tt', or 'ut1'.
+        :param dut1: UT1-UTC in seconds.
+        :type dut1: scalar or array-like
+
+        :except ValueError: If the time scale is invalid.
+        """
+        scale = scale.lower()
+        if scale not in self.scales:
+            raise ValueError('invalid time scale '+str(scale))
+
+        jd1 = np.array(jd1,dtype=float)
+        jd2 = np.array(jd2,dtype=float)
+
+        #exact sum (Knuth's two-sum) split into whole days and a fraction
+        s = jd1 + jd2
+        b = s - jd1
+        err = (jd1 - (s - b)) + (jd2 - b)
+        self.jd1 = np.round(s)
+        self.jd2 = (s - self.jd1) + err
+
+        self.scale = scale
+        self.dut1 = dut1
+
+    @classmethod
+    def fromDatetime64(cls,dt64,scale='utc',dut1=0):
+        """
+        Generates an object exactly (to the nearest microsecond) from
+        :class:`numpy.datetime64` values, which are taken to be in the time
+        scale `scale`. Values with units of days or longer are taken to be at
+        noon, as in :func:`calendar_to_jd`.
+
+        :returns: A :class:`JulianDateArray` object.
+        """
+        dt64 = np.array(dt64,copy=False)
+        usec = dt64.astype('datetime64[us]').astype('int64')
+        if np.datetime_data(dt64.dtype)[0] in ('Y','M','W','D'):
+            usec = usec + 43200000000
+        days = usec//86400000000
+        return cls(days + unixepochjd,(usec - days*86400000000)/86400000000,
+                   scale,dut1)
+
+    @classmethod
+    def fromCalendar(cls,caltime,tz=None,scale='utc',dut1=0):
+        """
+        Generates an object from calendar dates and times in any of the forms
+        accepted by :func:`calendar_to_jd`. :class:`numpy.datetime64` values and
+        :class:`datetime.datetime` objects are converted without loss of
+        precision, while other forms are limited to the precision of
+        :func:`calendar_to_jd`.
+
+        :param tz: The time zone as for :func:`calendar_to_jd`.
+        :param str scale: The time scale of the (time zone corrected) input.
+        :param dut1: UT1-UTC in seconds.
+
+        :returns: A :class:`JulianDateArray` object.
+        """
+        from datetime import datetime,date
+
+        if isinstance(caltime,(datetime,date)):
+            caltime = [caltime]
+            scalar = True
+        else:
+            scalar = False
+        if not isinstance(caltime,(np.ndarray,np.datetime64)) and \
+           len(caltime) > 0 and all([isinstance(ct,(datetime,date)) for ct in caltime]):
+            dts = []
+            for dt in caltime:
+                if not hasattr(dt,'hour'):
+                    dt = datetime(dt.year,dt.month,dt.day,12)
+                if tz is None and dt.utcoffset() is not None:
+                    dt = dt - dt.utcoffset()
+                dts.append(dt.replace(tzinfo=None))
+            caltime = np.array(dts,dtype='datetime64[us]')
+            if scalar:
+                caltime = caltime[0]
+
+        if isinstance(caltime,np.datetime64) or \
+           (isinstance(caltime,np.ndarray) and caltime.dtype.kind == 'M'):
+            res = cls.fromDatetime64(caltime,scale,dut1)
+            if tz is not None:
+                #offsets are whole seconds, so round away the float error
+                offsets = calendar_to_jd(caltime,tz) - calendar_to_jd(caltime)
+                res.jd2 = res.jd2 + np.round(offsets*86400)/86400
+                res = cls(res.jd1,res.jd2,scale,dut1)
+            return res
+        else:
+            return cls(calendar_to_jd(caltime,tz),0,scale,dut1)
+
+    def toDatetime64(self):
+        """
+        Converts to :class:`numpy.datetime64` values (with microsecond units)
+        in the time scale of this object.
+
+        :returns: A :class:`numpy.ndarray` of :class:`numpy.datetime64` values.
+        """
+        return jd_to_calendar(self,output='datetime64')
+
+    def toScale(self,scale):
+        """
+        Converts to another time scale.
+
+        :param str scale: The new time scale - 'utc', 'tai', 'tt', or 'ut1'.
+
+        :returns: A new :class:`JulianDateArray` object in the requested time
+            scale (or this object if it is already in that scale).
+
+        :except ValueError: If the time scale is invalid.
+        """
+        scale = scale.lower()
+        if scale not in self.scales:
+            raise ValueError('invalid time scale '+str(scale))
+        if scale == self.scale:
+            return self
+
+        jd1,jd2 = self.jd1,self.jd2
+        dut1 = np.array(self.dut1,dtype=float)/86400
+        uts = ('utc','ut1')
+
+        if scale in uts and self.scale in uts:
+            jd2 = jd2 - dut1 if self.scale == 'ut1' else jd2 + dut1
+        else:
+            #convert to TAI ...
+            if self.scale == 'tt':
+                jd2 = jd2 - 32.184/86400
+            elif self.scale in uts:
+                if self.scale == 'ut1':
+                    jd2 = jd2 - dut1
+                jd2 = jd2 + delta_AT(jd1 + jd2)/86400
+
+            #... and from TAI to the new scale
+            if scale == 'tt':
+                jd2 = jd2 + 32.184/86400
+            elif scale in uts:
+                jdtai = jd1 + jd2
+                jd2 = jd2 - delta_AT(jdtai - delta_AT(jdtai)/86400)/86400
+                if scale == 'ut1':
+                    jd2 = jd2 + dut1
+
+        return self.__class__(jd1,jd2,scale,self.dut1)
+
+    utc = property(lambda self:self.toScale('utc'),doc='This time in UTC.')
+    tai = property(lambda self:self.toScale('tai'),doc='This time in TAI.')
+    tt = property(lambda self:self.toScale('tt'),doc='This time in TT.')
+    ut1 = property(lambda self:self.toScale('ut1'),doc='This time in UT1.')
+
+    def _getJd(self):
+        res = self.jd1 + self.jd2
+        return float(res) if res.shape == () else res
+    jd = property(_getJd,doc="""
+    The julian date(s) as a single float or float array (in the time scale of
+    this object), with the precision limitations of a single float.
+    """)
+
+    def _getMjd(self):
+        res = (self.jd1 - mjdoffset) + self.jd2
+        return float(res) if res.shape == () else res
+    mjd = property(_getMjd,doc="""
+    The modified julian date(s) as a single float or float array.
+    """)
+
+    @property
+    def shape(self):
+        """
+        The shape of the array of julian dates.
+        """
+        return self.jd1.shape
+
+    def __len__(self):
+        return len(self.jd1)
+
+    def __getitem__(self,key):
+        dut1 = self.dut1
+        if np.shape(dut1):
+            dut1 = np.broadcast_to(dut1,self.shape)[key]
+        return self.__class__(self.jd1[key],self.jd2[key],self.scale,dut1)
+
+    def __array__(self,dtype=None):
+        return np.asarray(self.jd1 + self.jd2,dtype=dtype)
+
+    def __float__(self):
+        return float(self.jd1 + self.jd2)
+
+    def __add__(self,days):
+        if isinstance(days,JulianDateArray):
+            raise TypeError('cannot add two julian dates')
+        return self.__class__(self.jd1,self.jd2 + days,self.scale,self.dut1)
+    __radd__ = __add__
+
+    def __sub__(self,other):
+        if isinstance(other,JulianDateArray):
+            other = other.toScale(self.scale)
+            return (self.jd1 - other.jd1) + (self.jd2 - other.jd2)
+        return self.__class__(self.jd1,self.jd2 - other,self.scale,self.dut1)
+
+    def __repr__(self):
+        return '%s(%r, %r, scale=%r)'%(self.__class__.__name__,self.jd1,
+                                       self.jd2,self.scale)
 
 
 #<-------------------Site and Observing/Instrumentation-related---------------->
 
+def _hours_to_hms(hrs):
+    """
+    Splits decimal hours into integer hours and minutes and decimal seconds,
+    returned as three arrays.
+    """
+    hrs = np.array(hrs,dtype=float,ndmin=1)
+    hr = hrs.astype(int)
+    min = 60*(hrs - hr)
+    sec = 60*(min - min.astype(int))
+    return hr,min.astype(int),sec
+
+def _target_radec_arrays(targets,jd=None,errors=False,nutate=False):
+    """
+    Extracts arrays of positions for many fixed targets at once.
+
+    `targets` can be an array-valued
+    :class:`astropysics.coords.LatLongCoordinates` object, a sequence of such
+    objects (converted to ICRS if they are not ICRS or GCRS), or a tuple of
+    arrays (ra,dec) or (ra,dec,raerr,decerr) in degrees (ICRS).  If `jd` is not
+    None, the positions are precessed to the mean equinox of that julian date,
+    or the true equinox if `nutate` is True.
+
+    returns ra,dec in radians, or ra,dec,raerr,decerr if `errors` is True (with
+    errors of 0 where they are not given).
+    """
+    from .coords.coordsys import LatLongCoordinates,ICRSCoordinates,\
+                GCRSCoordinates,_latlong_objects_to_arrays,\
+                _precession_matrix_J2000_Capitaine,_nutation_matrix
+    from .coords.funcs import _lonlat_to_unit_vectors
+
+    if isinstance(targets,LatLongCoordinates):
+        targets = [targets]
+    if len(targets) in (2,4) and not isinstance(targets[0],LatLongCoordinates):
+        ra,dec = [np.radians(np.array(v,dtype=float,ndmin=1)) for v in targets[:2]]
+        if len(targets) == 4:
+            raerr,decerr = [np.radians(np.array(v,dtype=float)) for v in targets[2:]]
+        else:
+            raerr = decerr = 0
+    else:
+        targets = [t if isinstance(t,(ICRSCoordinates,GCRSCoordinates)) else \
+                   t.convert(ICRSCoordinates) for t in targets]
+        dec,ra = _latlong_objects_to_arrays(targets)
+        if errors:
+            raerr,decerr = [],[]
+            for t in targets:
+                ones = np.ones(np.size(t.ra.radians))
+                raerr.append(0*ones if t.raerr is None else t.raerr.radians*ones)
+                decerr.append(0*ones if t.decerr is None else t.decerr.radians*ones)
+            raerr = np.concatenate(raerr)
+            decerr = np.concatenate(decerr)
+
+    if jd is not None:
+        epoch = jd_to_epoch(jd)
+        prec = np.asarray(_precession_matrix_J2000_Capitaine(epoch))
+        if nutate:
+            prec = np.dot(np.asarray(_nutation_matrix(epoch)),prec)
+        x,y,z = np.dot(prec,_lonlat_to_unit_vectors(ra,dec,degrees=False).T)
+        ra = np.arctan2(y,x)
+        dec = np.arctan2(z,np.hypot(x,y))
+
+    if errors:
+        return ra,dec,raerr*np.ones_like(ra),decerr*np.ones_like(dec)
+    else:
+        return ra,dec
+
+def _first_crossings(func,jds,vals,tol):
+    """
+    Locates the first upward zero crossing (negative to non-negative) of each
+    row of a set of sampled tracks and refines it by bisection.
+
+    `func` is a function f(rows,jds) giving the value of the tracks with
+    indices `rows` at the julian dates `jds` (1D arrays of the same length),
+    `jds` is the 1D array of sample times, `vals` are the sampled values as a
+    (ntracks,nsamples) array, and `tol` is the required accuracy in days.
+
+    returns an array of length ntracks with the crossing julian dates, or nan
+    for tracks that do not cross zero in the sampled range.
+    """
+    neg = vals < 0
+    up = neg[:,:-1] & ~neg[:,1:]
+    res = np.empty(vals.shape[0])
+    res.fill(np.nan)
+
+    rows = np.where(up.any(axis=1))[0]
+    if len(rows) == 0:
+        return res
+    idx = up[rows].argmax(axis=1)
+    lo = jds[idx]
+    hi = jds[idx+1]
+
+    #samples are evenly spaced, so every bracket needs the same number of steps
+    niter = int(np.ceil(np.log2(max((jds[1]-jds[0])/tol,1))))
+    for i in range(niter):
+        mid = (lo+hi)/2
+        below = func(rows,mid) < 0
+        lo = np.where(below,mid,lo)
+        hi = np.where(below,hi,mid)
+    res[rows] = (lo+hi)/2
+
+    return res
+
+
 
 class Site(object):
     """
@@ -800,7 +1375,12 @@ class Site(object):
             current local siderial time for this Site or uses the value of the
             :attr:`currentobsjd` property.
         * localSiderialTime(JD)
-            input argument is julian date UT1
+            input argument is julian date UT1, an array of julian dates, or a
+            :class:`JulianDateArray`
+        * localSiderialTime(:class:`numpy.datetime64` array)
+            the times are taken to be in UTC
+        * localSiderialTime(sequence of :class:`datetime.datetime`)
+            as for a single :class:`datetime.datetime` object below
         * localSdierialTime(:class:`datetime.date`)
             compute the local siderial time for midnight on the given date
         * localSiderialTime(:class:`datetime.datetime`)
@@ -831,6 +1411,9 @@ class Site(object):
         * 'datetime'
             a :class:`datetime.time` object
 
+        If multiple times are given, the hours are returned as an array, and
+        the other forms as lists.
+
         """
         #guts of calculation adapted from xidl
         import datetime
@@ -843,7 +1426,11 @@ class Site(object):
         if len(args)==0:
             jd = self.currentobsjd
         elif len(args)==1:
-            if hasattr(args[0],'year'):
+            if isinstance(args[0],JulianDateArray):
+                jd = args[0]
+            elif isinstance(args[0],np.ndarray) and args[0].dtype.kind == 'M':
+                jd = calendar_to_jd(args[0])
+            elif hasattr(args[0],'year'):
                 if hasattr(args[0],'hour'):
                     if args[0].tzinfo is None:
                         dtobj = datetime.datetime(args[0].year,args[0].month,
@@ -855,8 +1442,13 @@ class Site(object):
                     dtobj = datetime.datetime(args[0].year,args[0].month,
                                               args[0].day,tzinfo=self.tz)
                 jd = calendar_to_jd(dtobj,tz=None)
-            else:
+            elif np.isscalar(args[0]):
                 jd = args[0]
+            elif len(args[0]) > 0 and hasattr(args[0][0],'year'):
+                dts = [dt if dt.tzinfo else dt.replace(tzinfo=self.tz) for dt in args[0]]
+                jd = calendar_to_jd(dts,tz=None)
+            else:
+                jd = np.array(args[0],dtype=float,copy=False)
         elif len(args) == 4:
             time,year,month,day = args
             hr = int(np.floor(time))
@@ -888,28 +1480,27 @@ class Site(object):
 #        #Compute LST in hours.
 #        lst = np.array((theta + self._long.d)/15.0) % 24.0
 
-        if lst.shape == tuple():
+        scalarout = lst.shape == tuple()
+        if scalarout:
             lst = lst.ravel()[0]
 
         if rettype is None or rettype == 'hours':
             return lst
         elif rettype == 'string':
-            hr = int(lst)
-            min = 60*(lst - hr)
-            sec = 60*(min - int(min))
-            min = int(min)
-            return '%02i:%02i:%f'%(hr,min,sec)
+            res = ['%02i:%02i:%f'%hms for hms in zip(*_hours_to_hms(lst))]
         elif rettype == 'datetime':
-            hr = int(lst)
-            min = 60*(lst - hr)
-            sec = 60*(min - int(min))
-            min = int(min)
-            msec = int(1e6*(sec-int(sec)))
-            sec = int(sec)
-            return datetime.time(hr,min,sec,msec)
+            hr,min,sec = _hours_to_hms(lst)
+            msec = (1e6*(sec - sec.astype(int))).astype(int)
+            res = [datetime.time(*[int(v) for v in t])
+                   for t in zip(hr,min,sec.astype(int),msec)]
         else:
             raise ValueError('invalid returntype argument')
 
+        if scalarout:
+            return res[0]
+        else:
+            return res
+
     def localTime(self,lsts,date=None,apparent=True,returntype=None,utc=False):
         """
         Computes the local civil time given a particular local siderial time.
@@ -941,6 +1532,8 @@ class Site(object):
             local time as a hh:mm:ss.s
         * 'datetime'
             a :class:`datetime.time` object with the appropriate tzinfo
+        * 'jd'
+            the julian date (UTC) of each time as a float or array
 
         If `utc` is True, the time will be converted to UTC before being
         returned.
@@ -952,8 +1545,8 @@ class Site(object):
         if isinstance(lsts,datetime.datetime):
             utcoffset = lsts.replace(tzinfo=self.tz).utcoffset()
             date = lsts.date()
-            lsts = datetime.time()
-            lsts = lsts.hour+lsts.minute/60+(lsts.second+lsts.microsecond*1e6)/3600
+            t = lsts.time()
+            lsts = t.hour+t.minute/60+(t.second+t.microsecond*1e-6)/3600
         else:
             jds,dt = self._processDate(date)
             utcoffset = dt.replace(tzinfo=self.tz).utcoffset()
@@ -968,40 +1561,35 @@ class Site(object):
             lsts = lsts.ravel()
 
 
-        lst0 = self.localSiderialTime(date)
+        lst0 = self.localSiderialTime(date,apparent=apparent)
         lthrs = (lsts - lst0)%24
         #NB floor rounds towards -ve infinity.  This is undesirable because:
         #Sometimes current lst - lst0 < 0 as the LST has looped since daybreak.
         #So floor will round a negative fraction to a whole day offset.
-        dayoffs = [ int((lst - lst0) / 24.0) for lst in lsts ]
+        dayoffs = np.trunc((lsts - lst0)/24.0).astype(int)
 
         lthrs /= 1.0027378507871321 #correct for siderial day != civil day
 
+        if returntype == 'jd':
+            dt0 = datetime.datetime(date.year,date.month,date.day,tzinfo=self.tz)
+            res = calendar_to_jd(dt0,tz=None) + (lthrs + 24*dayoffs)/24
+            return res[0] if scalarout else res
+
         if utc:
             lthrs = (lthrs - utcoffset.days*24 - utcoffset.seconds/3600)%24
 
         if returntype is None or returntype == 'hours':
             res = lthrs
         elif returntype == 'string':
-            res = []
-            for lthr in lthrs:
-                hr = int(lthr)
-                min = 60*(lthr - hr)
-                sec = 60*(min - int(min))
-                min = int(min)
-                res.append('%02i:%02i:%f'%(hr,min,sec))
+            res = ['%02i:%02i:%f'%hms for hms in zip(*_hours_to_hms(lthrs))]
         elif returntype == 'datetime':
-            res = []
-            for lthr,dayoff in zip(lthrs,dayoffs):
-                hr = int(lthr)
-                min = 60*(lthr - hr)
-                sec = 60*(min - int(min))
-                min = int(min)
-                msec = int(1e6*(sec-int(sec)))
-                sec = int(sec)
-
-                dtobj = datetime.datetime(date.year,date.month,date.day,hr,min,sec,msec,self.tz)
-                res.append(dtobj + datetime.timedelta(dayoff))
+            hr,min,sec = _hours_to_hms(lthrs)
+            msec = (1e6*(sec - sec.astype(int))).astype(int)
+            sec = sec.astype(int)
+            dtobj = datetime.datetime(date.year,date.month,date.day,tzinfo=self.tz)
+            res = [dtobj.replace(hour=int(h),minute=int(m),second=int(s),microsecond=int(ms)) +
+                   datetime.timedelta(int(doff))
+                   for h,m,s,ms,doff in zip(hr,min,sec,msec,dayoffs)]
         else:
             raise ValueError('invalid returntype argument')
 
@@ -1100,6 +1688,9 @@ class Site(object):
         is True or if it is False, they are in decimal hours.  If the object is
         circumpolar, rise and set are both None.  If it is never visible,
         rise,set, and transit are all None
+
+        See :meth:`findEvents` to compute these times for many targets at once
+        (and for moving targets like the Sun and Moon).
         """
         import datetime
         from dateutil import tz
@@ -1276,6 +1867,274 @@ class Site(object):
         else:
             return False
 
+    def findEvents(self,targets,jdrange,alt=-.5667,sampling=1/48,tol=1/86400):
+        """
+        Finds rise, set, and transit times for many targets at once by
+        sampling their altitude tracks over a time window, bracketing the
+        crossings of the altitude threshold (or of the meridian), and refining
+        them by bisection.
+
+        `targets` can be fixed positions - an array-valued
+        :class:`astropysics.coords.LatLongCoordinates` object, a sequence of
+        such objects, or a 2-tuple of arrays (ra,dec) in degrees (ICRS) - or a
+        single moving target - 'sun', the name of a solar system object as
+        accepted by :func:`astropysics.coords.ephems.get_solar_system_ephems`,
+        or an :class:`astropysics.coords.ephems.EphemerisObject` that can be
+        called with an array of julian dates. Moving targets include the
+        topocentric parallax, which matters for the Moon.
+
+        `jdrange` is the (start,end) of the window, either as julian dates or
+        in any form accepted by :func:`calendar_to_jd`.
+
+        `alt` is the altitude in degrees to be considered as risen or set.  It
+        may also be an array to use a different threshold for each target, or,
+        for a single target, to find the crossings of several thresholds (e.g.
+        for twilight - see :meth:`twilightTimes`). The default is for
+        approximate rise/set of a point source including refraction (use -.8333
+        for the upper limb of the Sun).
+
+        `sampling` is the spacing of the altitude samples in days - crossings
+        closer together than this (e.g. targets grazing the threshold) may be
+        missed. `tol` is the accuracy of the returned times in days.
+
+        Positions are precessed to the middle of the window, and the
+        difference between UT1 and the time scale of the ephemerides is
+        ignored.
+
+        *returns*
+        (rise,set,transit) as arrays of julian dates with one entry per target
+        (or threshold), giving the first event of each kind in the window, or
+        nan if it does not occur in the window. Transit is the upper
+        culmination, regardless of whether the target is above `alt`.
+        """
+        jd1,jd2 = [jd if np.isscalar(jd) else calendar_to_jd(jd) for jd in jdrange]
+        if not jd2 > jd1:
+            raise ValueError('jdrange must have the end after the start')
+
+        altfunc,ntargets = self._eventAltitudeFunc(targets,(jd1+jd2)/2)
+
+        thresh = np.radians(np.array(alt,dtype=float,ndmin=1))
+        if ntargets == 1:
+            tidx = np.zeros(thresh.size,dtype=int)
+        else:
+            tidx = np.arange(ntargets)
+            thresh = thresh*np.ones(ntargets)
+        if thresh.shape != tidx.shape:
+            raise ValueError('alt must be a scalar or have one entry per target')
+
+        jds = np.linspace(jd1,jd2,int(np.ceil((jd2-jd1)/sampling))+1)
+        alts,has = altfunc(tidx[:,np.newaxis],jds[np.newaxis,:])
+        dalts = alts - thresh[:,np.newaxis]
+
+        def dalt(rows,jds):
+            return altfunc(tidx[rows],jds)[0] - thresh[rows]
+        def negdalt(rows,jds):
+            return -dalt(rows,jds)
+        def sinha(rows,jds):
+            return np.sin(altfunc(tidx[rows],jds)[1])
+
+        rise = _first_crossings(dalt,jds,dalts,tol)
+        sets = _first_crossings(negdalt,jds,-dalts,tol)
+        #hour angle always increases, so sin(HA) only crosses 0 upwards at HA=0
+        transit = _first_crossings(sinha,jds,np.sin(has),tol)
+
+        return rise,sets,transit
+
+    def twilightTimes(self,jdrange,alts=(-.8333,-6,-12,-18),sampling=1/48,
+                           tol=1/86400):
+        """
+        Computes the times at which the Sun crosses the given altitudes in the
+        (start,end) window `jdrange`. The default `alts` are for sunset/sunrise
+        and the end/start of civil, nautical, and astronomical twilight. See
+        :meth:`findEvents` for the meaning of the other arguments.
+
+        *returns*
+        (evening,morning) as arrays of julian dates with one entry for each of
+        the `alts`, giving the first time the Sun sets/rises through that
+        altitude in the window (or nan if it does not).
+        """
+        rise,sets,transit = self.findEvents('sun',jdrange,alts,sampling,tol)
+        return sets,rise
+
+    def horizontalGrid(self,targets,jds=None,precess=True,refraction=False,
+                            errors=False):
+        """
+        Computes the altitude, azimuth, airmass, and hour angle of many fixed
+        targets at many times at once, as arrays of shape (ntargets,ntimes),
+        without creating coordinate objects for each point.
+
+        `targets` can be an array-valued
+        :class:`astropysics.coords.LatLongCoordinates` object, a sequence of
+        such objects, or a tuple of arrays (ra,dec) or (ra,dec,raerr,decerr) in
+        degrees (ICRS).
+
+        `jds` are the julian dates (UT1) as a scalar, array, or
+        :class:`JulianDateArray` (use :func:`calendar_to_jd` for calendar
+        forms), or None to use the :attr:`currentobsjd` property.
+
+        If `precess` is True, the positions are precessed (and nutated) to the
+        true equinox of the mean of `jds` (``np.mean(jds)``), matching the
+        apparent sidereal time used for the hour angle. The same equinox is
+        used for all of the times, so positions at times far from the mean are
+        off by the precession over that interval (about 50 arcsec per year) -
+        call this method separately for shorter spans of a long series (e.g.
+        one call per night for a year) if that matters.
+
+        If `refraction` is True, the altitude includes atmospheric refraction
+        (formula from Meeus ch 16) for a temperature of 283 K and the pressure
+        at this site's altitude. If `refraction` is a (non-0) float, it will be
+        taken as the temperature in K. This is the same correction as
+        :meth:`apparentCoordinates` applies. No correction is applied more
+        than 1 degree below the horizon.
+
+        If `errors` is True, the uncertainties in altitude and azimuth are
+        propagated from the uncertainties of the targets' positions.
+
+        *returns*
+        alt,az,airmass,ha where `alt` and `az` are in degrees (azimuth is
+        measured from north through east), `airmass` is sec(z) (nan for
+        targets below the horizon), and `ha` is the hour angle in hours from
+        -12 to 12. If `errors` is True, the return value is
+        alt,az,airmass,ha,dalt,daz with the uncertainties in degrees.
+        """
+        if jds is None:
+            jds = self.currentobsjd
+        if not isinstance(jds,JulianDateArray):
+            jds = np.array(jds,dtype=float,ndmin=1).ravel()
+        elif jds.shape == ():
+            jds = jds[np.newaxis]
+        epochjd = np.mean(jds) if precess else None
+
+        if errors:
+            ra,dec,raerr,decerr = _target_radec_arrays(targets,epochjd,True,True)
+        else:
+            ra,dec = _target_radec_arrays(targets,epochjd,nutate=True)
+
+        lsts = self.localSiderialTime(jds)*pi/12
+        ha = np.atleast_1d(lsts)[np.newaxis,:] - ra[:,np.newaxis]
+        sHA = np.sin(ha)
+        cHA = np.cos(ha)
+        sdec = np.sin(dec)[:,np.newaxis]
+        cdec = np.cos(dec)[:,np.newaxis]
+        slat = np.sin(self.latitude.radians)
+        clat = np.cos(self.latitude.radians)
+
+        alt = np.arcsin(slat*sdec + clat*cdec*cHA)
+        az = np.arctan2(-cdec*sHA,clat*sdec - slat*cdec*cHA)%(2*pi)
+
+        if errors:
+            #same propagation as equatorialToHorizontal
+            raerr = raerr[:,np.newaxis]
+            decerr = decerr[:,np.newaxis]
+            calt = np.cos(alt)
+            daltdH = -clat*cdec*sHA/calt
+            daltddec = (slat*cdec - clat*sdec*cHA)/calt
+            dalt = ((daltdH*raerr)**2 + (daltddec*decerr)**2)**0.5
+
+            dtanaz = 1 + np.tan(az)**2
+            denom = cHA*cdec*slat - clat*sdec
+            dazdH = (cHA*cdec/denom + cdec*cdec*sHA*sHA*slat*denom**-2)/dtanaz
+            dazddec = (-(sHA*sdec)/denom + \
+                       ((cdec*clat + cHA*sdec*slat)*cdec*sHA)*denom**-2)/dtanaz
+            daz = ((dazdH*raerr)**2 + (dazddec*decerr)**2)**0.5
+
+        alt = np.degrees(alt)
+        if refraction:
+            alt = alt + self._refractionCorrection(alt,refraction)
+
+        zenith = alt > 0
+        airmass = np.empty_like(alt)
+        airmass.fill(np.nan)
+        airmass[zenith] = 1/np.sin(np.radians(alt[zenith]))
+
+        ha = ((ha*12/pi + 12)%24) - 12
+
+        if errors:
+            return alt,np.degrees(az),airmass,ha,np.degrees(dalt),np.degrees(daz)
+        else:
+            return alt,np.degrees(az),airmass,ha
+
+    def _eventAltitudeFunc(self,targets,jd):
+        """
+        Generates a function f(tidx,jds) for :meth:`findEvents` that computes
+        the altitude and hour angle (in radians) of the targets with indices
+        `tidx` at the julian dates `jds` (broadcast against each other), with
+        positions precessed to the epoch of `jd`.
+
+        returns f,ntargets
+        """
+        from .constants import Rea,Reb,aupercm
+        from .coords import greenwich_sidereal_time
+        from .coords.coordsys import ICRSCoordinates,GCRSCoordinates,\
+                    _precession_matrix_J2000_Capitaine
+        from .coords.funcs import _lonlat_to_unit_vectors
+        from .coords.ephems import EphemerisObject,earth_pos_vel,\
+                                   get_solar_system_ephems
+
+        prec = np.asarray(_precession_matrix_J2000_Capitaine(jd_to_epoch(jd)))
+        lat = self.latitude.radians
+        slat,clat = np.sin(lat),np.cos(lat)
+        long = self.longitude.radians
+
+        def altha(ra,dec,lsts):
+            ha = lsts - ra
+            alt = np.arcsin(slat*np.sin(dec) + clat*np.cos(dec)*np.cos(ha))
+            return alt,ha
+
+        if isinstance(targets,basestring) or isinstance(targets,EphemerisObject):
+            #posfunc returns geocentric positions in AU, or unit vectors if
+            #the distance is unknown (in which case no parallax is applied)
+            if isinstance(targets,basestring) and targets.lower() == 'sun':
+                def posfunc(jds):
+                    return -earth_pos_vel(jds,False)[0],True
+            else:
+                if isinstance(targets,basestring):
+                    eobj = get_solar_system_ephems(targets)
+                else:
+                    eobj = targets
+                def posfunc(jds):
+                    c = eobj(jds)
+                    if hasattr(c,'x'): #rectangular outputs are geocentric
+                        return np.array((c.x,c.y,c.z)),True
+                    if not isinstance(c,(ICRSCoordinates,GCRSCoordinates)):
+                        c = c.convert(ICRSCoordinates)
+                    xyz = _lonlat_to_unit_vectors(c.ra.d,c.dec.d).T
+                    dau = c.distanceau
+                    if dau is None:
+                        return xyz,False
+                    return xyz*dau[0],True
+
+            #geocentric observer position in AU (Meeus ch. 11)
+            u = np.arctan(Reb*np.tan(lat)/Rea)
+            h = self.altitude*100/Rea if self.altitude else 0
+            rhosin = (Reb*np.sin(u)/Rea + h*slat)*Rea*aupercm
+            rhocos = (np.cos(u) + h*clat)*Rea*aupercm
+
+            def f(tidx,jds):
+                jds = np.asarray(jds,dtype=float)
+                ones = np.ones(np.broadcast(tidx,jds).shape)
+                jdshape = jds.shape
+                jds = jds.ravel()
+                lsts = greenwich_sidereal_time(jds,False)*pi/12 + long
+                xyz,topo = posfunc(jds)
+                x,y,z = np.dot(prec,xyz.reshape(3,-1))
+                if topo:
+                    x = x - rhocos*np.cos(lsts)
+                    y = y - rhocos*np.sin(lsts)
+                    z = z - rhosin
+                ra = np.arctan2(y,x)
+                dec = np.arctan2(z,np.hypot(x,y))
+                alt,ha = altha(ra,dec,lsts)
+                return alt.reshape(jdshape)*ones,ha.reshape(jdshape)*ones
+            return f,1
+        else:
+            ra,dec = _target_radec_arrays(targets,jd)
+
+            def f(tidx,jds):
+                lsts = greenwich_sidereal_time(np.asarray(jds,dtype=float),False)*pi/12 + long
+                return altha(ra[tidx],dec[tidx],lsts)
+            return f,len(ra)
+
     def apparentCoordinates(self,coords,datetime=None,precess=True,refraction=True):
         """
         computes the positions in horizontal coordinates of an object with the
@@ -1289,10 +2148,12 @@ class Site(object):
         the observation (almost always the right thing to do)
 
         If `refraction` is True, an added correction to the altitude due to
-        atmospheric refraction at STP (formula from Meeus ch 16) is included. If
-        `refraction` is a (non-0) float, it will be taken as the temperature at
-        which to perform the refraction calculation. If it evaluates to False,
-        no refraction correction is performed
+        atmospheric refraction at 283 K and the pressure at this site's
+        altitude (formula from Meeus ch 16) is included. If `refraction` is a
+        (non-0) float, it will be taken as the temperature in K at which to
+        perform the refraction calculation. If it evaluates to False, no
+        refraction correction is performed. This is the same correction used
+        by :meth:`horizontalGrid`.
 
 
         *returns*
@@ -1309,7 +2170,7 @@ class Site(object):
             jd = np.array(datetime,copy=False,ndmin=1)
             if len(jd.shape)>1:
                 jd = np.array([calendar_to_jd(v,self.tz) for v in jd])
-        lsts = [self.localSiderialTime(d) for d in jd]
+        lsts = self.localSiderialTime(jd)
 
         if precess:
             res = self.equatorialToHorizontal(coords,lsts,epoch=jd_to_epoch(jd[0]))
@@ -1317,34 +2178,41 @@ class Site(object):
             res = self.equatorialToHorizontal(coords,lsts)
 
         if refraction:
-            from math import tan,radians
-            if not hasattr(self,'_cached_pressure') or self._cached_pressure is None:
-                from math import exp
-                from.constants import g0,Rb
-                t0 = 273 #K
-                M = 28.9644 #g/mol
-                self._cached_pressure = P = exp(g0*M*self.altitude/(Rb*t0))
-            else:
-                P = self._cached_pressure
-
-            if refraction is True:
-                T = 273
-            else:
-                T  = float(refraction)
             if isinstance(res,list):
                 res_list = res
             else:
                 res_list = [res]
             for this_res in res_list:
-                h = this_res.alt.radians
-                R = 1.02/tan(h+(10.3/(h+5.11))) #additive correction in arcmin
-                #for inverse problem of apparent h->true/airless h, use:
-                #R = 1/tan(h0+(7.31/(h0+4.4)))
-
-                this_res.alt._decval += radians(R/60.)
+                h = this_res.alt.d
+                this_res.alt.d = h + self._refractionCorrection(h,refraction)
 
         return res
 
+    def _refractionCorrection(self,alt,refraction=True):
+        """
+        Computes the correction for atmospheric refraction to add to the true
+        (airless) altitude `alt` in degrees (scalar or array) to get the
+        apparent altitude, using formula 16.4 from Meeus. If `refraction` is
+        True, the temperature is taken to be 283 K (the reference temperature
+        of the formula), otherwise `refraction` is the temperature in K. The
+        pressure is that of an isothermal atmosphere at this site's altitude.
+        No correction is applied more than 1 degree below the horizon.
+
+        returns the correction in degrees
+        """
+        from .constants import g0,Rb
+
+        T = 283 if refraction is True else float(refraction)
+        M = 28.9644 #g/mol
+        prat = np.exp(-g0*M*100*(self.altitude or 0)/(Rb*T)) #P/P0
+        h = np.maximum(alt,-1)
+        #the offset makes the correction 0 at the zenith
+        R = 1.02/np.tan(np.radians(h + 10.3/(h + 5.11))) + .0019279 #arcmin
+        #for inverse problem of apparent h->true/airless h, use:
+        #R = 1/tan(h0+(7.31/(h0+4.4)))
+        R *= prat*283/T
+        return np.where(np.asarray(alt) < -1,0,R/60)
+
     def _processDate(self,date):
         """
         utitily function to convert a date in a variety of formats to a
@@ -195,6 +195,172 @@ def get_package_data(dataname):
     path = dirname(rootfile)+'/data/'+dataname
     return get_loader(rootname).get_data(path)
 
+#increment when the layout of the package data cache changes
+_package_cache_format = 2
+
+def _parser_fingerprint(parser):
+    """
+    Generates a hex digest identifying the code of `parser` (including any
+    nested functions, constants, and closure values), so that a cache written
+    by a different version of the parser is not reused.
+    """
+    from hashlib import md5
+
+    h = md5()
+    def add_code(code):
+        h.update(code.co_code)
+        for c in code.co_consts:
+            if hasattr(c,'co_code'):
+                add_code(c)
+            else:
+                h.update(repr(c))
+    func = getattr(parser,'im_func',parser)
+    code = getattr(func,'func_code',None)
+    if code is None:
+        #not a python function - fall back on its name
+        h.update(getattr(parser,'__module__','') + repr(parser.__class__))
+    else:
+        h.update(func.__module__ + '.' + func.__name__)
+        add_code(code)
+        for cell in (func.func_closure or ()):
+            h.update(repr(cell.cell_contents))
+    return h.hexdigest()
+
+def get_package_data_arrays(dataname,parser,cache=None):
+    """
+    Loads a package data file (see :func:`get_package_data`) that is parsed into
+    arrays. The parsed arrays are cached in binary form (one numpy .npy file
+    per array) in the "package_cache" directory of the astropysics data
+    directory (see :func:`astropysics.config.get_data_dir`), so the text only
+    needs to be parsed the first time the data are requested. Cached arrays are
+    memory-mapped read-only rather than read into memory.
+
+    The cache is specific to the astropysics version, the cache format, and the
+    code of `parser`, and is ignored if the package data file is newer than it,
+    so changing any of these reparses the text.
+
+    :param str dataname:
+        The name of a file in the package data directory.
+    :param parser:
+        A callable f(datastring) that parses the content of the data file and
+        returns a dictionary mapping names to arrays. The arrays must not have
+        object dtype if they are to be cached.
+    :param cache:
+        If True, the binary cache is used, if False, the data file is always
+        parsed and no cache is written. If None, the 'package_data_cache'
+        setting of the 'io' configuration is used (default True).
+
+    :returns:
+        A dictionary mapping names to :class:`numpy.ndarray` objects (read-only
+        :class:`numpy.memmap` objects if they came from the cache).
+
+    """
+    import os,re,shutil
+    from .. import __file__ as rootfile
+    from ..config import get_data_dir
+    from ..version import version
+
+    if cache is None:
+        cache = _package_data_cache
+
+    cachedn = None
+    if cache:
+        try:
+            cachedir = os.path.join(get_data_dir(),'package_cache')
+            if not os.path.isdir(cachedir):
+                os.mkdir(cachedir)
+            key = '%s-%s-f%i-%s'%(dataname,version,_package_cache_format,
+                                  _parser_fingerprint(parser)[:16])
+            cachedn = os.path.join(cachedir,re.sub(r'[^\w.-]','_',key))
+            srcfn = os.path.join(os.path.dirname(rootfile),'data',dataname)
+            if os.path.isdir(cachedn) and (not os.path.exists(srcfn) or \
+               os.path.getmtime(cachedn) >= os.path.getmtime(srcfn)):
+                res = {}
+                for fn in os.listdir(cachedn):
+                    if fn.endswith('.npy'):
+                        res[fn[:-4]] = np.load(os.path.join(cachedn,fn),
+                                               mmap_mode='r')
+                return res
+            elif os.path.isdir(cachedn):
+                #out of date
+                shutil.rmtree(cachedn,True)
+        except Exception:
+            #unreadable cache or data directory - fall back on parsing the text
+            cachedn = None
+
+    res = parser(get_package_data(dataname))
+
+    #object arrays cannot be memory-mapped, so they are never cached
+    if cachedn is not None and \
+       not any([np.asarray(v).dtype.hasobject for v in res.itervalues()]):
+        #write to a temporary directory first so that other processes never
+        #see a partially written cache
+        tmpdn = '%s.%i.tmp'%(cachedn,os.getpid())
+        try:
+            os.mkdir(tmpdn)
+            for k,v in res.iteritems():
+                np.save(os.path.join(tmpdn,k+'.npy'),v)
+            os.rename(tmpdn,cachedn)
+        except (OSError,IOError):
+            #OSError if another process already wrote the cache
+            shutil.rmtree(tmpdn,True)
+
+    return res
+
+_benchmark_tables_code = """
+from astropysics.coords import coordsys,ephems
+for series in ('00a_ls','00a_pl','00b'):
+    coordsys._get_nutation_data(series)
+coordsys._get_CIO_locator_data()
+ephems._get_earth_series_coeffs()
+ephems.list_solar_system_objects()
+"""
+def _import_time_benchmark(modname='astropysics.coords',
+                           firstuse=_benchmark_tables_code,repeat=3):
+    """
+    Measures the time to import a module and then run `firstuse` in a fresh
+    python process, both with and without the binary package data cache of
+    :func:`get_package_data_arrays` .
+
+    :param str modname: The name of the module to import.
+    :param str firstuse:
+        Python code to run after the import (by default, loads all of the data
+        tables used in :mod:`astropysics.coords`).
+    :param int repeat:
+        The number of processes to run for each case - the fastest is reported.
+
+    :returns:
+        A dictionary with keys 'import', 'firstuse_parsed', and
+        'firstuse_cached' giving times in seconds.
+    """
+    import sys,subprocess
+
+    template = """
+import time
+st = time.time()
+import %s
+imptime = time.time() - st
+import astropysics.utils.io
+astropysics.utils.io._package_data_cache = %s
+st = time.time()
+%s
+print imptime,time.time() - st
+"""
+    def run(cache):
+        code = template%(modname,cache,firstuse)
+        times = []
+        for i in range(repeat):
+            out = subprocess.Popen([sys.executable,'-c',code],
+                                   stdout=subprocess.PIPE).communicate()[0]
+            times.append([float(t) for t in out.split()[-2:]])
+        return np.min(times,axis=0)
+
+    run(True) #make sure the cache is present
+    imptime,parsetime = run(False)
+    cachetime = run(True)[1]
+    return {'import':imptime,'firstuse_parsed':parsetime,
+            'firstuse_cached':cachetime}
+
 def _readrem(remote,reportprogress=False):
     """
     Reads the provided remote url and returns the result, possible reporting
@@ -272,6 +438,7 @@ def _readrem(remote,reportprogress=False):
 #TODO: Document these in future config docs
 _data_store = _io_config.get('data_store',True)
 _data_reporter = _io_config.get('data_reporter',True)
+_package_data_cache = _io_config.get('package_data_cache',True)
 
 def get_data(dataurl,asfile=False,localfn=None):
     """
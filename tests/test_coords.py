@@ -428,3 +428,579 @@ def test_FK5Coordinates_string_formatting():
     
     assert d1.getDmsStr( canonical= True) == d2.getDmsStr( canonical= True) 
     
+
+def test_array_coords():
+    """
+    Test conversions of array-valued coordinates against scalar conversions.
+    """
+    from numpy import mgrid,array,abs
+    from astropysics.coords.coordsys import FK5Coordinates,ICRSCoordinates,\
+                                  GalacticCoordinates,CIRSCoordinates
+
+    ras,decs = mgrid[0:360:6j,-80:80:5j].reshape((2,6*5))
+    epochs = 1990 + 10*(ras//100)
+
+    fk5s = FK5Coordinates(ras,decs)
+    gals = fk5s.convert(GalacticCoordinates)
+    cirss = ICRSCoordinates(ras,decs,epoch=2010).convert(CIRSCoordinates)
+    eqxs = ICRSCoordinates(ras,decs,epoch=epochs).convert(FK5Coordinates)
+
+    assert gals.l.d.shape == ras.shape
+    assert eqxs.epoch.shape == ras.shape
+
+    for i,(ra,dec) in enumerate(zip(ras,decs)):
+        gal = FK5Coordinates(ra,dec).convert(GalacticCoordinates)
+        cirs = ICRSCoordinates(ra,dec,epoch=2010).convert(CIRSCoordinates)
+        eqx = ICRSCoordinates(ra,dec,epoch=epochs[i]).convert(FK5Coordinates)
+
+        assert abs(gal.l.d-gals.l.d[i])<1e-10,'array Galactic l mismatch'
+        assert abs(gal.b.d-gals.b.d[i])<1e-10,'array Galactic b mismatch'
+        assert abs(cirs.ra.d-cirss.ra.d[i])<1e-10,'array CIRS ra mismatch'
+        assert abs(cirs.dec.d-cirss.dec.d[i])<1e-10,'array CIRS dec mismatch'
+        assert abs(eqx.ra.d-eqxs.ra.d[i])<1e-10,'multi-epoch ra mismatch'
+        assert abs(eqx.dec.d-eqxs.dec.d[i])<1e-10,'multi-epoch dec mismatch'
+        assert eqx.epoch == eqxs.epoch[i]
+
+    seps = (fk5s - FK5Coordinates(ras,decs)).arcsec
+    assert seps.shape == ras.shape and abs(seps).max() < 1e-6
+
+def test_array_epoch_transforms():
+    """
+    Test that transforms with an array of epochs use one matrix per epoch and
+    match scalar conversions.
+    """
+    import numpy as np
+    from astropysics.coords.coordsys import FK4Coordinates,FK5Coordinates,\
+                    GCRSCoordinates,CIRSCoordinates,ITRSCoordinates,\
+                    GalacticCoordinates,EclipticCoordinatesEquinox
+
+    epochs = np.linspace(1980,2030,7)
+    epochs[1] = epochs[4]
+    ras = np.linspace(5,300,7)
+    decs = np.linspace(-70,70,7)
+
+    ms = CIRSCoordinates._fromGCRS(GCRSCoordinates(ras,decs,epoch=epochs))
+    assert ms.shape == (7,3,3)
+    assert np.allclose(ms[2],CIRSCoordinates._CMatrix(epochs[2]),rtol=0,atol=1e-15)
+    assert FK4Coordinates._fromFK5(FK5Coordinates(ras,decs,epoch=epochs)).shape == (7,3,3)
+
+    convs = [(GCRSCoordinates,FK5Coordinates,{'distanceau':np.linspace(0.5,3,7)}),
+             (GCRSCoordinates,ITRSCoordinates,{}),
+             (FK4Coordinates,GalacticCoordinates,{}),
+             (EclipticCoordinatesEquinox,CIRSCoordinates,{})]
+    for fromcls,tocls,kwargs in convs:
+        for optimize in (True,False):
+            if fromcls is EclipticCoordinatesEquinox:
+                arrc = fromcls(ras,decs,epoch=epochs)
+            else:
+                arrc = fromcls(ras,decs,epoch=epochs,**kwargs)
+            res = arrc.convert(tocls,optimize=optimize)
+            assert res.epoch.shape == (7,)
+            for i in range(7):
+                ikw = dict([(k,v[i]) for k,v in kwargs.items()])
+                c = fromcls(ras[i],decs[i],epoch=epochs[i],**ikw)
+                ires = c.convert(tocls,optimize=optimize)
+                assert abs(ires._lat.d-res._lat.d[i]) < 1e-10,(fromcls,tocls)
+                assert abs(ires._long.d-res._long.d[i]) < 1e-10,(fromcls,tocls)
+
+def test_matrix_rotate_arrays():
+    """
+    Test batched matrix rotation with error propagation against single
+    coordinate rotations.
+    """
+    from numpy import linspace,radians,array,abs
+    from astropysics.utils import rotation_matrix
+    from astropysics.coords.coordsys import FK5Coordinates,LatLongCoordinates
+
+    ras,decs = linspace(1,359,7),linspace(-80,80,7)
+    raerrs,decerrs = ras*0+1e-3,decs*0+2e-3
+    mats = array([rotation_matrix(a,'x')*rotation_matrix(a,'z') for a in ras])
+
+    lat,long,laterr,longerr = LatLongCoordinates.matrixRotateArrays(mats,
+                        radians(decs),radians(ras),radians(decerrs),radians(raerrs))
+    lat1,long1 = LatLongCoordinates.matrixRotateArrays(mats[0],radians(decs),
+                                                       radians(ras))
+
+    for i,(ra,dec) in enumerate(zip(ras,decs)):
+        c = FK5Coordinates(ra,dec,raerrs[i],decerrs[i])
+        c.matrixRotate(mats[i])
+        assert abs(c.dec.r-lat[i])<1e-12
+        assert abs(c.ra.r-long[i])<1e-12
+        assert abs(c.decerr.r-laterr[i])<1e-12
+        assert abs(c.raerr.r-longerr[i])<1e-12
+
+        c = FK5Coordinates(ra,dec)
+        c.matrixRotate(mats[0])
+        assert abs(c.dec.r-lat1[i])<1e-12
+        assert abs(c.ra.r-long1[i])<1e-12
+
+    #rotations about the pole should leave the errors unchanged
+    lat,long,laterr,longerr = LatLongCoordinates.matrixRotateArrays(
+                        rotation_matrix(30,'z'),radians(decs),radians(ras),
+                        radians(decerrs),radians(raerrs))
+    assert abs(laterr-radians(decerrs)).max()<1e-12
+    assert abs(longerr-radians(raerrs)).max()<1e-12
+
+    #only one of the errors set - the other is propagated as 0
+    lat,long,laterr,longerr = LatLongCoordinates.matrixRotateArrays(mats[1],
+                        radians(decs[1]),radians(ras[1]),None,radians(raerrs[1]))
+    c = FK5Coordinates(ras[1],decs[1])
+    c.raerr = raerrs[1]
+    res = c.matrixRotate(mats[1])
+    assert len(res) == 4
+    assert abs(c.decerr.r-laterr)<1e-12 and c.decerr.r > 0
+    assert abs(c.raerr.r-longerr)<1e-12
+
+def test_transform_plans():
+    """
+    Test that transform paths are found without networkx and are updated when
+    transforms are registered or removed.
+    """
+    import sys
+    import numpy as np
+    from astropysics.coords.coordsys import CoordinateSystem,ICRSCoordinates,\
+                            GCRSCoordinates,CIRSCoordinates,ITRSCoordinates,\
+                            FK5Coordinates,GalacticCoordinates,LatLongCoordinates
+
+    nxmod = sys.modules.get('networkx')
+    sys.modules['networkx'] = None #makes any import of networkx fail
+    try:
+        CoordinateSystem._invalidateTransformCache()
+        gal = ICRSCoordinates(10,20).convert(GalacticCoordinates)
+        path = CoordinateSystem.getTransformPath(GCRSCoordinates,ITRSCoordinates)
+    finally:
+        if nxmod is None:
+            del sys.modules['networkx']
+        else:
+            sys.modules['networkx'] = nxmod
+
+    #the Equinox system has a larger transweight, so CIRS should be used
+    assert path == [GCRSCoordinates,CIRSCoordinates,ITRSCoordinates],path
+    assert abs(gal.l.d-ICRSCoordinates(10,20).convert(FK5Coordinates).convert(GalacticCoordinates).l.d)<1e-10
+
+    class PlanTestCoordinates(LatLongCoordinates):
+        pass
+
+    try:
+        CoordinateSystem.registerTransform(PlanTestCoordinates,
+                FK5Coordinates,lambda c:np.eye(3).view(np.matrix),'smatrix')
+        res = PlanTestCoordinates(10,20).convert(GalacticCoordinates)
+        fk5gal = FK5Coordinates(10,20).convert(GalacticCoordinates)
+        assert abs(res.l.d-fk5gal.l.d)<1e-10
+        assert abs(res.b.d-fk5gal.b.d)<1e-10
+        assert CoordinateSystem.getTransformPath(PlanTestCoordinates,
+                            GalacticCoordinates)[1] is FK5Coordinates
+    finally:
+        CoordinateSystem.delTransform(PlanTestCoordinates,FK5Coordinates)
+
+    try:
+        PlanTestCoordinates(10,20).convert(GalacticCoordinates)
+        assert False,'conversion should fail after transform is removed'
+    except NotImplementedError:
+        pass
+
+def test_convert_cache():
+    """
+    Test the epoch-aware cache of optimized LatLongCoordinates conversions.
+    """
+    from astropysics.coords.coordsys import LatLongCoordinates,FK5Coordinates,\
+                    ICRSCoordinates,CIRSCoordinates,ITRSCoordinates,\
+                    GalacticCoordinates
+
+    cache = LatLongCoordinates.getConvertCache()
+    oldmaxsize = cache.maxsize
+    cache.clear(resetcounts=True)
+    try:
+        for epoch in (2000,2015.5):
+            for tosys in (CIRSCoordinates,ITRSCoordinates,GalacticCoordinates):
+                for ra in (10,100,200):
+                    c = FK5Coordinates(ra,20,epoch=epoch)
+                    copt = c.convert(tosys,optimize=True)
+                    cstd = c.convert(tosys)
+                    assert (copt-cstd).arcsec < 1e-6,'%s %s'%(tosys,epoch)
+                    assert copt.epoch == epoch
+        #one miss for each epoch/system pair, the rest should be hits
+        assert cache.misses == 6,cache.misses
+        assert cache.hits == 12,cache.hits
+
+        #multi-step conversions should carry the epoch along
+        icrs = FK5Coordinates(10,20,epoch=2015).convert(ICRSCoordinates)
+        c1 = FK5Coordinates(10,20,epoch=2015).convert(CIRSCoordinates)
+        c2 = icrs.convert(CIRSCoordinates)
+        assert (c1-c2).arcsec < 1e-6
+
+        cache.maxsize = 2
+        for epoch in (2001,2002,2003):
+            FK5Coordinates(10,20,epoch=epoch).convert(ITRSCoordinates,optimize=True)
+        assert len(cache) == 2
+    finally:
+        cache.maxsize = oldmaxsize
+        cache.clear(resetcounts=True)
+
+def test_array_nutation_precession():
+    """
+    Test that the array versions of the nutation and precession matrices match
+    the scalar versions.
+    """
+    import numpy as np
+    from astropysics.coords.coordsys import _nutation_matrix,\
+                    _nutation_components2000B,_precession_matrix_J2000_Capitaine
+    from astropysics.obstools import epoch_to_jd
+
+    epochs = np.linspace(1900,2100,11)
+    N = _nutation_matrix(epochs)
+    P = _precession_matrix_J2000_Capitaine(epochs)
+    assert N.shape == P.shape == (11,3,3)
+    for i,ep in enumerate(epochs):
+        assert np.allclose(N[i],_nutation_matrix(ep),rtol=0,atol=1e-15)
+        assert np.allclose(P[i],_precession_matrix_J2000_Capitaine(ep),
+                           rtol=0,atol=1e-15)
+
+    jds = epoch_to_jd(epochs).reshape((11,1))
+    eps,dpsi,deps = _nutation_components2000B(jds,False)
+    assert eps.shape == dpsi.shape == deps.shape == (11,1)
+    assert np.allclose(dpsi[3,0],_nutation_components2000B(jds[3,0],False)[1],
+                       rtol=1e-12,atol=0)
+    assert np.isscalar(_nutation_components2000B(2000.)[1])
+
+def test_nutation_2000A():
+    """
+    Test the IAU 2006/2000A nutation model against SOFA and its truncation.
+    """
+    import numpy as np
+    from astropysics.coords.coordsys import _nutation_components20062000A,\
+                    _nutation_2000A_benchmark,_nutation_matrix
+
+    #SOFA test case for nut06a
+    eps,dpsi,deps = _nutation_components20062000A(2400000.5+53736.0,False)
+    assert abs(dpsi - -0.9630912025820308797e-5) < 1e-13
+    assert abs(deps - 0.4063238496887249798e-4) < 1e-13
+
+    epochs = np.linspace(1950,2050,5)
+    eps,dpsi,deps = _nutation_components20062000A(epochs)
+    assert dpsi.shape == deps.shape == (5,)
+    assert abs(dpsi[1] - _nutation_components20062000A(epochs[1])[1]) < 1e-15
+
+    res = _nutation_2000A_benchmark((0,0.01,1),epochs,1)
+    nterms = [r[1] for r in res]
+    errs = [r[3] for r in res]
+    assert nterms[0] == 1365 and nterms[0] > nterms[1] > nterms[2]
+    assert errs[0] == 0 and errs[1] < 1 and errs[1] < errs[2]
+
+    N = _nutation_matrix(epochs,'2006/2000A',0.01)
+    assert np.allclose(N,_nutation_matrix(epochs),rtol=0,atol=1e-8)
+
+def test_nutation_model_setting():
+    """
+    Test selecting the nutation model used by transforms and sidereal time.
+    """
+    from astropysics.coords import set_nutation_model,get_nutation_model,                    greenwich_sidereal_time,ICRSCoordinates,CIRSCoordinates
+    from astropysics.coords.coordsys import _nutation_matrix
+
+    assert get_nutation_model() == ('2000B',0)
+    c = ICRSCoordinates(10,20)
+    c.epoch = 2012.2
+    cirsb = c.convert(CIRSCoordinates,optimize=True)
+    gastb = greenwich_sidereal_time(2456007.0)
+    try:
+        set_nutation_model('2006/2000A')
+        assert get_nutation_model() == ('2006/2000A',0)
+        assert abs(_nutation_matrix(2012.2) -
+                   _nutation_matrix(2012.2,'2006/2000A')).max() == 0
+        #cached matrices must not be reused
+        cirsa = c.convert(CIRSCoordinates,optimize=True)
+        sep = (cirsa - cirsb).arcsec
+        assert 0 < sep < 0.005,sep
+        dgast = (greenwich_sidereal_time(2456007.0) - gastb)*3600
+        assert 0 < abs(dgast) < 1e-3,dgast
+    finally:
+        set_nutation_model()
+    assert abs((c.convert(CIRSCoordinates,optimize=True) - cirsb).arcsec) < 1e-9
+    try:
+        set_nutation_model('1980')
+        assert False,'invalid model accepted'
+    except ValueError:
+        pass
+    assert get_nutation_model() == ('2000B',0)
+
+def test_package_data_cache():
+    """
+    Test that cached binary package data match the parsed text files.
+    """
+    import numpy as np
+    from astropysics.utils.io import get_package_data_arrays
+    from astropysics.coords.coordsys import _parse_CIO_locator_data,\
+                    _get_nutation_data
+    from astropysics.coords.ephems import _parse_earth_series
+
+    for fn,parser in (('iau00_cio_locator.tab',_parse_CIO_locator_data),
+                      ('earth_series.tab',_parse_earth_series)):
+        parsed = get_package_data_arrays(fn,parser,cache=False)
+        get_package_data_arrays(fn,parser,cache=True) #ensure cache exists
+        cached = get_package_data_arrays(fn,parser,cache=True)
+        assert sorted(parsed.keys()) == sorted(cached.keys())
+        for k in parsed:
+            assert isinstance(cached[k],np.memmap),k
+            assert np.all(parsed[k] == cached[k]),k
+
+    #a different parser does not reuse the cache
+    def parser(datastr):
+        return {'n':np.array([len(datastr)])}
+    res = get_package_data_arrays('earth_series.tab',parser,cache=True)
+    assert res.keys() == ['n']
+    assert get_package_data_arrays('earth_series.tab',parser,cache=True)['n'] == res['n']
+
+    nut = _get_nutation_data('00b')
+    assert nut is _get_nutation_data('00b')
+    assert len(nut.nl) == 77
+
+def test_match_coords():
+    """
+    Test the kd-tree based match_coords against a brute-force separation matrix.
+    """
+    import numpy as np
+    from astropysics.coords import match_coords
+
+    rng = np.random.RandomState(12345)
+    a1,b1 = rng.rand(2,300)*10
+    a2,b2 = rng.rand(2,200)*10
+    eps = 0.3
+    matches = np.hypot(a1[:,np.newaxis]-a2,b1[:,np.newaxis]-b2) <= eps
+
+    m1,m2 = match_coords(a1,b1,a2,b2,eps,'mask')
+    assert np.all(m1 == matches.any(axis=1))
+    assert np.all(m2 == matches.any(axis=0))
+
+    i1,i2 = match_coords(a1,b1,a2,b2,eps,'index')
+    w1,w2 = np.where(matches)
+    assert np.all(i1 == w1) and np.all(i2 == w2)
+
+    n1,n2 = match_coords(a1,b1,a2,b2,eps,'count')
+    assert (n1,n2) == (matches.any(axis=1).sum(),matches.any(axis=0).sum())
+
+    M = match_coords(a1,b1,a2,b2,eps,'match2D')
+    assert M.shape == (200,300)
+    assert np.all(M.toarray() == matches.T)
+
+    try:
+        match_coords(a1,b1,a2,b2,eps,'maskexcept')
+        assert False,'maskexcept should have raised a ValueError'
+    except ValueError:
+        pass
+
+def test_match_sky_coords():
+    """
+    Test great-circle sky matching against brute-force separations.
+    """
+    import numpy as np
+    from astropysics.coords import match_sky_coords
+
+    rng = np.random.RandomState(54321)
+    l1 = rng.rand(400)*360
+    b1 = np.degrees(np.arcsin(rng.rand(400)*2-1))
+    l2 = rng.rand(500)*360
+    b2 = np.degrees(np.arcsin(rng.rand(500)*2-1))
+
+    rl1,rb1,rl2,rb2 = [np.radians(a) for a in (l1,b1,l2,b2)]
+    cossep = np.sin(rb1)[:,np.newaxis]*np.sin(rb2) + \
+             np.cos(rb1)[:,np.newaxis]*np.cos(rb2)*\
+             np.cos(rl1[:,np.newaxis]-rl2)
+    seps = np.degrees(np.arccos(np.clip(cossep,-1,1)))
+
+    i1,i2,sep = match_sky_coords(l1,b1,l2,b2,5)
+    w1,w2 = np.where(seps<=5)
+    assert sorted(zip(i1,i2)) == sorted(zip(w1,w2))
+    assert np.allclose(sep,seps[i1,i2],rtol=0,atol=1e-9)
+
+    chunks = list(match_sky_coords(l1,b1,l2,b2,5,chunksize=100))
+    assert len(chunks) == 4
+    assert np.all(np.concatenate([c[0] for c in chunks]) == i1)
+
+    i1,i2,sep = match_sky_coords(l1,b1,l2,b2,None,'nearest',n=2)
+    assert np.all(i2[::2] == np.argmin(seps,axis=1))
+    assert np.all(i2[1::2] == np.argsort(seps,axis=1)[:,1])
+
+    i1,i2,sep = match_sky_coords(l1,b1,l2,b2,5,'unique')
+    assert np.unique(i1).size == i1.size and np.unique(i2).size == i2.size
+    #the closest pair overall must always be included
+    best = np.unravel_index(np.argmin(seps),seps.shape)
+    assert (i1[0],i2[0]) == best
+    #same as brute-force greedy assignment
+    w1,w2 = np.where(seps<=5)
+    used1,used2,greedy = set(),set(),[]
+    for k in np.argsort(seps[w1,w2],kind='mergesort'):
+        if w1[k] not in used1 and w2[k] not in used2:
+            used1.add(w1[k])
+            used2.add(w2[k])
+            greedy.append((w1[k],w2[k]))
+    assert zip(i1,i2) == greedy
+    chunks = list(match_sky_coords(l1,b1,l2,b2,5,'unique',chunksize=100))
+    assert len(chunks) == 1 and zip(*chunks[0][:2]) == greedy
+
+    #dense field where every pair is a candidate
+    i1,i2,sep = match_sky_coords(np.linspace(0,.01,300),np.zeros(300),
+                                 np.linspace(0,.01,300),np.zeros(300),1,
+                                 'unique')
+    assert i1.size == 300 and np.all(i1 == i2) and np.all(sep < 1e-9)
+
+    #matches across the poles and longitude wrap
+    i1,i2,sep = match_sky_coords([359.9995,10],[0,89.9999],[0.0005,190],
+                                 [0,89.9999],0.002)
+    assert list(i1) == [0,1] and list(i2) == [0,1]
+
+def test_match_nearest_objects():
+    """
+    Test match_nearest_coords with coordinate objects and a prebuilt tree.
+    """
+    import numpy as np
+    from astropysics.coords import ICRSCoordinates,GalacticCoordinates,\
+                    match_nearest_coords,CoordinateMatchTree,\
+                    objects_to_coordinate_arrays
+
+    rng = np.random.RandomState(2468)
+    ra1,dec1 = rng.rand(2,20)*10
+    ra2,dec2 = rng.rand(2,100)*10
+    objs1 = [ICRSCoordinates(r,d) for r,d in zip(ra1,dec1)]
+    objs2 = [ICRSCoordinates(r,d) for r,d in zip(ra2,dec2)]
+
+    seps,inds = match_nearest_coords((ra1,dec1),(ra2,dec2))
+    oseps,oinds = match_nearest_coords(objs1,objs2)
+    assert np.all(oinds == inds) and np.allclose(oseps,seps)
+
+    tree = CoordinateMatchTree(objs2)
+    assert len(tree) == 100
+    tseps,tinds = match_nearest_coords(objs1,tree)
+    assert np.all(tinds == inds)
+    aseps,ainds = match_nearest_coords(ICRSCoordinates(ra1,dec1),tree)
+    assert np.all(ainds == inds)
+
+    i1,i2 = tree.queryRadius((ra1,dec1),0.5)
+    d = np.hypot(ra1[i1]-ra2[i2],dec1[i1]-dec2[i2])
+    assert np.all(d <= 0.5)
+    assert i1.size == np.sum(np.hypot(ra1[:,np.newaxis]-ra2,
+                                      dec1[:,np.newaxis]-dec2) <= 0.5)
+
+    arr = objects_to_coordinate_arrays(objs1[:3]+[GalacticCoordinates(1,2)])
+    assert np.allclose(arr[:,:3],(ra1[:3],dec1[:3]))
+    assert np.allclose(arr[:,3],(2,1))
+    assert np.allclose(objects_to_coordinate_arrays(objs1,'dec,ra'),(dec1,ra1))
+
+def test_cosmo_dist_table():
+    """
+    Test the interpolated cosmological distance tables against direct
+    integration.
+    """
+    import numpy as np
+    from astropysics.constants import choose_cosmology,get_cosmology
+    from astropysics.coords import cosmo_z_to_dist,get_cosmology_distance_table
+    from astropysics.coords import funcs
+
+    oldcosmo = get_cosmology()
+    try:
+        choose_cosmology('wmap7baoh0')
+        z = np.array([0,1e-4,0.03,0.5,1,3,10,100])
+        for disttype in range(5):
+            dtab = cosmo_z_to_dist(z[1:],disttype=disttype)
+            dint = cosmo_z_to_dist(z[1:],disttype=disttype,
+                                   intkwargs={'epsrel':1e-12,'epsabs':0})
+            assert np.allclose(dtab,dint,rtol=1e-9,atol=0),disttype
+        assert cosmo_z_to_dist(z)[0] == 0
+        #outside the table, the integral is computed directly
+        assert np.allclose(cosmo_z_to_dist([1,2e4]),
+                           (cosmo_z_to_dist(1),cosmo_z_to_dist(2e4)))
+
+        table = get_cosmology_distance_table()
+        assert table.maxerr < 1e-10
+        assert table is get_cosmology_distance_table()
+        assert np.isnan(table.integrals(1/(1+2e4)))
+
+        choose_cosmology('wmap5')
+        assert len(funcs._cosmo_dist_tables) == 0
+        assert get_cosmology_distance_table() is not table
+    finally:
+        choose_cosmology(oldcosmo)
+
+def test_cosmo_flat_lcdm():
+    """
+    Test the closed-form distances for flat LCDM cosmologies against direct
+    integration.
+    """
+    import numpy as np
+    from astropysics.constants import choose_cosmology,get_cosmology
+    from astropysics.constants import FRWCosmology
+    from astropysics.coords import cosmo_z_to_dist,get_cosmology_distance_table
+
+    oldcosmo = get_cosmology()
+    try:
+        cosmo = choose_cosmology('wmap7baoh0')
+        assert cosmo.isFlatLCDM
+        z = np.array([-0.05,1e-6,1e-3,0.03,0.09,0.11,0.5,1,3,10,100,1e4])
+        for disttype in range(5):
+            #no distance modulus for negative distances
+            zi = z[1:] if disttype == 4 else z
+            for inttol in (1e-6,1e-9):
+                dcf = cosmo_z_to_dist(zi,disttype=disttype,inttol=inttol)
+                dint = cosmo_z_to_dist(zi,disttype=disttype,inttol=inttol,
+                                       intkwargs={'epsrel':1e-13,'epsabs':0})
+                assert np.allclose(dcf,dint,rtol=inttol,atol=0),disttype
+        assert cosmo_z_to_dist(0) == 0
+        assert np.isscalar(cosmo_z_to_dist(1))
+
+        table = get_cosmology_distance_table()
+        for lookback in (False,True):
+            a = 1/(1+z[1:-1])
+            assert np.allclose(table.integrals(a,lookback),
+                               cosmo.distanceIntegral(z[1:-1],lookback),
+                               rtol=1e-9,atol=0)
+
+        cosmo = FRWCosmology()
+        cosmo.omegaL = 0.6
+        assert not cosmo.isFlatLCDM
+        choose_cosmology(cosmo)
+        c = 2.99792458e5
+        for disttype,lookback in ((0,False),(3,True)):
+            d = cosmo_z_to_dist(z[1:],disttype=disttype)
+            dint = c*cosmo.distanceIntegral(z[1:],lookback)
+            if lookback:
+                dint *= 3.26163626e-3
+            assert np.allclose(d,dint,rtol=1e-8,atol=0)
+    finally:
+        choose_cosmology(oldcosmo)
+
+def test_cosmo_dist_to_z():
+    """
+    Test the vectorized inversion of cosmological distances.
+    """
+    import numpy as np
+    from astropysics.constants import choose_cosmology,get_cosmology
+    from astropysics.coords import cosmo_z_to_dist,cosmo_dist_to_z
+
+    oldcosmo = get_cosmology()
+    try:
+        choose_cosmology('wmap7baoh0')
+        z = np.array([[0.01,0.1],[0.7,3]])
+        for disttype in ('comoving','luminosity','lookback','distmod'):
+            d = cosmo_z_to_dist(z,disttype=disttype)
+            zinv = cosmo_dist_to_z(d,disttype=disttype)
+            assert zinv.shape == z.shape
+            assert np.allclose(zinv,z,rtol=0,atol=1e-6),disttype
+
+        #angular diameter distance turnover
+        zturn = cosmo_dist_to_z(None,disttype='angular')
+        assert 1.5 < zturn < 1.8
+        zlow = np.array([0.2,1.0])
+        zhigh = np.array([2.5,6.0])
+        assert np.allclose(cosmo_dist_to_z(cosmo_z_to_dist(zlow,disttype=2),
+                                           disttype=2),zlow,atol=1e-6)
+        assert np.allclose(cosmo_dist_to_z(cosmo_z_to_dist(zhigh,disttype=2),
+                                           disttype=2,highz=True),zhigh,atol=1e-6)
+        try:
+            cosmo_dist_to_z(2*cosmo_z_to_dist(zturn,disttype=2),disttype=2)
+            assert False,'impossible angular distance should raise ValueError'
+        except ValueError:
+            pass
+
+        z,zu,zl = cosmo_dist_to_z(1000,50)
+        assert np.allclose(cosmo_z_to_dist([z,z+zu,z-zl]),(1000,1050,950))
+    finally:
+        choose_cosmology(oldcosmo)
@@ -5486,9 +5486,8 @@ def _apx_compare(jplstr,objname,plotdiff=False):
     x,y,z = pos.T
     r = (x**2+y**2+z**2)**0.5
     
-    xapx = np.array([c.x for c in m(jds)])
-    yapx = np.array([c.y for c in m(jds)])
-    zapx = np.array([c.z for c in m(jds)])
+    capx = m(jds)
+    xapx,yapx,zapx = capx.x,capx.y,capx.z
     rapx = (xapx**2+yapx**2+zapx**2)**0.5
     
     if plotdiff:
@@ -5593,4 +5592,249 @@ def test_radec():
 #        assert (ec.ra-hc.ra).arcsec<140,'RA diff too large for Jupiter:%g arcsec'%(ec.ra-hc.ra).arcsec
 #        assert (ec.dec-hc.dec).arcsec<60,'Dec diff too large for Jupiter:%g arcsec'%(ec.ra-hc.ra).arcsec
 
-    return dict(dras),dict(ddecs)
\ No newline at end of file
+    return dict(dras),dict(ddecs)
+
+
+def test_kepler_vectorized():
+    """
+    Test the vectorized Kepler equation solver and array ephemerides against
+    the one-jd-at-a-time computation.
+    """
+    M = np.linspace(-10,10,201)
+    e = np.array([0,.01,.2,.5,.8,.9,.99])[:,np.newaxis]
+    E = ephems.solve_kepler_equation(M,e,1e-14)
+    assert E.shape == (7,201)
+    Mw = (M + np.pi)%(2*np.pi) - np.pi
+    assert np.max(np.abs(E - e*np.sin(E) - Mw)) < 1e-13
+    assert isinstance(ephems.solve_kepler_equation(1,.5),float)
+    
+    jds = np.linspace(2451545,2451545+700,8)
+    for objname in ('Mars','Moon'):
+        m = ephems.get_solar_system_ephems(objname)
+        c = m._getCoordArrays(jds)
+        assert c.x.shape == jds.shape
+        for i,jd in enumerate(jds):
+            m.jd = jd
+            ci = m()
+            assert np.allclose((c.x[i],c.y[i],c.z[i]),(ci.x,ci.y,ci.z),
+                               rtol=1e-12,atol=0)
+            assert np.allclose(c.epoch[i],ci.epoch)
+        
+    #a stack of orbits at many times
+    a = np.array([1,2.5,3])[:,np.newaxis]
+    e = np.array([.1,.3,.6])[:,np.newaxis]
+    M = np.array([0,90,200])[:,np.newaxis] + np.linspace(0,360,5)
+    x,y,z = ephems.keplerian_positions(a,e,10,20,30,M)
+    assert x.shape == (3,5)
+    r = (x*x+y*y+z*z)**0.5
+    for j in range(3):
+        xj,yj,zj = ephems.keplerian_positions(a[j,0],e[j,0],10,20,30,M[j])
+        assert np.allclose((x[j],y[j],z[j]),(xj,yj,zj))
+    assert np.all(r >= a*(1-e)-1e-12) and np.all(r <= a*(1+e)+1e-12)
+
+    #the default tolerance must converge for high-eccentricity orbits
+    ko = ephems.KeplerianObject(name='highe',a=(3,),e=(.9,),i=(10,),
+                                Lan=(20,),ap=(30,),M=(5,35999.))
+    jds = np.linspace(2451545,2451545+3650,37)
+    for jd in jds[::6]:
+        ko.jd = jd
+        Er = np.radians(ko.E)
+        assert abs(Er - .9*np.sin(Er) - np.radians(ko.M)) % (2*np.pi) < 1e-8
+    c = ko._getCoordArrays(jds)
+    x,y,z = ephems.keplerian_positions(3,.9,10,20,30,ko._computeM((jds-2451545)/36525.),
+                                       1e-14)
+    assert np.allclose((c.x,c.y,c.z),(x,y,z),rtol=0,atol=1e-7)
+
+def test_call_arrays():
+    """
+    Test that calling ephemerides with arrays of jds uses the array protocol if
+    available, and falls back to a list of coordinates otherwise.
+    """
+    from warnings import catch_warnings,simplefilter
+    from astropysics.coords import GCRSCoordinates
+    
+    jds = np.array([[2455625.5,2455626.5,2455627.5]])
+    m = ephems.get_solar_system_ephems('Mars')
+    jd0 = m.jd
+    c = m(jds,GCRSCoordinates)
+    assert isinstance(c,GCRSCoordinates)
+    assert c.ra.d.shape == jds.shape
+    assert m.jd == jd0
+    for i,jd in enumerate(jds[0]):
+        ci = m(jd,GCRSCoordinates)
+        assert np.allclose((c.ra.d[0,i],c.dec.d[0,i]),(ci.ra.d,ci.dec.d))
+    assert np.allclose(m(list(jds[0])).x,m(jds[0]).x)
+    
+    with catch_warnings(record=True) as w:
+        simplefilter('always')
+        m(np.linspace(2451545+60*365,2451545+61*365,10))
+    assert len(w) == 1
+    assert issubclass(w[0].category,ephems.EphemerisAccuracyWarning)
+    
+    class Fixed(ephems.EphemerisObject):
+        def _getCoordObj(self):
+            from astropysics.coords import RectangularCoordinates
+            return RectangularCoordinates(self.jd,0,0)
+    f = Fixed('fixed')
+    res = f(jds[0])
+    assert isinstance(res,list) and len(res) == 3
+    assert [c.x for c in res] == list(jds[0])
+
+def test_earth_pos_vel_arrays():
+    """
+    Test that the Earth position/velocity series give the same results for
+    arrays of jds as one at a time.
+    """
+    from warnings import catch_warnings,simplefilter
+    
+    jds = np.linspace(2415021,2488069,2500).reshape(50,50)
+    for bary in (False,True):
+        p,v = ephems.earth_pos_vel(jds,bary)
+        assert p.shape == v.shape == (3,50,50)
+        for i,j in ((0,0),(10,31),(49,49)):
+            pi,vi = ephems.earth_pos_vel(jds[i,j],bary)
+            assert pi.shape == vi.shape == (3,)
+            assert np.allclose(p[:,i,j],pi,rtol=0,atol=1e-13)
+            assert np.allclose(v[:,i,j],vi,rtol=0,atol=1e-13)
+            
+    with catch_warnings(record=True) as w:
+        simplefilter('always')
+        ephems.earth_pos_vel(np.linspace(2380000,2400000,100))
+    assert len(w) == 1
+    assert issubclass(w[0].category,ephems.EphemerisAccuracyWarning)
+    
+    e = ephems.get_solar_system_ephems('Earth')
+    c = e(jds[0])
+    assert np.allclose((c.x,c.y,c.z),ephems.earth_pos_vel(jds[0],True)[0])
+
+def test_chebyshev_ephems():
+    """
+    Test Chebyshev-compressed ephemerides against the models they are fit to.
+    """
+    import os,tempfile
+    
+    jdrange = (2455197.5,2455197.5+200)
+    fd,fn = tempfile.mkstemp(suffix='.npz')
+    os.close(fd)
+    try:
+        ephems.build_solar_system_ephem_cache(jdrange,fn,('Moon','Mars'))
+        cheb = ephems.load_solar_system_ephem_cache(fn)
+    finally:
+        os.remove(fn)
+    assert sorted(cheb.keys()) == ['Mars','Moon']
+    
+    jds = np.linspace(jdrange[0],jdrange[1],1001)
+    for n,c in cheb.items():
+        m = ephems.get_solar_system_ephems(n)
+        assert c.maxerr < 1e-9
+        cc,cm = c(jds),m(jds)
+        assert cc.__class__ is cm.__class__
+        assert cc.unit == cm.unit
+        assert np.allclose(cc.epoch,cm.epoch)
+        err = ((cc.x-cm.x)**2+(cc.y-cm.y)**2+(cc.z-cm.z)**2)**0.5
+        assert np.max(err) <= c.maxerr*1.01
+        
+        v = c.getVelocity(jds[1:-1])
+        dt = 1e-3
+        xyz1,xyz2 = m(jds[1:-1]-dt),m(jds[1:-1]+dt)
+        vfd = np.array([xyz2.x-xyz1.x,xyz2.y-xyz1.y,xyz2.z-xyz1.z])/(2*dt)
+        assert np.allclose(v,vfd,rtol=0,atol=1e-8)
+        
+        try:
+            c(c.validjdrange[1]+1)
+            assert False,'jd outside of Chebyshev range did not raise ValueError'
+        except ValueError:
+            pass
+
+def test_moon_arrays():
+    """
+    Test the Moon phase and Moon-target separations for arrays of times.
+    """
+    from astropysics.coords import ICRSCoordinates,GCRSCoordinates
+    
+    jds = np.linspace(2451545,2451545+60,13)
+    m = ephems.Moon()
+    phases = m.getPhase(jds=jds)
+    assert phases.shape == jds.shape
+    assert np.all((phases >= 0) & (phases <= 1))
+    for jd,phase in zip(jds,phases):
+        m.jd = jd
+        assert abs(m.getPhase() - phase) < 1e-12
+        
+    ra = np.array([10.,200.,300.])
+    dec = np.array([20.,-30.,85.])
+    sep,illum = ephems.moon_separation_illumination(ICRSCoordinates(ra,dec),jds)
+    assert sep.shape == (3,len(jds))
+    assert np.allclose(illum,phases)
+    for i,jd in enumerate(jds):
+        mc = m(jd,GCRSCoordinates)
+        mra,mdec = mc.ra.r,mc.dec.r
+        cossep = np.sin(np.radians(dec))*np.sin(mdec) + \
+                 np.cos(np.radians(dec))*np.cos(mdec)*np.cos(np.radians(ra)-mra)
+        assert np.allclose(sep[:,i],np.degrees(np.arccos(cossep)),atol=1e-6)
+    
+    sep1,illum1 = ephems.moon_separation_illumination((ra,dec),jds[0])
+    assert sep1.shape == (3,)
+    assert np.allclose(sep1,sep[:,0]) and np.allclose(illum1,illum[0])
+
+def test_propagate_proper_motions():
+    """
+    Test catalog proper motion propagation, including perspective effects.
+    """
+    from astropysics.coords import ICRSCoordinates
+    
+    #Barnard's star over a century: the proper motion and parallax grow by 
+    #~2*vr*dt and vr*dt for vr = rv*parallax
+    ra0,dec0 = 269.45207511,4.69339088
+    pmra,pmdec,px,rv = -0.79858,10.32812,0.54901,-110.51
+    c,pa,pd,pxn,rvn = ephems.propagate_proper_motions(ra0,dec0,pmra,pmdec,
+                            2100,2000,px,rv,fullout=True)
+    assert isinstance(c,ICRSCoordinates)
+    assert c.epoch == 2100
+    vrdt = -rv*px*100*1.0227121650537077e-6
+    assert abs(pd/pmdec - 1 - 2*vrdt) < 1e-4
+    assert abs(pxn/px - 1 - vrdt) < 1e-4
+    #perspective acceleration adds ~6 arcsec to the change in Dec
+    assert abs((c.dec.d - dec0)*3600 - pmdec*100*(1+vrdt)) < 0.1
+    #and propagating back gives the starting values
+    c2,pa2,pd2,px2,rv2 = ephems.propagate_proper_motions(c.ra.d,c.dec.d,pa,pd,
+                            2000,2100,pxn,rvn,fullout=True)
+    assert abs(c2.ra.d - ra0) < 1e-10 and abs(c2.dec.d - dec0) < 1e-10
+    assert np.allclose((pa2,pd2,px2,rv2),(pmra,pmdec,px,rv),rtol=1e-10)
+    
+    #a catalog at several epochs matches star-by-star propagation
+    rng = np.random.RandomState(42)
+    ra = rng.rand(50)*360
+    dec = np.degrees(np.arcsin(rng.rand(50)*2-1))
+    pmra,pmdec = rng.randn(2,50)*0.1
+    px = rng.rand(50)*0.1+0.001
+    rv = rng.randn(50)*50
+    epochs = np.array([1990,2010.5,2050])
+    cat = ephems.propagate_proper_motions(ra[:,np.newaxis],dec[:,np.newaxis],
+                    pmra[:,np.newaxis],pmdec[:,np.newaxis],epochs,2000,
+                    px[:,np.newaxis],rv[:,np.newaxis])
+    assert cat.ra.d.shape == (50,3)
+    assert np.all(cat.epoch == epochs)
+    for i in (0,17,49):
+        for j,ep in enumerate(epochs):
+            ci = ephems.propagate_proper_motions(ra[i],dec[i],pmra[i],pmdec[i],
+                                                 ep,2000,px[i],rv[i])
+            assert abs(ci.ra.d - cat.ra.d[i,j]) < 1e-9
+            assert abs(ci.dec.d - cat.dec.d[i,j]) < 1e-9
+            assert abs(ci.distancepc[0] - cat.distancepc[0][i,j]) < 1e-9
+    
+    #without parallaxes, motion is along great circles with no distances
+    cat = ephems.propagate_proper_motions(ra,dec,pmra,pmdec,2010)
+    assert cat.distancepc is None
+    assert np.allclose(cat.dec.d,dec+pmdec*10/3600,atol=1e-6)
+    
+    #ProperMotionObject arrays match the one-jd-at-a-time values
+    pmo = ephems.ProperMotionObject('star',ra0,dec0,1,2,distpc0=10,rv=30)
+    jds = np.array([2451545.,2460000,2470000])
+    c = pmo(jds)
+    assert c.ra.d.shape == (3,)
+    for i,jd in enumerate(jds):
+        pmo.jd = jd
+        ci = pmo()
+        assert np.allclose((c.ra.d[i],c.dec.d[i],c.distancepc[0][i]),
+                           (ci.ra.d,ci.dec.d,ci.distancepc[0]))
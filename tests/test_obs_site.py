@@ -88,6 +88,47 @@ class TestLocalToSiderealConversions(unittest.TestCase):
         delta = max(ct, ve_p12) - min(ct, ve_p12)
         self.assertTrue(abs(delta.seconds) < 30)
 
+    def test_local_sidereal_time_arrays(self):
+        import numpy as np
+        jd0 = astropysics.obstools.calendar_to_jd(vernal_equinox_2012)
+        jds = jd0 + np.linspace(0, 2, 7)
+
+        lsts = self.site.localSiderialTime(jds)
+        self.assertEqual(lsts.shape, jds.shape)
+        for jd, lst in zip(jds, lsts):
+            self.assertAlmostEqual(self.site.localSiderialTime(jd), lst, 12)
+        self.assertAlmostEqual(lsts[0], greenwish_lst_at_ve)
+
+        self.assertTrue(np.allclose(self.site.localSiderialTime(list(jds)), lsts))
+        dts = [vernal_equinox_2012, vernal_equinox_2012_p12h]
+        self.assertTrue(np.allclose(self.site.localSiderialTime(dts),
+                                    [greenwish_lst_at_ve, greenwish_lst_at_ve_p12h]))
+
+        strs = self.site.localSiderialTime(jds, returntype='string')
+        self.assertEqual(len(strs), len(jds))
+        self.assertEqual(strs[0], self.site.localSiderialTime(jds[0],
+                                                              returntype='string'))
+        times = self.site.localSiderialTime(jds, returntype='datetime')
+        self.assertEqual(times[0].hour, 17)
+
+    def test_local_time_arrays(self):
+        import numpy as np
+        lsts = np.array([1, 5, greenwish_lst_at_ve, 23.5])
+        date = vernal_equinox_2012.date()
+
+        hrs = self.site.localTime(lsts, date)
+        for lst, hr in zip(lsts, hrs):
+            self.assertAlmostEqual(self.site.localTime(lst, date), hr, 12)
+
+        jds = self.site.localTime(lsts, date, returntype='jd')
+        self.assertTrue(np.allclose(self.site.localSiderialTime(jds), lsts,
+                                    rtol=0, atol=1e-5))
+        self.assertTrue(np.allclose((jds - np.floor(jds - .5) - .5)*24, hrs))
+
+        dts = self.site.localTime(lsts, date, returntype='datetime', utc=True)
+        ve = vernal_equinox_2012
+        self.assertTrue(abs(dts[2] - ve) < datetime.timedelta(seconds=30))
+
 
 class TestRiseSetTransit(unittest.TestCase):
     def setUp(self):
@@ -299,3 +340,362 @@ class TestOnSky(unittest.TestCase):
                                    vernal_equinox_2012,
                                       )
         self.assertFalse(on_sky)
+
+
+class TestFindEvents(unittest.TestCase):
+    def setUp(self):
+        self.site = greenwich()
+        self.jd0 = astropysics.obstools.calendar_to_jd(vernal_equinox_2012)
+
+    def test_fixed_targets_match_scalar(self):
+        import numpy as np
+        pos = (equatorial_transiting_at_ve,
+               equatorial_transiting_at_ve_p12hr,
+               equatorial_transiting_at_ve_p13hr)
+        rise, sets, transit = self.site.findEvents(pos,
+                                                   (self.jd0 - .75, self.jd0 + 1))
+        self.assertEqual(rise.shape, (3,))
+
+        for i, p in enumerate(pos):
+            r, s, t = self.site.riseSetTransit(p, vernal_equinox_2012.date(),
+                                               timeobj=True, utc=True)
+            #differences are dominated by precession from J2000 to 2012, and
+            #the first event in the window may be a sidereal day earlier
+            for jd, dt in ((rise[i], r), (sets[i], s), (transit[i], t)):
+                djd = jd - astropysics.obstools.calendar_to_jd(dt)
+                djd = (djd + .5) % (1/1.0027379) - .5
+                self.assertTrue(abs(djd)*86400 < 120)
+
+        #altitude at rise/set is the threshold, max altitude at transit
+        ras = np.array([p.ra.d for p in pos])
+        decs = np.array([p.dec.d for p in pos])
+        f, n = self.site._eventAltitudeFunc((ras, decs), self.jd0)
+        idx = np.arange(3)
+        for jds in (rise, sets):
+            alts = np.degrees(f(idx, jds)[0])
+            self.assertTrue(np.all(np.abs(alts + .5667) < 3e-3))
+        tjds = transit[:, np.newaxis] + np.array([-30, 0, 30])/86400.
+        talts = f(idx[:, np.newaxis], tjds)[0]
+        self.assertTrue(np.all(talts[:, 1] >= talts[:, 0]))
+        self.assertTrue(np.all(talts[:, 1] >= talts[:, 2]))
+
+    def test_circumpolar_and_never_visible(self):
+        import numpy as np
+        rise, sets, transit = self.site.findEvents(
+            [circumpolar_north_transit_at_ve, never_visible_source],
+            (self.jd0 - .5, self.jd0 + .5))
+        self.assertTrue(np.all(np.isnan(rise)))
+        self.assertTrue(np.all(np.isnan(sets)))
+        self.assertFalse(np.any(np.isnan(transit)))
+
+    def test_twilight(self):
+        import numpy as np
+        jd = np.floor(self.jd0) + .5 #midnight UTC on the VE
+        evening, morning = self.site.twilightTimes((jd, jd + 1))
+        self.assertTrue(np.all(np.diff(evening) > 0))
+        self.assertTrue(np.all(np.diff(morning) < 0))
+
+        #Greenwich sunrise 06:02 and sunset 18:13 UTC on the VE
+        self.assertTrue(abs((morning[0] - jd)*24 - (6 + 2/60.)) < 2/60.)
+        self.assertTrue(abs((evening[0] - jd)*24 - (18 + 13/60.)) < 2/60.)
+
+        r, s, t = self.site.findEvents('Moon', (jd, jd + 1))
+        self.assertTrue(jd < t[0] < jd + 1)
+
+    def test_direction_only_ephemeris(self):
+        import numpy as np
+        from astropysics.coords import ICRSCoordinates
+        from astropysics.coords.ephems import EphemerisObject
+
+        class FixedEphem(EphemerisObject):
+            def __init__(self, ra, dec, distanceau=None):
+                EphemerisObject.__init__(self, 'fixed')
+                self.ra, self.dec, self.distanceau = ra, dec, distanceau
+            def _getCoordObj(self):
+                return self._getCoordArrays(self.jd)
+            def _getCoordArrays(self, jds):
+                c = ICRSCoordinates(np.zeros(np.shape(jds)) + self.ra,
+                                    np.zeros(np.shape(jds)) + self.dec)
+                if self.distanceau is not None:
+                    c.distanceau = np.zeros(np.shape(jds)) + self.distanceau
+                return c
+
+        jdrange = (self.jd0 - .5, self.jd0 + .5)
+        p = equatorial_transiting_at_ve.convert(ICRSCoordinates)
+        fixed = np.array(self.site.findEvents(p, jdrange)).ravel()
+
+        #no distance, so no parallax: the same as a fixed target
+        events = np.array(self.site.findEvents(FixedEphem(p.ra.d, p.dec.d),
+                                               jdrange)).ravel()
+        self.assertTrue(np.all(np.abs(events - fixed)*86400 < .1))
+
+        #at the Moon's distance, parallax delays rise and hastens set
+        events = np.array(self.site.findEvents(FixedEphem(p.ra.d, p.dec.d,
+                                                          .00257), jdrange)).ravel()
+        self.assertTrue(events[0] - fixed[0] > 60/86400.)
+        self.assertTrue(fixed[1] - events[1] > 60/86400.)
+        self.assertTrue(np.abs(events[2] - fixed[2])*86400 < 5)
+
+
+class TestHorizontalGrid(unittest.TestCase):
+    def setUp(self):
+        import numpy as np
+        self.site = greenwich()
+        jd0 = astropysics.obstools.calendar_to_jd(vernal_equinox_2012)
+        self.jds = jd0 + np.linspace(-.5, .5, 25)
+        self.pos = [equatorial_transiting_at_ve,
+                    equatorial_transiting_at_ve_p12hr,
+                    circumpolar_north_transit_at_ve,
+                    never_visible_source]
+
+    def test_matches_equatorialToHorizontal(self):
+        import numpy as np
+        alt, az, airmass, ha = self.site.horizontalGrid(self.pos, self.jds,
+                                                        precess=False)
+        self.assertEqual(alt.shape, (4, 25))
+        lsts = self.site.localSiderialTime(self.jds)
+        #the targets are converted to ICRS, so they differ by the frame bias
+        for i, p in enumerate(self.pos):
+            hcs = self.site.equatorialToHorizontal(p, lsts)
+            self.assertTrue(np.allclose(alt[i], [hc.alt.d for hc in hcs],
+                                        rtol=0, atol=3e-5))
+            self.assertTrue(np.allclose(az[i], [hc.az.d for hc in hcs],
+                                        rtol=0, atol=3e-5))
+
+        #transit at the middle time, ~12 hours from it at the ends
+        self.assertTrue(abs(ha[0, 12]) < .01)
+        self.assertTrue(abs(abs(ha[1, 12]) - 12) < .01)
+        self.assertTrue(np.all(abs(ha[1, [0, -1]]) < .1))
+        self.assertTrue(np.all((ha >= -12) & (ha < 12)))
+
+        self.assertTrue(np.all(np.isnan(airmass[3])))
+        up = alt > 0
+        self.assertTrue(np.all(airmass[up] >= 1))
+        self.assertTrue(np.allclose(airmass[0, 12], 1/np.sin(np.radians(alt[0, 12]))))
+
+    def test_precess_and_refraction(self):
+        import numpy as np
+        from astropysics.obstools import jd_to_epoch
+
+        alt0, az0 = self.site.horizontalGrid(self.pos, self.jds)[:2]
+        alt1 = self.site.horizontalGrid(self.pos, self.jds, precess=False)[0]
+        #precession from J2000 to 2012 moves things by about 10 arcmin
+        self.assertTrue(np.all(np.abs(alt0 - alt1) < .25))
+        self.assertTrue(np.any(np.abs(alt0 - alt1) > .01))
+
+        altr = self.site.horizontalGrid(self.pos, self.jds, refraction=True)[0]
+        dalt = altr - alt0
+        self.assertTrue(np.all(dalt[alt0 > 0] > 0))
+        self.assertTrue(np.all(dalt[alt0 < -1] == 0))
+        #about 0.75' at 52.5 degrees altitude
+        self.assertTrue(abs(dalt[2, 12]*60 - .75) < .05)
+        hcold = self.site.horizontalGrid(self.pos, self.jds, refraction=250)[0]
+        self.assertTrue(np.all((hcold - alt0)[alt0 > 0] > dalt[alt0 > 0]))
+
+        #apparentCoordinates applies the same correction (compared away from
+        #the horizon, where the different precession changes it the most)
+        from astropysics.coords import objects_to_coordinate_arrays
+        high = alt0[0] > 5
+        for refraction in (True, 250):
+            hcs = [objects_to_coordinate_arrays(self.site.apparentCoordinates(
+                        self.pos[0], self.jds, refraction=r))[0]
+                   for r in (False, refraction)]
+            galt = self.site.horizontalGrid(self.pos[:1], self.jds,
+                                            refraction=refraction)[0][0]
+            self.assertTrue(np.allclose((hcs[1] - hcs[0])[high],
+                                        (galt - alt0[0])[high],
+                                        rtol=0, atol=1e-4))
+
+    def test_errors(self):
+        import numpy as np
+        ras = np.array([p.ra.d for p in self.pos])
+        decs = np.array([p.dec.d for p in self.pos])
+        res = self.site.horizontalGrid((ras, decs, ras*0, decs*0), self.jds,
+                                       precess=False, errors=True)
+        self.assertEqual(len(res), 6)
+        self.assertTrue(np.all(res[4] == 0) and np.all(res[5] == 0))
+
+        err = 1/3600.
+        res = self.site.horizontalGrid((ras, decs, ras*0 + err, decs*0 + err),
+                                       self.jds, precess=False, errors=True)
+        alt, az, dalt, daz = res[0], res[1], res[4], res[5]
+        self.assertTrue(np.all(dalt[:2] > 0))
+        #a 1" shift in dec moves the altitude by at most 1" (plus HA terms)
+        self.assertTrue(np.all(dalt < 2*err))
+        alt2 = self.site.horizontalGrid((ras, decs + err), self.jds,
+                                        precess=False)[0]
+        self.assertTrue(np.all(np.abs(alt2 - alt) <= dalt + 1e-9))
+
+
+class TestCalendarArrays(unittest.TestCase):
+    def test_datetime64_round_trip(self):
+        import numpy as np
+        from astropysics.obstools import calendar_to_jd, jd_to_calendar
+
+        dt64 = np.array(['2012-03-20T05:14:00.5', '1999-12-31T23:59:59',
+                         '1858-11-17T00:00', '2050-07-01T12:00'],
+                        dtype='datetime64[us]')
+        jds = calendar_to_jd(dt64)
+        scalarjds = [calendar_to_jd(dt) for dt in dt64.astype(object)]
+        self.assertTrue(np.all(np.abs(jds - scalarjds)*86400 < 1e-4))
+
+        mjds = calendar_to_jd(dt64, mjd=True)
+        self.assertEqual(mjds[2], 0)
+        back = jd_to_calendar(mjds, mjd=True, output='datetime64')
+        self.assertTrue(np.all(back == dt64))
+        back = jd_to_calendar(jds, output='datetime64')
+        self.assertTrue(np.all(np.abs((back - dt64).astype('int64')) < 100))
+
+        #dates are taken as noon, as for datetime.date
+        self.assertEqual(calendar_to_jd(np.datetime64('2010-01-01')),
+                         calendar_to_jd((2010, 1, 1)))
+
+    def test_array_time_zones(self):
+        import numpy as np
+        from astropysics.obstools import calendar_to_jd
+
+        yrs = np.arange(2000, 2010)
+        dts = [datetime.datetime(yr, 7, 1, 3, 30) for yr in yrs]
+        pacific = calendar_to_jd((yrs, 7, 1, 3, 30, 0), tz='US/Pacific')
+        self.assertTrue(np.allclose(pacific, calendar_to_jd(dts, tz='US/Pacific'),
+                                    rtol=0, atol=1e-9))
+        #PDT in July
+        self.assertTrue(np.allclose(pacific - calendar_to_jd(dts), 7/24.,
+                                    rtol=0, atol=1e-9))
+
+        offsets = np.where(yrs % 2 == 0, -8, 1)
+        jds = calendar_to_jd((yrs, 7, 1, 3, 30, 0), tz=offsets)
+        self.assertTrue(np.allclose(jds - calendar_to_jd(dts), -offsets/24.,
+                                    rtol=0, atol=1e-9))
+
+        dt64 = np.array(dts, dtype='datetime64[m]')
+        self.assertTrue(np.allclose(calendar_to_jd(dt64, tz='US/Pacific'),
+                                    pacific, rtol=0, atol=1e-9))
+
+        #minute by minute across the start and end of Australian DST, which
+        #changes by 30 minutes on Lord Howe Island
+        for zone in ('US/Pacific', 'Australia/Lord_Howe'):
+            for day in ('2015-03-08', '2015-04-05', '2015-10-04'):
+                start = np.datetime64(day + 'T00:00')
+                dt64 = start + np.arange(0, 240, 7).astype('timedelta64[m]')
+                dts = [datetime.datetime(*d.timetuple()[:6])
+                       for d in dt64.astype(object)]
+                expected = calendar_to_jd(dts, tz=zone)
+                self.assertTrue(np.allclose(calendar_to_jd(dt64, tz=zone),
+                                            expected, rtol=0, atol=1e-9))
+
+
+class TestDeltaAT(unittest.TestCase):
+    def tearDown(self):
+        astropysics.obstools._leap_second_table = None
+
+    def test_array_delta_AT(self):
+        import numpy as np
+        from astropysics.obstools import calendar_to_jd, delta_AT
+
+        dates = [(1962, 1, 1, 0, 0, 0), (1972, 6, 30, 23, 59, 59),
+                 (1972, 7, 1, 0, 0, 0), (2009, 1, 1, 0, 0, 1),
+                 (2016, 12, 31, 23, 59, 59), (2017, 1, 1, 0, 0, 0)]
+        jds = np.array([calendar_to_jd(d) for d in dates])
+        dat = delta_AT(jds)
+        self.assertEqual(dat.shape, jds.shape)
+        self.assertTrue(np.allclose(dat, [1.845858, 10, 11, 34, 36, 37]))
+        for jd, d in zip(jds, dat):
+            self.assertEqual(delta_AT(jd), d)
+        self.assertTrue(np.allclose(delta_AT(jds, usett=True) - dat, 32.184))
+
+    def test_leap_second_file(self):
+        import os, tempfile, warnings
+        from astropysics.obstools import calendar_to_jd, delta_AT, \
+                                         load_leap_second_table
+
+        fd, fn = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write('#@\t3991593600\n')
+                f.write('2272060800\t10\t# 1 Jan 1972\n')
+                f.write('3692217600\t37\t# 1 Jan 2017\n')
+            mjds, delats, expiry = load_leap_second_table(fn)
+        finally:
+            os.remove(fn)
+
+        self.assertEqual(list(mjds), [41317, 57754])
+        self.assertEqual(expiry, calendar_to_jd((2026, 6, 28, 0, 0, 0), mjd=True))
+        #the pre-1972 drift terms are kept
+        self.assertAlmostEqual(delta_AT(calendar_to_jd((1962, 1, 1, 0, 0, 0))),
+                               1.845858)
+        self.assertEqual(delta_AT(calendar_to_jd((2016, 1, 1))), 10)
+
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            delta_AT(calendar_to_jd((2027, 1, 1)))
+        self.assertEqual(len(w), 1)
+
+
+class TestJulianDateArray(unittest.TestCase):
+    def setUp(self):
+        import numpy as np
+        from astropysics.obstools import JulianDateArray
+
+        self.dt64 = np.array(['2012-03-20T05:14:00.000000',
+                              '2012-03-20T05:14:00.000001',
+                              '2016-12-31T23:59:59.500000',
+                              '2017-01-01T00:00:00.250000'],
+                             dtype='datetime64[us]')
+        self.t = JulianDateArray.fromCalendar(self.dt64)
+
+    def test_precision(self):
+        import numpy as np
+
+        t = self.t
+        self.assertTrue(abs((t[1] - t[0])*86400 - 1e-6) < 1e-10)
+        self.assertTrue(np.all(t.toDatetime64() == self.dt64))
+        self.assertTrue(np.all(np.abs(t.jd - np.asarray(t)) == 0))
+        self.assertTrue(np.all(np.abs(t.jd2) <= .5))
+
+        #adding tiny intervals is not lost in the whole days
+        dt = (t + 1e-11) - t
+        self.assertTrue(np.all(np.abs(dt*86400 - 864e-9) < 1e-12))
+
+    def test_scales(self):
+        import numpy as np
+
+        t = self.t
+        tai = t.tai.toDatetime64()
+        self.assertEqual(str(tai[0]), '2012-03-20T05:14:34.000000')
+        self.assertEqual(str(tai[2]), '2017-01-01T00:00:35.500000')
+        self.assertEqual(str(tai[3]), '2017-01-01T00:00:37.250000')
+        dtt = ((t.tt.jd1 - t.jd1) + (t.tt.jd2 - t.jd2))*86400
+        self.assertTrue(np.allclose(dtt, [66.184, 66.184, 68.184, 69.184],
+                                    rtol=0, atol=1e-9))
+
+        #round trips through every scale
+        for scale in t.scales:
+            back = t.toScale(scale).utc
+            self.assertEqual(back.scale, 'utc')
+            self.assertTrue(np.all(back.toDatetime64() == self.dt64))
+
+        t.dut1 = np.array([.1, .2, -.3, -.4])
+        ut1 = t.ut1
+        self.assertTrue(np.allclose(((ut1.jd1 - t.jd1) + (ut1.jd2 - t.jd2))*86400,
+                                    t.dut1, rtol=0, atol=1e-9))
+        self.assertTrue(np.allclose(ut1[2:].dut1, [-.3, -.4]))
+
+    def test_accepted_as_jd(self):
+        import numpy as np
+        from astropysics.obstools import jd_to_epoch, delta_AT
+        from astropysics.coords import greenwich_sidereal_time, FK5Coordinates
+        from astropysics.coords.ephems import Moon
+
+        t = self.t
+        self.assertTrue(np.allclose(delta_AT(t.tt), [34, 34, 36, 37]))
+        self.assertTrue(np.allclose(jd_to_epoch(t), jd_to_epoch(t.tt.jd),
+                                    rtol=0, atol=1e-12))
+        self.assertTrue(np.allclose(greenwich_sidereal_time(t),
+                                    greenwich_sidereal_time(t.jd),
+                                    rtol=0, atol=1e-7))
+        self.assertTrue(np.allclose(Moon()(t).x, Moon()(t.tt.jd).x))
+
+        c = FK5Coordinates(10, 20)
+        c.jdepoch = t[0]
+        self.assertAlmostEqual(c.epoch, jd_to_epoch(t[0].tt.jd))